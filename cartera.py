@@ -0,0 +1,556 @@
+# cartera.py
+
+"""
+Cartera de inversiones de las cuentas de broker (config.OPERACIONES_BROKER).
+Cada título se registra en una subcuenta de acciones de la cuenta del broker,
+con la cantidad como "amount" del split y el costo como "value", de modo que
+el libro guarda todos los lotes sin estructuras aparte: una venta acredita el
+costo FIFO de los lotes vendidos (libro.costo_titulo) y la diferencia con lo
+cobrado va a CARTERA["resultados"].
+
+Las operaciones de los archivos del broker (compras, ventas y dividendos) se
+convierten en transacciones con el formato de importador.py: el dinero sale o
+entra de la cuenta del broker, las comisiones van a CARTERA["comisiones"] y
+los dividendos a CARTERA["dividendos"].
+
+Cartera lee todas las operaciones del libro como arrays paralelos y calcula
+posiciones, costo, valor de mercado y resultados realizados y no realizados
+con aritmética de arrays. Los lotes se consumen en orden FIFO: el costo de las
+primeras q unidades compradas de un título es una interpolación lineal sobre
+la cantidad comprada acumulada, así que el costo de todas las ventas (y el de
+lo que queda en cartera cada día) sale de una sola llamada a np.interp.
+Los importes en moneda extranjera se expresan en MONEDA_PRINCIPAL: el costo
+con el valor de cada transacción y los precios con la cotización de cada día.
+"""
+
+import csv
+import hashlib
+from datetime import date, datetime
+
+import config
+from cotizaciones import ESCALA, a_ordinal, agregar_precios, leer_series
+from dinero import Monto
+from gnucash_utils import LOCALE_PREDETERMINADO, parse_centavos
+
+# Claves de CARTERA que son cuentas del libro.
+CUENTAS_CARTERA = ("dividendos", "comisiones", "resultados")
+
+# Separación entre títulos al buscar precios de todos juntos: mayor que
+# cualquier ordinal de fecha.
+_SEPARACION_TITULOS = 1_000_000
+
+
+def _operacion(tipo, operaciones):
+    """Operación ("compra", "venta" o "dividendo") del texto de la columna tipo."""
+    tipo = tipo.strip().lower()
+    candidatas = [t for t in operaciones if tipo.startswith(t.lower())]
+    return operaciones[max(candidatas, key=len)] if candidatas else None
+
+
+def _id_operacion(fuente, fecha, operacion, especie, importe, repeticion):
+    contenido = f"{fecha}|{operacion}|{especie}|{importe}|{repeticion}"
+    return f"{fuente}:{hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:16]}"
+
+
+def leer_operaciones(fuente, ruta):
+    """
+    Lee un archivo de operaciones del broker 'fuente'. Devuelve (operaciones
+    ordenadas por fecha, errores [(linea, motivo)]); cada operación es
+    {"linea", "fecha", "operacion", "especie", "cantidad" (Monto con la
+    fracción de CARTERA), "importe", "comision" (centavos), "id_externo"}.
+    """
+    spec = config.OPERACIONES_BROKER[fuente]
+    columnas = spec["columnas"]
+    locale = spec.get("locale", LOCALE_PREDETERMINADO)
+    formato_fecha = spec.get("formato_fecha", "%Y-%m-%d")
+    fraccion = config.CARTERA["fraccion"]
+    with open(ruta, encoding=spec.get("codificacion", "utf-8-sig"), newline="") as f:
+        lector = csv.DictReader(f, delimiter=spec.get("separador", ","))
+        filas = [(lector.line_num, fila) for fila in lector]
+
+    def textos(nombre):
+        if nombre not in columnas:
+            return [""] * len(filas)
+        return [str(fila.get(columnas[nombre]) or "").strip() for _, fila in filas]
+
+    importes = parse_centavos(textos("importe"), locale, estricto=False)
+    comisiones = parse_centavos(textos("comision"), locale, estricto=False)
+    operaciones = []
+    errores = []
+    repeticiones = {}
+    for fila in zip(
+        (linea for linea, _ in filas),
+        textos("fecha"),
+        textos("tipo"),
+        textos("especie"),
+        textos("cantidad"),
+        textos("precio"),
+        importes,
+        textos("comision"),
+        comisiones,
+        textos("id"),
+    ):
+        linea, fecha, tipo, especie, cantidad, precio, importe = fila[:7]
+        texto_comision, comision, identificador = fila[7:]
+        operacion = _operacion(tipo, spec["operaciones"])
+        try:
+            if operacion is None:
+                raise ValueError(f"El tipo de operación '{tipo}' no es conocido.")
+            if not especie:
+                raise ValueError("Falta la especie.")
+            try:
+                fecha = datetime.strptime(fecha, formato_fecha).strftime("%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"La fecha '{fecha}' no es válida.") from None
+            if texto_comision and comision is None:
+                raise ValueError(f"La comisión '{texto_comision}' no es válida.")
+            if operacion == "dividendo":
+                cantidad = None
+            else:
+                cantidad = abs(Monto.de_texto(cantidad, locale, fraccion))
+                if not cantidad:
+                    raise ValueError("La cantidad no puede ser cero.")
+                if importe is None and precio:
+                    # Sin importe bruto, se calcula con el precio.
+                    precio = Monto.de_texto(precio, locale, ESCALA)
+                    importe = Monto.de_decimal(
+                        cantidad.a_decimal() * precio.a_decimal()
+                    ).unidades
+            if importe is None:
+                raise ValueError("El importe no es válido.")
+        except ValueError as e:
+            errores.append((linea, str(e)))
+            continue
+        importe, comision = abs(importe), abs(comision or 0)
+        if identificador:
+            id_externo = f"{fuente}:{identificador}"
+        else:
+            clave = (fecha, operacion, especie.upper(), importe)
+            repeticiones[clave] = repeticiones.get(clave, 0) + 1
+            id_externo = _id_operacion(fuente, *clave, repeticiones[clave])
+        operaciones.append(
+            {
+                "linea": linea,
+                "fecha": fecha,
+                "operacion": operacion,
+                "especie": especie.upper(),
+                "cantidad": cantidad,
+                "importe": importe,
+                "comision": comision,
+                "id_externo": id_externo,
+            }
+        )
+    operaciones.sort(key=lambda o: o["fecha"])
+    return operaciones, errores
+
+
+def verificar_cuentas_cartera(libro):
+    """Lanza ValueError si alguna cuenta de CARTERA no existe en el libro."""
+    faltantes = libro.verificar_cuentas(
+        sorted({config.CARTERA[clave] for clave in CUENTAS_CARTERA})
+    )
+    if faltantes:
+        raise ValueError(
+            f"Las cuentas {', '.join(faltantes)} no fueron encontradas en el libro."
+        )
+
+
+def _registro(operacion, fuente, ruta_titulo, cotizaciones, costo=None):
+    """
+    Transacción con formato de importador.py para una operación. En las
+    ventas, 'costo' es el costo FIFO (Monto en MONEDA_PRINCIPAL) de los lotes
+    vendidos; sin él (una venta ya registrada, que solo se informa como
+    duplicada, o simulada sin el libro) se usa lo cobrado, sin resultado.
+    """
+    spec = config.OPERACIONES_BROKER[fuente]
+    moneda = spec.get("moneda", config.MONEDA_PRINCIPAL)
+    extranjera = moneda != config.MONEDA_PRINCIPAL
+    if extranjera and cotizaciones is None:
+        raise ValueError(f"Faltan las cotizaciones para las operaciones en {moneda}.")
+
+    def valor(centavos):
+        monto = Monto(centavos)
+        if not extranjera:
+            return monto
+        return cotizaciones.a_moneda_principal(monto, operacion["fecha"])
+
+    def split(cuenta, monto, cantidad=None):
+        datos = {"cuenta": cuenta, "monto": monto.texto()}
+        if cantidad is not None:
+            datos["cantidad"] = cantidad.texto()
+        return datos
+
+    importe, comision = operacion["importe"], operacion["comision"]
+    valor_importe, valor_comision = valor(importe), valor(comision)
+    especie = operacion["especie"]
+    if operacion["operacion"] == "dividendo":
+        descripcion = f"Dividendo {especie}"
+        neto, valor_neto = importe - comision, valor_importe - valor_comision
+        splits = [split(config.CARTERA["dividendos"], -valor_importe)]
+    else:
+        cantidad = operacion["cantidad"]
+        descripcion = (
+            f"{operacion['operacion'].capitalize()} de "
+            f"{format(cantidad.a_decimal().normalize(), 'f')} {especie}"
+        )
+        if operacion["operacion"] == "compra":
+            neto, valor_neto = -importe - comision, -valor_importe - valor_comision
+            splits = [split(ruta_titulo, valor_importe, cantidad)]
+        else:
+            neto, valor_neto = importe - comision, valor_importe - valor_comision
+            if costo is None:
+                costo = valor_importe
+            splits = [split(ruta_titulo, -costo, -cantidad)]
+            if valor_importe != costo:
+                resultado = costo - valor_importe
+                splits.append(split(config.CARTERA["resultados"], resultado))
+    if comision:
+        splits.append(split(config.CARTERA["comisiones"], valor_comision))
+    splits.append(
+        split(spec["cuenta"], valor_neto, Monto(neto) if extranjera else None)
+    )
+    return {
+        "fecha": operacion["fecha"],
+        "descripcion": descripcion,
+        "id_externo": operacion["id_externo"],
+        "splits": splits,
+    }
+
+
+def registros(operaciones, fuente, libro, cotizaciones=None, errores=None):
+    """
+    Genera pares (linea, registro) para importador.importar a partir de las
+    operaciones de 'fuente'. Las cuentas de los títulos se crean a medida que
+    aparecen (libro.asegurar_titulo) y el costo de cada venta se pide al libro
+    justo antes de entregarla, con las operaciones anteriores ya registradas.
+    Las operaciones en moneda extranjera se valúan con 'cotizaciones'; las que
+    no se pueden valuar van a 'errores'.
+    """
+    cuenta = config.OPERACIONES_BROKER[fuente]["cuenta"]
+    rutas = {}
+    for operacion in operaciones:
+        especie = operacion["especie"]
+        try:
+            ruta = costo = None
+            if operacion["operacion"] != "dividendo":
+                if especie not in rutas:
+                    rutas[especie] = libro.asegurar_titulo(cuenta, especie)
+                ruta = rutas[especie]
+            if operacion["operacion"] == "venta" and not libro.existe(
+                operacion["id_externo"]
+            ):
+                costo = libro.costo_titulo(
+                    ruta, operacion["cantidad"], operacion["fecha"]
+                )
+            registro = _registro(operacion, fuente, ruta, cotizaciones, costo)
+        except ValueError as e:
+            if errores is None:
+                raise
+            errores.append((operacion["linea"], str(e)))
+            continue
+        yield operacion["linea"], registro
+
+
+def cuentas_de_titulos(root_account):
+    """
+    Genera (cuenta del título, moneda del broker) para cada subcuenta de
+    título de las cuentas de OPERACIONES_BROKER.
+    """
+    from gnucash_utils import find_account_by_path
+
+    vistas = set()
+    for spec in config.OPERACIONES_BROKER.values():
+        ruta = config.CUENTAS.get(spec["cuenta"], spec["cuenta"])
+        if ruta in vistas:
+            continue
+        vistas.add(ruta)
+        broker = find_account_by_path(root_account, ruta)
+        if broker is None:
+            continue
+        moneda = broker.GetCommodity().get_mnemonic()
+        for cuenta in broker.get_children():
+            if cuenta.GetCommodity().get_namespace() == config.CARTERA["espacio"]:
+                yield cuenta, moneda
+
+
+def leer_precios(ruta=None) -> dict:
+    """{especie: [(ordinal, precio en 1/ESCALA)]} del CSV de precios."""
+    series = leer_series(ruta or config.CARTERA["precios"])
+    return {especie.strip().upper(): filas for especie, filas in series.items()}
+
+
+def cargar_precios(book, series: dict, fuente="cartera.py"):
+    """
+    Agrega a la base de precios los precios de 'series' ({especie: filas})
+    en la moneda del broker donde se tiene cada título. No guarda el libro.
+    Devuelve ({especie: precios agregados}, especies que no están en cartera).
+    """
+    tabla = book.get_table()
+    monedas = {
+        cuenta.GetCommodity().get_mnemonic(): moneda
+        for cuenta, moneda in cuentas_de_titulos(book.get_root_account())
+    }
+    agregados = {}
+    for especie, filas in series.items():
+        if especie not in monedas:
+            continue
+        commodity = tabla.lookup(config.CARTERA["espacio"], especie)
+        currency = tabla.lookup("ISO4217", monedas[especie])
+        agregados[especie] = agregar_precios(
+            book, commodity, currency, filas, "last", fuente
+        )
+    return agregados, sorted(set(series) - set(monedas))
+
+
+def operaciones_de_titulo(cuenta, ruta_resultados=None):
+    """
+    Genera (fecha AAAA-MM-DD, cantidad, valor en centavos) de cada split de la
+    cuenta de un título. En las ventas el valor es lo cobrado: el costo que
+    acredita el split más el resultado de la misma transacción en
+    'ruta_resultados' (por defecto, la cuenta de CARTERA["resultados"]).
+    """
+    from gnucash_utils import ruta_de_cuenta
+
+    if ruta_resultados is None:
+        resultados = config.CARTERA["resultados"]
+        ruta_resultados = config.CUENTAS.get(resultados, resultados)
+    for split in cuenta.GetSplitList():
+        cantidad = split.GetAmount()
+        cantidad = cantidad.num() / cantidad.denom()
+        transaccion = split.GetParent()
+        valor = Monto.de_gnc(split.GetValue(), 100).unidades
+        if cantidad < 0:
+            valor += sum(
+                Monto.de_gnc(otro.GetValue(), 100).unidades
+                for otro in transaccion.GetSplitList()
+                if ruta_de_cuenta(otro.GetAccount()) == ruta_resultados
+            )
+        yield transaccion.GetDate().strftime("%Y-%m-%d"), cantidad, valor
+
+
+class Cartera:
+    """
+    Operaciones de todos los títulos como arrays paralelos, ordenadas por
+    título y fecha (en un mismo día, las compras antes que las ventas).
+    Las cantidades son float64 y los valores, centavos de MONEDA_PRINCIPAL.
+    """
+
+    def __init__(self, titulos, monedas, indice, fechas, cantidades, valores):
+        import numpy as np
+
+        self.titulos = list(titulos)  # ruta de la cuenta de cada título
+        self.monedas = list(monedas)  # moneda del broker de cada título
+        indice = np.asarray(indice, dtype=np.int64)
+        fechas = np.asarray(fechas, dtype="datetime64[D]")
+        cantidades = np.asarray(cantidades, dtype=np.float64)
+        valores = np.asarray(valores, dtype=np.float64)
+        orden = np.lexsort((cantidades < 0, fechas, indice))
+        self.indice = indice[orden]
+        self.fechas = fechas[orden]
+        self.cantidades = cantidades[orden]
+        self.valores = valores[orden]
+
+        cantidad_titulos = len(self.titulos)
+        compras = self.cantidades > 0
+        self.comprado = np.where(compras, self.cantidades, 0.0)
+        self.vendido = np.where(compras, 0.0, -self.cantidades)
+        # Curva de costo de todos los títulos, uno detrás de otro: cantidad
+        # comprada acumulada → costo acumulado. El tramo del título k empieza
+        # en self._base[k] y mide self._total_comprado[k].
+        self._x = np.concatenate(([0.0], np.cumsum(self.cantidades[compras])))
+        self._y = np.concatenate(([0.0], np.cumsum(self.valores[compras])))
+        self._total_comprado = np.bincount(
+            self.indice, weights=self.comprado, minlength=cantidad_titulos
+        )
+        self._base = np.concatenate(([0.0], np.cumsum(self._total_comprado)[:-1]))
+
+        # Costo (FIFO) y resultado de cada venta.
+        vendido_hasta = self._acumulado_por_titulo(self.vendido)
+        costo_ventas = self._costo(self.indice, vendido_hasta) - self._costo(
+            self.indice, vendido_hasta - self.vendido
+        )
+        self.realizado = np.where(compras, 0.0, -self.valores - costo_ventas)
+
+    @classmethod
+    def del_libro(cls, root_account):
+        """Lee las operaciones de todas las cuentas de títulos del libro."""
+        from gnucash_utils import ruta_de_cuenta
+
+        titulos, monedas = [], []
+        indice, fechas, cantidades, valores = [], [], [], []
+        for cuenta, moneda in cuentas_de_titulos(root_account):
+            numero = len(titulos)
+            titulos.append(ruta_de_cuenta(cuenta))
+            monedas.append(moneda)
+            for fecha, cantidad, valor in operaciones_de_titulo(cuenta):
+                indice.append(numero)
+                fechas.append(fecha)
+                cantidades.append(cantidad)
+                valores.append(valor)
+        return cls(titulos, monedas, indice, fechas, cantidades, valores)
+
+    @classmethod
+    def de_cuenta(cls, cuenta):
+        """Cartera con un solo título, el de 'cuenta'."""
+        from gnucash_utils import ruta_de_cuenta
+
+        operaciones = list(operaciones_de_titulo(cuenta))
+        fechas = [fecha for fecha, _, _ in operaciones]
+        cantidades = [cantidad for _, cantidad, _ in operaciones]
+        valores = [valor for _, _, valor in operaciones]
+        moneda = cuenta.get_parent().GetCommodity().get_mnemonic()
+        return cls(
+            [ruta_de_cuenta(cuenta)],
+            [moneda],
+            [0] * len(operaciones),
+            fechas,
+            cantidades,
+            valores,
+        )
+
+    def costo_venta(self, numero, cantidad, fecha) -> int:
+        """
+        Costo FIFO, en centavos, de vender 'cantidad' unidades del título
+        'numero' el día 'fecha', después de sus operaciones hasta ese día
+        (inclusive). Lanza ValueError si supera la tenencia de ese día.
+        """
+        import numpy as np
+
+        propias = (self.indice == numero) & (
+            self.fechas <= np.datetime64(fecha, "D")
+        )
+        tenencia = self.cantidades[propias].sum()
+        if cantidad > tenencia + 1e-9:
+            raise ValueError(
+                f"La venta de {cantidad:g} supera la tenencia de {tenencia:g} "
+                f"en '{self.titulos[numero]}'."
+            )
+        vendido = self.vendido[propias].sum()
+        titulo = np.array([numero])
+        costo = self._costo(titulo, vendido + cantidad) - self._costo(titulo, vendido)
+        return int(np.rint(costo[0]))
+
+    def _acumulado_por_titulo(self, pesos):
+        """Suma acumulada de 'pesos' dentro de cada título."""
+        import numpy as np
+
+        acumulado = np.cumsum(pesos)
+        totales = np.bincount(self.indice, weights=pesos, minlength=len(self.titulos))
+        inicio = np.concatenate(([0.0], np.cumsum(totales)[:-1]))
+        return acumulado - inicio[self.indice]
+
+    def _costo(self, titulos, cantidades):
+        """Costo de las primeras 'cantidades' unidades compradas de cada título."""
+        import numpy as np
+
+        cantidades = np.minimum(cantidades, self._total_comprado[titulos])
+        return np.interp(self._base[titulos] + cantidades, self._x, self._y)
+
+    def precios_del_libro(self, book) -> dict:
+        """{número de título: (ordinales, precios en 1/ESCALA)} del libro."""
+        tabla = book.get_table()
+        pdb = book.get_price_db()
+        precios = {}
+        for numero, (ruta, moneda) in enumerate(zip(self.titulos, self.monedas)):
+            especie = ruta.rsplit(".", 1)[-1]
+            commodity = tabla.lookup(config.CARTERA["espacio"], especie)
+            currency = tabla.lookup("ISO4217", moneda)
+            if commodity is None or currency is None:
+                continue
+            filas = sorted(
+                (
+                    a_ordinal(p.get_time64()),
+                    Monto.de_gnc(p.get_value(), ESCALA).unidades,
+                )
+                for p in pdb.get_prices(commodity, currency)
+            )
+            if filas:
+                precios[numero] = tuple(map(list, zip(*filas)))
+        return precios
+
+    def _matriz_precios(self, dias, precios):
+        """
+        Precio de cada título (filas) en cada día (columnas), el último
+        conocido hasta ese día, en una sola búsqueda sobre todos los títulos.
+        NaN donde todavía no hay precio.
+        """
+        import numpy as np
+
+        claves, valores = [], []
+        for numero, (ordinales, precios_titulo) in sorted(precios.items()):
+            claves.append(numero * _SEPARACION_TITULOS + np.asarray(ordinales))
+            valores.append(np.asarray(precios_titulo, dtype=np.float64) / ESCALA)
+        matriz = np.full((len(self.titulos), len(dias)), np.nan)
+        if not claves:
+            return matriz
+        claves, valores = np.concatenate(claves), np.concatenate(valores)
+        ordinales_dias = dias.astype(np.int64) + date(1970, 1, 1).toordinal()
+        buscadas = (
+            np.arange(len(self.titulos))[:, None] * _SEPARACION_TITULOS
+            + ordinales_dias[None, :]
+        )
+        posicion = np.searchsorted(claves, buscadas, side="right") - 1
+        valida = (posicion >= 0) & (
+            claves[np.maximum(posicion, 0)] // _SEPARACION_TITULOS
+            == np.arange(len(self.titulos))[:, None]
+        )
+        matriz[valida] = valores[posicion[valida]]
+        return matriz
+
+    def valuar(self, desde, hasta, precios, cotizaciones=None) -> dict:
+        """
+        Revalúa toda la cartera en cada día entre 'desde' y 'hasta' de una
+        sola vez. 'precios' es {número de título: (ordinales, precios)} (ver
+        precios_del_libro) y 'cotizaciones', la CacheCotizaciones para los
+        títulos en moneda extranjera. Los títulos sin precio se valúan al
+        costo.
+        Devuelve {"dias", "cantidad", "costo", "valor", "realizado",
+        "no_realizado"}: matrices título × día (en centavos, salvo cantidad).
+        """
+        import numpy as np
+
+        desde, hasta = np.datetime64(desde, "D"), np.datetime64(hasta, "D")
+        dias = np.arange(desde, hasta + 1, dtype="datetime64[D]")
+        forma = (len(self.titulos), len(dias))
+        dentro = self.fechas <= hasta
+        # Las operaciones anteriores a 'desde' cuentan desde el primer día.
+        celda = self.indice[dentro] * len(dias) + np.maximum(
+            (self.fechas[dentro] - desde).astype(np.int64), 0
+        )
+
+        def acumular(pesos):
+            suma = np.bincount(
+                celda, weights=pesos[dentro], minlength=forma[0] * forma[1]
+            )
+            return np.cumsum(suma.reshape(forma), axis=1)
+
+        cantidad = acumular(self.cantidades)
+        filas = np.repeat(np.arange(forma[0]), forma[1])
+        costo = (
+            self._costo(filas, acumular(self.comprado).ravel())
+            - self._costo(filas, acumular(self.vendido).ravel())
+        ).reshape(forma)
+        realizado = acumular(self.realizado)
+
+        precio = self._matriz_precios(dias, precios)
+        extranjeros = [
+            i
+            for i, moneda in enumerate(self.monedas)
+            if moneda != config.MONEDA_PRINCIPAL
+        ]
+        if extranjeros:
+            if cotizaciones is None:
+                raise ValueError(
+                    "Faltan las cotizaciones para los títulos en otra moneda."
+                )
+            precio[extranjeros] *= cotizaciones.cotizaciones(dias) / ESCALA
+        valor = np.where(np.isnan(precio), costo, cantidad * precio * 100)
+        costo, valor, realizado = (np.rint(m) for m in (costo, valor, realizado))
+        return {
+            "dias": dias,
+            "cantidad": cantidad,
+            "costo": costo,
+            "valor": valor,
+            "realizado": realizado,
+            "no_realizado": valor - costo,
+        }
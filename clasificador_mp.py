@@ -0,0 +1,162 @@
+# clasificador_mp.py
+
+"""
+Clasificación de actividades de Mercado Pago a cuentas de config.CUENTAS.
+Las reglas declarativas de config.REGLAS_MP se compilan una sola vez:
+- se agrupan por tipo de actividad,
+- los patrones de cada grupo se combinan en una única expresión regular que
+  devuelve la primera regla cuyo patrón aparece en el texto,
+- el resultado de esa expresión se memoriza por (tipo, texto), ya que los
+  comercios se repiten mucho.
+Así cada actividad cuesta, en el caso habitual, una búsqueda en un diccionario.
+"""
+
+import re
+from decimal import Decimal
+
+from gnucash_utils import monto_a_texto, parse_decimal
+
+CUENTA_MP = "activo_mp"
+
+
+def monto_actividad(actividad) -> Decimal:
+    """
+    Devuelve el monto de la actividad con signo: negativo si sale dinero de
+    Mercado Pago. Acepta un número, un texto, o un objeto con "value" o con
+    "fraction"/"cents" y un "sign" opcional.
+    """
+    monto = actividad.get("amount")
+    if isinstance(monto, dict):
+        if "value" in monto:
+            valor = Decimal(str(monto["value"]))
+        else:
+            fraction = str(monto.get("fraction", "0")).replace(".", "")
+            cents = str(monto.get("cents") or "0")
+            valor = Decimal(f"{fraction}.{cents}")
+        if monto.get("sign") == "-" and valor > 0:
+            valor = -valor
+        return valor
+    if isinstance(monto, str):
+        return parse_decimal(monto)
+    if monto is None:
+        raise ValueError("La actividad no tiene monto.")
+    return Decimal(str(monto))
+
+
+def texto_actividad(actividad) -> str:
+    """Texto sobre el que se evalúan los patrones: título y descripción."""
+    partes = (actividad.get("title"), actividad.get("description"))
+    return " ".join(str(p) for p in partes if p)
+
+
+def fecha_actividad(actividad) -> str:
+    """Fecha de la actividad en formato AAAA-MM-DD."""
+    fecha = actividad.get("date") or actividad.get("date_created")
+    if not fecha:
+        raise ValueError("La actividad no tiene fecha.")
+    return str(fecha)[:10]
+
+
+class ClasificadorMP:
+    """Matcher compilado a partir de una tabla de reglas."""
+
+    def __init__(self, reglas):
+        self.reglas = list(reglas)
+        for regla in self.reglas:
+            if "cuenta" not in regla:
+                raise ValueError(f"La regla {regla} no indica 'cuenta'.")
+        self._por_tipo = {}
+        self._memo = {}
+
+    def _grupo(self, tipo):
+        """
+        Devuelve (índices de reglas aplicables al tipo, regex combinada).
+        Cada alternativa de la regex es un lookahead anclado al inicio, de modo
+        que el motor las prueba en orden y gana la primera regla que coincide.
+        """
+        grupo = self._por_tipo.get(tipo)
+        if grupo is not None:
+            return grupo
+        indices = [
+            i
+            for i, regla in enumerate(self.reglas)
+            if not regla.get("tipos") or tipo in regla["tipos"]
+        ]
+        alternativas = []
+        for posicion, i in enumerate(indices):
+            patron = self.reglas[i].get("patron")
+            busqueda = f"(?=.*?(?:{patron}))" if patron else ""
+            alternativas.append(f"{busqueda}(?P<r{posicion}>)")
+        combinada = None
+        if alternativas:
+            combinada = re.compile(
+                r"\A(?:" + "|".join(alternativas) + ")", re.IGNORECASE | re.DOTALL
+            )
+        grupo = (indices, combinada)
+        self._por_tipo[tipo] = grupo
+        return grupo
+
+    def _cumple_monto(self, regla, monto):
+        sentido = regla.get("sentido")
+        if sentido == "egreso" and monto >= 0:
+            return False
+        if sentido == "ingreso" and monto <= 0:
+            return False
+        absoluto = abs(monto)
+        if "monto_min" in regla and absoluto < Decimal(str(regla["monto_min"])):
+            return False
+        if "monto_max" in regla and absoluto > Decimal(str(regla["monto_max"])):
+            return False
+        return True
+
+    def _primera_por_texto(self, tipo, texto):
+        """Posición (dentro del grupo del tipo) de la primera regla que coincide."""
+        clave = (tipo, texto)
+        if clave not in self._memo:
+            indices, combinada = self._grupo(tipo)
+            match = combinada.match(texto) if combinada else None
+            self._memo[clave] = int(match.lastgroup[1:]) if match else None
+        return self._memo[clave]
+
+    def clasificar(self, actividad):
+        """
+        Devuelve la clave de cuenta de la primera regla que aplica a la
+        actividad, o None si ninguna aplica.
+        """
+        tipo = actividad.get("type")
+        texto = texto_actividad(actividad)
+        monto = monto_actividad(actividad)
+        posicion = self._primera_por_texto(tipo, texto)
+        if posicion is None:
+            return None
+        indices, _ = self._grupo(tipo)
+        regla = self.reglas[indices[posicion]]
+        if self._cumple_monto(regla, monto):
+            return regla["cuenta"]
+        # Caso poco frecuente: el patrón coincidió pero el monto no. Se siguen
+        # evaluando, en orden, las reglas posteriores.
+        for i in indices[posicion + 1 :]:
+            regla = self.reglas[i]
+            patron = regla.get("patron")
+            if patron and not re.search(patron, texto, re.IGNORECASE | re.DOTALL):
+                continue
+            if self._cumple_monto(regla, monto):
+                return regla["cuenta"]
+        return None
+
+
+def actividad_a_transaccion(actividad, cuenta):
+    """
+    Arma la especificación de transacción (formato de importador.py) que
+    registra la actividad contra la cuenta de Mercado Pago.
+    """
+    monto = monto_actividad(actividad)
+    return {
+        "fecha": fecha_actividad(actividad),
+        "descripcion": texto_actividad(actividad) or "Mercado Pago",
+        "id_externo": f"mp:{actividad['id']}",
+        "splits": [
+            {"cuenta": CUENTA_MP, "monto": monto_a_texto(monto)},
+            {"cuenta": cuenta, "monto": monto_a_texto(-monto)},
+        ],
+    }
@@ -0,0 +1,136 @@
+# cli.py
+
+"""
+Punto de entrada único para todos los comandos del proyecto.
+Cada comando es el main() de uno de los scripts, que se importa recién al
+elegirlo: la ayuda, la validación de argumentos y las simulaciones
+(--simular) no cargan los bindings de GnuCash, que solo se importan en el
+momento de abrir el libro.
+Uso:
+    python cli.py COMANDO [opciones del comando] [--profile]
+    python cli.py COMANDO --help
+Ejemplos:
+    python cli.py sueldo 1.500.000 --simular
+    python cli.py importar lote.csv --simular
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+DIRECTORIO_SCRIPTS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "scripts"
+)
+
+# comando: (módulo, descripción, argumentos extra de main())
+COMANDOS = {
+    "transaccion": (
+        "transaction",
+        "Registra una transacción de forma interactiva.",
+        {},
+    ),
+    "sueldo": ("sueldo", "Registra el recibo de sueldo o un historial.", {}),
+    "recurrentes": (
+        "registrar_recurrentes",
+        "Registra las transacciones recurrentes vencidas.",
+        {},
+    ),
+    "recarga-allaria": (
+        "registrar_recurrentes",
+        "Registra las recargas pendientes de la tarjeta Allaria.",
+        {"reglas_por_defecto": ["recarga_allaria"]},
+    ),
+    "importar": ("importar_lote", "Importa un lote de transacciones CSV o JSONL.", {}),
+    "extractos": (
+        "importar_extractos",
+        "Importa extractos de bancos, tarjetas, IEB y Mercado Pago.",
+        {},
+    ),
+    "mp-descargar": (
+        "mp_transactions_retrieval",
+        "Descarga las actividades de Mercado Pago.",
+        {},
+    ),
+    "mp-transacciones": (
+        "mp_a_transacciones",
+        "Convierte las actividades de Mercado Pago en transacciones.",
+        {},
+    ),
+    "cola": (
+        "vaciar_cola",
+        "Registra las transacciones encoladas con el libro bloqueado.",
+        {},
+    ),
+    "reporte": ("reporte", "Muestra los totales por cuenta y período.", {}),
+    "tarjetas": (
+        "tarjetas_credito",
+        "Compras en cuotas y proyección de los resúmenes de las tarjetas.",
+        {},
+    ),
+    "cotizaciones": (
+        "cargar_cotizaciones",
+        "Carga las cotizaciones históricas en la base de precios.",
+        {},
+    ),
+    "inversiones": (
+        "inversiones",
+        "Importa operaciones del broker y valúa la cartera.",
+        {},
+    ),
+    "tenencias": (
+        "valuar_tenencias",
+        "Valúa las tenencias en moneda extranjera día por día.",
+        {},
+    ),
+    "exportar": ("exportar_splits", "Exporta los splits del libro a NumPy.", {}),
+    "reconstruir-huellas": (
+        "reconstruir_huellas",
+        "Reconstruye el índice de huellas desde el libro.",
+        {},
+    ),
+    "validar-config": (
+        "validar_config",
+        "Valida config.py contra el libro.",
+        {},
+    ),
+    "migrar-sqlite": ("migrar_sqlite", "Migra el libro XML a SQLite.", {}),
+    "benchmark": ("benchmark", "Mide los tiempos de registro y consulta.", {}),
+    "demonio": ("demonio", "Inicia o detiene el demonio del libro.", {}),
+}
+
+
+def cargar_comando(comando):
+    """Importa el módulo del comando y devuelve (main, argumentos extra)."""
+    modulo, _, extra = COMANDOS[comando]
+    if DIRECTORIO_SCRIPTS not in sys.path:
+        sys.path.insert(1, DIRECTORIO_SCRIPTS)
+    return importlib.import_module(modulo).main, extra
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Herramientas para el libro de GnuCash.",
+        epilog="Cada comando acepta --help con sus propias opciones, y "
+        "--profile para guardar el perfil de cProfile.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    subcomandos = parser.add_subparsers(dest="comando", metavar="COMANDO")
+    for comando, (_, descripcion, _) in COMANDOS.items():
+        # Las opciones de cada comando las valida su propio script.
+        subcomandos.add_parser(comando, help=descripcion, add_help=False)
+    args, resto = parser.parse_known_args()
+    if args.comando is None:
+        parser.print_help()
+        sys.exit(2)
+
+    from instrumentacion import ejecutar_script
+
+    main_comando, extra = cargar_comando(args.comando)
+    # El script lee sys.argv como si se lo hubiera llamado directamente.
+    sys.argv = [f"{os.path.basename(sys.argv[0])} {args.comando}", *resto]
+    ejecutar_script(main_comando, args.comando, **extra)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# cola.py
+
+"""
+Cola local de transacciones para cuando el libro no está disponible.
+Si GnuCash tiene el libro abierto (bloqueado) o se pide diferir el registro
+(--diferir), abrir_libro() entrega un LibroEnCola: cada transacción se valida
+y se agrega como una línea JSON a un archivo junto al libro, sin abrirlo.
+Después, scripts/vaciar_cola.py registra toda la cola en una única sesión con
+un solo guardado: cada entrada se registra o se rechaza por separado (una
+transacción rechazada no deja nada a medias) y la cola solo se vacía cuando
+el libro quedó guardado. Si algo falla antes, la cola queda intacta y se
+puede volver a vaciar: las transacciones ya registradas se omiten como
+duplicadas (ver huellas.py).
+
+Cada línea de la cola es una operación:
+    {"op": "publicar", "registro": {...}, "forzar": false, "encolada": "..."}
+    {"op": "asegurar_titulo", "cuenta": "...", "especie": "...", "encolada": "..."}
+"""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from demonio import LibroSimulado
+from huellas import ruta_sidecar
+from importador import ERRORES_REGISTRO, escribir_rechazo
+
+
+def ruta_cola(uri=None) -> str:
+    return ruta_sidecar("cola.jsonl", uri)
+
+
+def ruta_rechazos(uri=None) -> str:
+    """
+    Rechazos de los vaciados de la cola, junto al libro. Cada vaciado agrega
+    los suyos al final: son la única copia de esas entradas.
+    """
+    return ruta_sidecar("cola.rechazos.jsonl", uri)
+
+
+def aviso_encoladas(cantidad, que="transacciones") -> str:
+    return (
+        f"\033[93mEn la cola: {cantidad} {que}. Se registran en el libro con "
+        "'python cli.py cola'.\033[0m"
+    )
+
+
+@contextmanager
+def _bloqueada(archivo):
+    """Bloqueo exclusivo del archivo de la cola entre procesos."""
+    fcntl.flock(archivo, fcntl.LOCK_EX)
+    try:
+        yield archivo
+    finally:
+        fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+def leer_cola(archivo):
+    """
+    Devuelve (entradas, errores) de un archivo de cola abierto: entradas es
+    una lista de (línea, entrada) y errores, de (línea, texto, error) con las
+    líneas ilegibles (por ejemplo, la última si el proceso se cortó al
+    escribirla).
+    """
+    archivo.seek(0)
+    entradas, errores = [], []
+    for numero, linea in enumerate(archivo, start=1):
+        if not linea.strip():
+            continue
+        try:
+            entradas.append((numero, json.loads(linea)))
+        except json.JSONDecodeError as e:
+            errores.append((numero, linea.strip(), f"Línea ilegible: {e}"))
+    return entradas, errores
+
+
+class LibroEnCola(LibroSimulado):
+    """
+    Misma interfaz que ServicioLibro, sin abrir el libro: valida cada
+    transacción como LibroSimulado y la agrega a la cola. Sin el libro no hay
+    saldos ni costos de títulos (las ventas no se pueden diferir), y los
+    duplicados solo se detectan (por id externo) entre las transacciones que
+    ya están en la cola; el resto se detecta al vaciarla.
+    Cada entrada se escribe completa bajo el bloqueo del archivo; con
+    guardar() o cerrar() se fuerza además a disco.
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_cola()
+        self._archivo = open(self.ruta, "a+", encoding="utf-8")
+        with _bloqueada(self._archivo):
+            entradas, _ = leer_cola(self._archivo)
+        self._ids = {
+            entrada["registro"].get("id_externo")
+            for _, entrada in entradas
+            if entrada.get("op") == "publicar"
+        } - {None, ""}
+        self._titulos = {}
+        self.encoladas = 0
+
+    def _encolar(self, op, **datos):
+        entrada = {"op": op, **datos, "encolada": datetime.now().isoformat()}
+        linea = json.dumps(entrada, ensure_ascii=False, default=str) + "\n"
+        with _bloqueada(self._archivo):
+            self._archivo.write(linea)
+            self._archivo.flush()
+
+    def saldo(self, referencia, fecha=None):
+        raise ValueError(
+            f"El saldo de '{referencia}' no está disponible con el libro en la cola."
+        )
+
+    def existe(self, id_externo) -> bool:
+        return id_externo in self._ids
+
+    def costo_titulo(self, referencia, cantidad, fecha):
+        raise ValueError(
+            f"El costo de '{referencia}' no está disponible con el libro en la cola."
+        )
+
+    def asegurar_titulo(self, referencia, especie) -> str:
+        if (referencia, especie) not in self._titulos:
+            self._encolar("asegurar_titulo", cuenta=referencia, especie=especie)
+            self._titulos[referencia, especie] = super().asegurar_titulo(
+                referencia, especie
+            )
+        return self._titulos[referencia, especie]
+
+    def publicar(self, registro, forzar=False) -> dict:
+        spec = self.validar(registro)
+        if not forzar and spec["id_externo"] in self._ids:
+            return {"estado": "duplicada"}
+        self._encolar("publicar", registro=registro, forzar=forzar)
+        if spec["id_externo"]:
+            self._ids.add(spec["id_externo"])
+        self.encoladas += 1
+        return {"estado": "encolada"}
+
+    def guardar(self):
+        os.fsync(self._archivo.fileno())
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self.guardar()
+            self._archivo.close()
+
+
+def aplicar(libro, entradas, rechazos) -> dict:
+    """
+    Registra las entradas de la cola en orden a través de 'libro' (un
+    ServicioLibro, el cliente del demonio o un LibroSimulado). Cada entrada
+    con errores se escribe en 'rechazos' con el formato de importador.importar
+    y se sigue con la próxima. Devuelve los contadores del vaciado.
+    """
+    resumen = {"registradas": 0, "rechazadas": 0, "duplicadas": 0, "titulos": 0}
+    for linea, entrada in entradas:
+        try:
+            op = entrada.get("op")
+            if op == "asegurar_titulo":
+                libro.asegurar_titulo(entrada["cuenta"], entrada["especie"])
+                resumen["titulos"] += 1
+                continue
+            if op != "publicar":
+                raise ValueError(f"Operación desconocida: '{op}'.")
+            resultado = libro.publicar(
+                entrada["registro"], forzar=entrada.get("forzar", False)
+            )
+        except ERRORES_REGISTRO as e:
+            resumen["rechazadas"] += 1
+            escribir_rechazo(rechazos, linea, entrada.get("registro", entrada), e)
+            continue
+        if resultado["estado"] == "duplicada":
+            resumen["duplicadas"] += 1
+        else:
+            resumen["registradas"] += 1
+    return resumen
+
+
+@contextmanager
+def abrir_cola(ruta=None):
+    """
+    Abre la cola con bloqueo exclusivo durante todo el vaciado (los scripts
+    que encolan en ese momento esperan) y entrega el archivo. Se vacía con
+    vaciar(archivo) una vez guardado el libro.
+    """
+    ruta = ruta or ruta_cola()
+    with open(ruta, "a+", encoding="utf-8") as archivo, _bloqueada(archivo):
+        yield archivo
+
+
+def vaciar(archivo):
+    archivo.truncate(0)
+    archivo.flush()
+    os.fsync(archivo.fileno())
+
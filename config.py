@@ -1,5 +1,13 @@
 # --- CONFIGURACIÓN GENERAL ---
-FILE_URI = "file:///home/mars/OneDrive/Backups/GnuCash/tracking/patrimonio.gnucash"
+# Ubicación del libro para cada backend. Con "sqlite3" cada transacción se
+# escribe como filas en la base al confirmarse, en lugar de reescribir el XML
+# completo en cada guardado. Para pasar de uno a otro: scripts/migrar_sqlite.py
+LIBROS = {
+    "xml": "file:///home/mars/OneDrive/Backups/GnuCash/tracking/patrimonio.gnucash",
+    "sqlite3": "sqlite3:///home/mars/OneDrive/Backups/GnuCash/tracking/patrimonio.sqlite.gnucash",
+}
+BACKEND = "xml"
+FILE_URI = LIBROS[BACKEND]
 MONEDA_PRINCIPAL = "ARS"
 
 
@@ -54,6 +62,7 @@ CUENTAS = {
     "ing_otros_ars": "Ingresos.Otros Ingresos (ARS)",
     "ing_otros_usd": "Ingresos.Otros Ingresos (USD)",
     "ing_regalos": "Ingresos.Regalos",
+    "ing_resultados_inversiones": "Ingresos.Resultados por inversiones",
     # ==================================================================
     # --- GASTOS ---
     # ==================================================================
@@ -82,10 +91,19 @@ CUENTAS = {
     "gasto_imp_ley19032": "Gastos.Impuestos.Ley 19032",
     "gasto_imp_obrasocial": "Gastos.Salud.Obra Social",  # Nota: Lo moví a Salud en el config anterior, pero lo dejo aquí también si lo usas en Impuestos
     "gasto_redondeo": "Gastos.Redondeo",
+    # ==================================================================
+    # --- RECIBO DE SUELDO (claves que usa nomina.py) ---
+    # ==================================================================
+    "ingreso_sueldo": "Ingresos.Sueldo.Allaria",
+    "ingreso_aguinaldo": "Ingresos.Sueldo.Allaria",
+    # Cuenta donde se acredita el neto del recibo.
+    "banco_sueldo": "Activos.Activo Corriente.Caja de Ahorro.Galicia (ARS)",
 }
 
 
 # --- REGLAS DE DEDUCCIONES DEL SUELDO (Usa las claves de arriba) ---
+# Opcionalmente "desde" / "hasta" (AAAA-MM) limitan los meses en que se aplica
+# cada deducción (ver nomina.py).
 DEDUCCIONES = [
     {
         "nombre": "Jubilacion",
@@ -118,3 +136,336 @@ DEDUCCIONES = [
         "cuenta_destino": "gasto_redondeo",
     },
 ]
+
+
+# --- REGLAS DE CLASIFICACIÓN DE MERCADO PAGO (Usa las claves de arriba) ---
+# Se evalúan en orden y gana la primera que coincide. Campos opcionales:
+# - "patron": expresión regular (sin distinguir mayúsculas) sobre título/descripción.
+# - "tipos": lista de tipos de actividad de Mercado Pago.
+# - "sentido": "egreso" (sale dinero de MP) o "ingreso" (entra dinero).
+# - "monto_min" / "monto_max": rango sobre el valor absoluto del monto.
+# La contrapartida de cada transacción es siempre la cuenta "activo_mp".
+REGLAS_MP = [
+    {
+        "patron": r"rendimiento|intereses",
+        "sentido": "ingreso",
+        "cuenta": "ing_intereses_ganados",
+    },
+    {
+        "patron": r"coto|carrefour|\bdia\b|jumbo|disco|chango|verduler|almac",
+        "sentido": "egreso",
+        "cuenta": "gasto_alimentos",
+    },
+    {
+        "patron": r"rappi|pedidosya|mcdonald|burger|cafe|bar\b|resto",
+        "sentido": "egreso",
+        "cuenta": "gasto_restaurantes_hoteles",
+    },
+    {
+        "patron": r"sube|uber|cabify|didi|ypf|shell|axion",
+        "sentido": "egreso",
+        "cuenta": "gasto_transporte",
+    },
+    {
+        "patron": r"personal|claro|movistar|telecentro|fibertel",
+        "sentido": "egreso",
+        "cuenta": "gasto_comunicacion",
+    },
+    {
+        "patron": r"edenor|edesur|metrogas|aysa|naturgy|expensas",
+        "sentido": "egreso",
+        "cuenta": "gasto_vivienda_servicios",
+    },
+    {
+        "patron": r"netflix|spotify|steam|disney|hbo|cine",
+        "sentido": "egreso",
+        "cuenta": "gasto_recreacion",
+    },
+    {
+        "patron": r"farmacia|farmacity",
+        "sentido": "egreso",
+        "cuenta": "gasto_bienes_servicios",
+    },
+    {
+        "patron": r"comisi[oó]n|cargo por",
+        "sentido": "egreso",
+        "monto_max": 50000,
+        "cuenta": "gasto_comisiones",
+    },
+]
+
+
+# --- EXTRACTOS BANCARIOS (ver extractos.py) ---
+# Cada fuente indica la cuenta del extracto y cómo leer sus archivos:
+# - "formato": "csv", "ofx", "json" (lista o JSONL de objetos) o "mp"
+#   (actividades descargadas de Mercado Pago).
+# - "columnas" (csv/json): nombre de la columna de "fecha", "descripcion",
+#   "monto" (o "debito" y "credito" por separado) y opcionalmente "id".
+# - "formato_fecha", "locale" de los montos y "separador" del CSV.
+# - "signo": -1 si el extracto muestra en positivo lo que sale de la cuenta
+#   (por ejemplo, las compras en el resumen de la tarjeta).
+# - "moneda": por defecto MONEDA_PRINCIPAL.
+# Ajusta los nombres de las columnas a los de los archivos que descargas.
+EXTRACTOS = {
+    "bbva": {
+        "cuenta": "activo_banco_bbva",
+        "formato": "csv",
+        "columnas": {"fecha": "Fecha", "descripcion": "Concepto", "monto": "Importe"},
+        "formato_fecha": "%d/%m/%Y",
+    },
+    "galicia_ars": {
+        "cuenta": "activo_banco_gali_ars",
+        "formato": "csv",
+        "separador": ";",
+        "columnas": {
+            "fecha": "Fecha",
+            "descripcion": "Descripción",
+            "debito": "Débitos",
+            "credito": "Créditos",
+        },
+        "formato_fecha": "%d/%m/%Y",
+    },
+    "galicia_usd": {
+        "cuenta": "activo_banco_gali_usd",
+        "formato": "csv",
+        "separador": ";",
+        "columnas": {
+            "fecha": "Fecha",
+            "descripcion": "Descripción",
+            "debito": "Débitos",
+            "credito": "Créditos",
+        },
+        "formato_fecha": "%d/%m/%Y",
+        "moneda": "USD",
+    },
+    "visa": {
+        "cuenta": "pasivo_tc_gali_visa_ars",
+        "formato": "csv",
+        "columnas": {"fecha": "Fecha", "descripcion": "Detalle", "monto": "Pesos"},
+        "formato_fecha": "%d/%m/%Y",
+        "signo": -1,
+    },
+    "master": {
+        "cuenta": "pasivo_tc_gali_master_ars",
+        "formato": "csv",
+        "columnas": {"fecha": "Fecha", "descripcion": "Detalle", "monto": "Pesos"},
+        "formato_fecha": "%d/%m/%Y",
+        "signo": -1,
+    },
+    "ieb": {"cuenta": "activo_inv_ieb_ars", "formato": "ofx"},
+    "mp": {"cuenta": "activo_mp", "formato": "mp"},
+}
+
+# Reglas para clasificar los movimientos de los extractos (salvo Mercado Pago,
+# que usa REGLAS_MP). Mismo formato que REGLAS_MP; "tipos" es la lista de
+# fuentes de EXTRACTOS a las que se aplica la regla.
+REGLAS_EXTRACTOS = [
+    {
+        "patron": r"transf.*mercado ?pago|mercadopago",
+        "cuenta": "activo_mp",
+    },
+    {
+        "patron": r"pago (de )?tarjeta.*visa|visa.*pago",
+        "tipos": ["bbva", "galicia_ars"],
+        "sentido": "egreso",
+        "cuenta": "pasivo_tc_gali_visa_ars",
+    },
+    {
+        "patron": r"pago (de )?tarjeta.*master|master.*pago",
+        "tipos": ["bbva", "galicia_ars"],
+        "sentido": "egreso",
+        "cuenta": "pasivo_tc_gali_master_ars",
+    },
+    {
+        "patron": r"su pago|pago recibido",
+        "tipos": ["visa", "master"],
+        "sentido": "ingreso",
+        "cuenta": "activo_banco_gali_ars",
+    },
+    {
+        "patron": r"dividendo|renta",
+        "tipos": ["ieb"],
+        "sentido": "ingreso",
+        "cuenta": "ing_dividendos",
+    },
+    {
+        "patron": r"comisi[oó]n|arancel|derecho de mercado",
+        "cuenta": "gasto_comisiones",
+    },
+    {
+        "patron": r"impuesto|iva|percepci[oó]n|sellos|ley 25413",
+        "sentido": "egreso",
+        "cuenta": "gasto_impuestos",
+    },
+    {
+        "patron": r"intereses? (ganados|acreditados)|rendimiento",
+        "sentido": "ingreso",
+        "cuenta": "ing_intereses_ganados",
+    },
+]
+
+
+# --- TRANSACCIONES RECURRENTES (ver recurrentes.py) ---
+# Cada regla se registra una vez por mes, el día "dia" (o el último día del mes
+# si es más corto). Al ejecutar scripts/registrar_recurrentes.py se registran
+# juntas todas las ocurrencias vencidas desde la última ejecución que todavía
+# no estén en el libro; la primera vez, solo la del mes en curso (o desde el
+# mes de --desde). Ninguna es anterior a "desde" (AAAA-MM). Campos:
+# - "origen" / "destino": claves de CUENTAS o rutas completas.
+# - "monto": texto ("150.000,00"), "preguntar" para pedirlo en cada ocurrencia,
+#   o una función (fecha, libro) -> Monto.
+# - "poner_en_cero" (opcional): antes de registrar, pasa el saldo positivo que
+#   tenga "cuenta" a "contrapartida", con la descripción indicada.
+RECURRENTES = [
+    {
+        "nombre": "recarga_allaria",
+        "descripcion": "Recarga mensual de beneficios corporativos",
+        "dia": 12,
+        "desde": "2025-01",
+        "origen": "Ingresos.Adicionales.Allaria.Tarjeta Corporativa",
+        "destino": "activo_tarjeta_allaria",
+        "monto": "preguntar",
+        "id_externo": "allaria:recarga",
+        "poner_en_cero": {
+            "cuenta": "activo_tarjeta_allaria",
+            "contrapartida": "Gastos.Ajustes.Tarjeta Allaria+",
+            "descripcion": "Ajuste por saldo no acumulable de beneficio corporativo",
+        },
+    },
+]
+
+
+# --- TARJETAS DE CRÉDITO (ver tarjetas.py) ---
+# Calendario de los resúmenes de cada tarjeta: día de "cierre" de cada mes y
+# día de "vencimiento" en el mes siguiente (limitados al último día del mes).
+# En "calendario" van las fechas que publica el banco cuando no siguen la
+# regla, por mes de cierre:
+#     "2026-12": {"cierre": "2026-12-23", "vencimiento": "2027-01-05"}
+# - "cuenta": donde se registran las compras en cuotas.
+# - "cuentas": las cuentas de la tarjeta que entran en la proyección.
+TARJETAS = {
+    "visa": {
+        "cuenta": "pasivo_tc_gali_visa_ars",
+        "cuentas": ["pasivo_tc_gali_visa_ars", "pasivo_tc_gali_visa_usd"],
+        "cierre": 24,
+        "vencimiento": 5,
+        "calendario": {},
+    },
+    "master": {
+        "cuenta": "pasivo_tc_gali_master_ars",
+        "cuentas": ["pasivo_tc_gali_master_ars", "pasivo_tc_gali_master_usd"],
+        "cierre": 26,
+        "vencimiento": 8,
+        "calendario": {},
+    },
+}
+
+
+# --- COTIZACIONES (ver cotizaciones.py) ---
+# Series históricas de la moneda extranjera en MONEDA_PRINCIPAL, en un CSV con
+# una columna "fecha" (AAAA-MM-DD) y una columna por serie. La serie elegida
+# se carga en la base de precios del libro con scripts/cargar_cotizaciones.py;
+# las demás se leen del CSV.
+# - "separador" y "locale" de los montos del CSV.
+# - "serie": la que se usa para convertir splits y valuar tenencias, y la
+#   única que se guarda en el libro (GnuCash tiene un precio por día).
+# - "max_dias": distancia máxima a la cotización más cercana.
+COTIZACIONES = {
+    "archivo": "/home/mars/OneDrive/Backups/GnuCash/tracking/cotizaciones_usd.csv",
+    "separador": ";",
+    "locale": "es-AR",
+    "moneda": "USD",
+    "serie": "mep",
+    "max_dias": 7,
+}
+
+
+# --- INFLACIÓN (ver inflacion.py) ---
+# Índice de precios al consumidor mensual, en un CSV con una columna "fecha"
+# (AAAA-MM) y la serie indicada, para los reportes en pesos constantes
+# (scripts/reporte.py real / sueldo-real).
+# - "sueldo": cuenta del sueldo que se compara con "gastos" (raíz de gastos).
+INFLACION = {
+    "archivo": "/home/mars/OneDrive/Backups/GnuCash/tracking/ipc.csv",
+    "separador": ";",
+    "locale": "es-AR",
+    "serie": "ipc",
+    "sueldo": "ing_sueldo",
+    "gastos": "Gastos",
+}
+
+
+# --- CARTERA DE INVERSIONES (ver cartera.py) ---
+# Los títulos de cada cuenta de broker se registran en subcuentas con el nombre
+# de la especie (por ejemplo "...IEB (ARS).GGAL"), que se crean al importar la
+# primera operación. Los precios se leen de un CSV con una columna "fecha" y
+# una columna por especie, en la moneda de la cuenta donde se tiene el título.
+CARTERA = {
+    "espacio": "BYMA",  # espacio de nombres de los títulos en el libro
+    "fraccion": 10_000,  # las cantidades admiten hasta cuatro decimales
+    "dividendos": "ing_dividendos",
+    "comisiones": "gasto_comisiones",
+    "resultados": "ing_resultados_inversiones",  # resultado de las ventas
+    "precios": "/home/mars/OneDrive/Backups/GnuCash/tracking/precios_titulos.csv",
+}
+
+# Archivos de operaciones de cada broker (CSV). Campos:
+# - "cuenta": cuenta del broker donde se mueve el dinero.
+# - "columnas": "fecha", "tipo", "especie", "cantidad", "precio", "importe"
+#   (bruto, sin comisiones) y opcionalmente "comision" e "id".
+# - "operaciones": texto con el que empieza la columna "tipo" → "compra",
+#   "venta" o "dividendo" (los dividendos y rentas van a CARTERA["dividendos"]).
+# - "formato_fecha", "locale", "separador" y "moneda", como en EXTRACTOS.
+_OPERACIONES_IEB = {
+    "compra": "compra",
+    "venta": "venta",
+    "dividendo": "dividendo",
+    "renta": "dividendo",
+}
+_COLUMNAS_IEB = {
+    "fecha": "Fecha Liquidación",
+    "tipo": "Operación",
+    "especie": "Especie",
+    "cantidad": "Cantidad",
+    "precio": "Precio",
+    "importe": "Importe Bruto",
+    "comision": "Aranceles",
+    "id": "Comprobante",
+}
+OPERACIONES_BROKER = {
+    "ieb_ars": {
+        "cuenta": "activo_inv_ieb_ars",
+        "separador": ";",
+        "formato_fecha": "%d/%m/%Y",
+        "columnas": _COLUMNAS_IEB,
+        "operaciones": _OPERACIONES_IEB,
+    },
+    "ieb_usd": {
+        "cuenta": "activo_inv_ieb_usd",
+        "separador": ";",
+        "formato_fecha": "%d/%m/%Y",
+        "columnas": _COLUMNAS_IEB,
+        "operaciones": _OPERACIONES_IEB,
+        "moneda": "USD",
+    },
+    "wallet_ars": {
+        "cuenta": "activo_inv_wallet_ars",
+        "columnas": {
+            "fecha": "date",
+            "tipo": "type",
+            "especie": "symbol",
+            "cantidad": "quantity",
+            "precio": "price",
+            "importe": "gross_amount",
+            "comision": "fees",
+            "id": "id",
+        },
+        "locale": "en",
+        "operaciones": {"buy": "compra", "sell": "venta", "dividend": "dividendo"},
+    },
+}
+OPERACIONES_BROKER["wallet_usd"] = {
+    **OPERACIONES_BROKER["wallet_ars"],
+    "cuenta": "activo_inv_wallet_usd",
+    "moneda": "USD",
+}
@@ -0,0 +1,176 @@
+# config_compilada.py
+
+"""
+Compilación de config.py contra el libro.
+Una única vez se valida CUENTAS y DEDUCCIONES completos (todos los problemas
+juntos, no solo el primero) y cada clave de CUENTAS se resuelve al GUID de su
+cuenta. El resultado se guarda junto al libro (<libro>.config.json) con la
+huella de la configuración y la marca de modificación del libro: mientras
+ninguna cambie, las claves se resuelven por GUID, solo las que se usan y sin
+recorrer el árbol de cuentas.
+Si se edita config.py o el libro se modifica desde GnuCash (por ejemplo, al
+renombrar una cuenta), la próxima apertura vuelve a compilar.
+"""
+
+import hashlib
+import json
+import os
+import re
+from decimal import Decimal, InvalidOperation
+
+import config
+from gnucash_utils import get_indice_cuentas
+from huellas import marca_libro, ruta_sidecar
+
+_PERIODO = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+def huella_config() -> str:
+    """Huella de las secciones de config.py que se compilan."""
+    contenido = json.dumps(
+        {"cuentas": config.CUENTAS, "deducciones": config.DEDUCCIONES},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def claves_requeridas() -> list:
+    """Claves de CUENTAS que el código usa directamente."""
+    from cartera import CUENTAS_CARTERA
+    from nomina import CUENTA_AGUINALDO, CUENTA_NETO, CUENTA_SUELDO
+
+    # Las de CARTERA pueden ser también rutas completas.
+    cartera = [config.CARTERA[c] for c in CUENTAS_CARTERA]
+    return [CUENTA_SUELDO, CUENTA_AGUINALDO, CUENTA_NETO] + [
+        clave for clave in cartera if "." not in clave
+    ]
+
+
+def validar_deducciones(deducciones=None, cuentas=None) -> list:
+    """Problemas de config.DEDUCCIONES, sin mirar el libro."""
+    deducciones = config.DEDUCCIONES if deducciones is None else deducciones
+    cuentas = config.CUENTAS if cuentas is None else cuentas
+    problemas = []
+    vistos = set()
+    for posicion, d in enumerate(deducciones, start=1):
+        nombre = d.get("nombre") or f"#{posicion}"
+        faltan = [
+            campo
+            for campo in ("nombre", "tipo", "valor", "cuenta_destino")
+            if campo not in d
+        ]
+        if faltan:
+            problemas.append(
+                f"Deducción '{nombre}': faltan los campos {', '.join(faltan)}."
+            )
+            continue
+        if nombre in vistos:
+            problemas.append(f"Deducción '{nombre}': el nombre está repetido.")
+        vistos.add(nombre)
+        if d["tipo"] not in ("fijo", "porcentaje"):
+            problemas.append(
+                f"Deducción '{nombre}': tipo desconocido '{d['tipo']}' "
+                "(usa 'fijo' o 'porcentaje')."
+            )
+        try:
+            valor = Decimal(str(d["valor"]))
+        except InvalidOperation:
+            problemas.append(
+                f"Deducción '{nombre}': el valor '{d['valor']}' no es válido."
+            )
+        else:
+            if valor < 0 or (d["tipo"] == "porcentaje" and valor >= 100):
+                problemas.append(
+                    f"Deducción '{nombre}': el valor {valor} está fuera de rango."
+                )
+        if d["cuenta_destino"] not in cuentas:
+            problemas.append(
+                f"Deducción '{nombre}': la cuenta '{d['cuenta_destino']}' no está "
+                "en CUENTAS."
+            )
+        for campo in ("desde", "hasta"):
+            if d.get(campo) is not None and not _PERIODO.fullmatch(str(d[campo])):
+                problemas.append(
+                    f"Deducción '{nombre}': '{campo}' debe tener el formato AAAA-MM."
+                )
+        if d.get("desde") and d.get("hasta") and d["desde"] > d["hasta"]:
+            problemas.append(f"Deducción '{nombre}': 'desde' es posterior a 'hasta'.")
+    return problemas
+
+
+class ConfigCompilada:
+    """Claves de config.CUENTAS resueltas a GUIDs y problemas encontrados."""
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_sidecar("config.json")
+        try:
+            with open(self.ruta, encoding="utf-8") as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            datos = {}
+        self.huella = datos.get("huella")
+        self.marca = datos.get("marca_libro")
+        self.guids = datos.get("guids", {})
+        self.problemas = datos.get("problemas", [])
+
+    def vigente(self) -> bool:
+        """Indica si la compilación corresponde a config.py y al libro en disco."""
+        return self.huella == huella_config() and self.marca == marca_libro()
+
+    def compilar(self, root_account) -> list:
+        """
+        Valida la configuración contra el libro, recorriendo el árbol una sola
+        vez, y guarda el resultado. Devuelve la lista de problemas.
+        """
+        indice = get_indice_cuentas(root_account)
+        guids = {}
+        problemas = []
+        for clave, ruta in config.CUENTAS.items():
+            cuenta = indice.buscar(ruta, reconstruir=False)
+            if cuenta is None:
+                problemas.append(f"La cuenta '{clave}' ({ruta}) no existe en el libro.")
+            else:
+                guids[clave] = cuenta.GetGUID().to_string()
+        for clave in claves_requeridas():
+            if clave not in config.CUENTAS:
+                problemas.append(f"Falta la clave '{clave}' en CUENTAS.")
+        problemas.extend(validar_deducciones())
+
+        self.huella = huella_config()
+        self.guids = guids
+        self.problemas = problemas
+        self.confirmar()
+        return problemas
+
+    def confirmar(self):
+        """Guarda la compilación con la marca actual del libro (tras guardarlo)."""
+        self.marca = marca_libro()
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "huella": self.huella,
+                    "marca_libro": self.marca,
+                    "guids": self.guids,
+                    "problemas": self.problemas,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        os.replace(temporal, self.ruta)
+
+    @classmethod
+    def abrir(cls, root_account, ruta=None):
+        """Abre la compilación del libro y la rehace si no está al día."""
+        compilada = cls(ruta)
+        if not compilada.vigente():
+            problemas = compilada.compilar(root_account)
+            if problemas:
+                print(
+                    f"\033[93mconfig.py tiene {len(problemas)} problemas; "
+                    "revísalos con 'python cli.py validar-config'.\033[0m"
+                )
+        return compilada
@@ -0,0 +1,305 @@
+# consultas.py
+
+"""
+Caché de saldos y totales por cuenta y por mes.
+Guarda en un SQLite junto al libro el total de cada cuenta en cada mes, de modo
+que saldos, totales por período y resúmenes mensuales se responden sumando
+unas pocas filas en lugar de recorrer todos los splits.
+
+- Las transacciones que registra este proyecto (servicio.py) actualizan solo
+  las cuentas y meses afectados.
+- Si el archivo del libro cambió por fuera (por ejemplo desde la interfaz de
+  GnuCash), la caché se reconstruye con un único recorrido del libro.
+- Cada total está en la moneda (o título) de su cuenta, en unidades de la
+  fracción de ese commodity. Los totales de un subárbol solo se suman si
+  todas sus cuentas tienen el mismo commodity; si no, se piden por moneda.
+"""
+
+import sqlite3
+from decimal import Decimal
+
+import config
+from dinero import Monto
+from gnucash_utils import ruta_de_cuenta
+from huellas import marca_libro, ruta_sidecar, transacciones_del_libro
+
+
+def _commodity(cuenta):
+    """(mnemónico, fracción) del commodity de una cuenta."""
+    commodity = cuenta.GetCommodity()
+    return commodity.get_mnemonic(), commodity.get_fraction()
+
+
+class CacheTotales:
+    """
+    Totales por (cuenta, mes) persistidos en SQLite, en unidades de la
+    fracción del commodity de cada cuenta.
+    """
+
+    # Versión del esquema; una caché anterior se descarta y se reconstruye.
+    VERSION = 1
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_sidecar("totales.sqlite")
+        self.conexion = sqlite3.connect(self.ruta)
+        (version,) = self.conexion.execute("PRAGMA user_version").fetchone()
+        if version != self.VERSION:
+            self.conexion.executescript(
+                f"""
+                DROP TABLE IF EXISTS cuentas;
+                DROP TABLE IF EXISTS totales;
+                DROP TABLE IF EXISTS meta;
+                PRAGMA user_version = {self.VERSION};
+                """
+            )
+        self.conexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cuentas (
+                guid TEXT PRIMARY KEY,
+                ruta TEXT NOT NULL,
+                moneda TEXT NOT NULL,
+                fraccion INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS cuentas_ruta ON cuentas (ruta);
+            CREATE TABLE IF NOT EXISTS totales (
+                guid TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                unidades INTEGER NOT NULL,
+                cantidad INTEGER NOT NULL,
+                PRIMARY KEY (guid, periodo)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                clave TEXT PRIMARY KEY,
+                valor TEXT
+            ) WITHOUT ROWID;
+            """
+        )
+        self._rutas_conocidas = None
+
+    # --- Mantenimiento ---
+
+    def vigente(self) -> bool:
+        """Indica si la caché corresponde al libro tal como está en disco."""
+        fila = self.conexion.execute(
+            "SELECT valor FROM meta WHERE clave = 'marca_libro'"
+        ).fetchone()
+        return fila is not None and fila[0] == marca_libro()
+
+    def _registrar_cuenta(self, cuenta):
+        guid = cuenta.GetGUID().to_string()
+        if self._rutas_conocidas is None:
+            self._rutas_conocidas = {
+                g for (g,) in self.conexion.execute("SELECT guid FROM cuentas")
+            }
+        if guid not in self._rutas_conocidas:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO cuentas VALUES (?, ?, ?, ?)",
+                (guid, ruta_de_cuenta(cuenta), *_commodity(cuenta)),
+            )
+            self._rutas_conocidas.add(guid)
+        return guid
+
+    def registrar(self, fecha, splits):
+        """
+        Suma a la caché una transacción nueva. 'splits' es una lista de pares
+        (cuenta, Monto en el commodity de la cuenta). Solo se tocan las filas
+        (cuenta, mes) afectadas.
+        """
+        periodo = fecha.strftime("%Y-%m")
+        for cuenta, monto in splits:
+            guid = self._registrar_cuenta(cuenta)
+            _, fraccion = _commodity(cuenta)
+            self.conexion.execute(
+                """
+                INSERT INTO totales VALUES (?, ?, ?, 1)
+                ON CONFLICT (guid, periodo) DO UPDATE SET
+                    unidades = unidades + excluded.unidades,
+                    cantidad = cantidad + 1
+                """,
+                (guid, periodo, monto.a_fraccion(fraccion).unidades),
+            )
+
+    def reconstruir(self, root_account) -> int:
+        """Recalcula toda la caché recorriendo una vez los splits del libro."""
+        acumulado = {}
+        cuentas = {}
+        cantidad = 0
+        for tx in transacciones_del_libro(root_account):
+            periodo = tx.GetDate().strftime("%Y-%m")
+            for split in tx.GetSplitList():
+                cuenta = split.GetAccount()
+                guid = cuenta.GetGUID().to_string()
+                if guid not in cuentas:
+                    cuentas[guid] = (ruta_de_cuenta(cuenta), *_commodity(cuenta))
+                clave = (guid, periodo)
+                total, n = acumulado.get(clave, (0, 0))
+                unidades = Monto.de_gnc(split.GetAmount(), cuentas[guid][2]).unidades
+                acumulado[clave] = (total + unidades, n + 1)
+            cantidad += 1
+
+        # Las cuentas sin movimientos también se guardan para las consultas
+        # por subárbol.
+        pendientes = list(root_account.get_children())
+        while pendientes:
+            cuenta = pendientes.pop()
+            pendientes.extend(cuenta.get_children())
+            guid = cuenta.GetGUID().to_string()
+            if guid not in cuentas:
+                cuentas[guid] = (ruta_de_cuenta(cuenta), *_commodity(cuenta))
+
+        self.conexion.execute("DELETE FROM totales")
+        self.conexion.execute("DELETE FROM cuentas")
+        self.conexion.executemany(
+            "INSERT INTO cuentas VALUES (?, ?, ?, ?)",
+            ((guid, *datos) for guid, datos in cuentas.items()),
+        )
+        self.conexion.executemany(
+            "INSERT INTO totales VALUES (?, ?, ?, ?)",
+            ((g, p, total, n) for (g, p), (total, n) in acumulado.items()),
+        )
+        self._rutas_conocidas = set(cuentas)
+        self.confirmar()
+        return cantidad
+
+    def confirmar(self):
+        """Persiste los cambios. Debe llamarse después de guardar el libro."""
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('marca_libro', ?)", (marca_libro(),)
+        )
+        self.conexion.commit()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    @classmethod
+    def abrir(cls, root_account, ruta=None):
+        """Abre la caché del libro y la reconstruye si no está al día."""
+        cache = cls(ruta)
+        if not cache.vigente():
+            cache.reconstruir(root_account)
+        return cache
+
+    # --- Consultas ---
+
+    def _filtro_cuentas(self, ruta, subarbol):
+        # Las subcuentas de "A.B" son las rutas entre "A.B." y "A.B/" ('/' sigue
+        # a '.' en ASCII), un rango que aprovecha el índice sobre 'ruta'.
+        if subarbol:
+            filtro = "(c.ruta = ? OR (c.ruta > ? AND c.ruta < ?))"
+            return filtro, (ruta, ruta + ".", ruta + "/")
+        return "c.ruta = ?", (ruta,)
+
+    def _una_moneda(self, por_moneda, ruta, vacio):
+        """
+        (moneda, valores) de la única moneda de 'por_moneda'; ValueError si
+        las cuentas de 'ruta' tienen commodities distintos.
+        """
+        if len(por_moneda) > 1:
+            raise ValueError(
+                f"'{ruta}' tiene cuentas en distintas monedas o títulos "
+                f"({', '.join(sorted(por_moneda))}); no se pueden sumar. "
+                "Consulta cada subcuenta por separado."
+            )
+        return next(iter(por_moneda.items()), (None, vacio))
+
+    def saldos_por_moneda(self, ruta, hasta=None, subarbol=True) -> dict:
+        """
+        Saldo de la cuenta (y sus subcuentas) hasta el mes 'hasta' inclusive,
+        separado por commodity: {moneda: Decimal}.
+        """
+        filtro, parametros = self._filtro_cuentas(ruta, subarbol)
+        consulta = (
+            "SELECT c.moneda, c.fraccion, SUM(t.unidades) FROM totales t "
+            f"JOIN cuentas c ON c.guid = t.guid WHERE {filtro}"
+        )
+        if hasta:
+            consulta += " AND t.periodo <= ?"
+            parametros += (hasta,)
+        consulta += " GROUP BY c.moneda, c.fraccion"
+        saldos = {}
+        for moneda, fraccion, unidades in self.conexion.execute(consulta, parametros):
+            saldos[moneda] = saldos.get(moneda, 0) + Decimal(unidades) / fraccion
+        return saldos
+
+    def saldo(self, ruta, hasta=None, subarbol=True) -> Decimal:
+        """
+        Saldo de la cuenta (y sus subcuentas) hasta el mes 'hasta' inclusive,
+        en el commodity de sus cuentas.
+        """
+        saldos = self.saldos_por_moneda(ruta, hasta, subarbol)
+        return self._una_moneda(saldos, ruta, Decimal(0))[1]
+
+    def totales_por_periodo(self, ruta, desde=None, hasta=None, subarbol=True):
+        """Total de movimientos de la cuenta por mes: {AAAA-MM: Decimal}."""
+        filtro, parametros = self._filtro_cuentas(ruta, subarbol)
+        consulta = (
+            "SELECT c.moneda, c.fraccion, t.periodo, SUM(t.unidades) FROM totales t "
+            f"JOIN cuentas c ON c.guid = t.guid WHERE {filtro}"
+        )
+        if desde:
+            consulta += " AND t.periodo >= ?"
+            parametros += (desde,)
+        if hasta:
+            consulta += " AND t.periodo <= ?"
+            parametros += (hasta,)
+        consulta += " GROUP BY c.moneda, c.fraccion, t.periodo ORDER BY t.periodo"
+        por_moneda = {}
+        for moneda, fraccion, periodo, unidades in self.conexion.execute(
+            consulta, parametros
+        ):
+            meses = por_moneda.setdefault(moneda, {})
+            meses[periodo] = meses.get(periodo, 0) + Decimal(unidades) / fraccion
+        return self._una_moneda(por_moneda, ruta, {})[1]
+
+    def resumen_mensual(self, raiz, desde=None, hasta=None, nivel=1):
+        """
+        Totales por mes de cada subcuenta de 'raiz', agrupando a 'nivel'
+        segmentos por debajo de ella: {subcuenta: {AAAA-MM: Decimal}}. Las
+        subcuentas que no están en MONEDA_PRINCIPAL llevan su moneda en el
+        nombre.
+        """
+        profundidad = raiz.count(".") + 1 + nivel
+        consulta = (
+            "SELECT c.ruta, c.moneda, c.fraccion, t.periodo, t.unidades "
+            "FROM totales t JOIN cuentas c ON c.guid = t.guid "
+            "WHERE c.ruta > ? AND c.ruta < ?"
+        )
+        parametros = (raiz + ".", raiz + "/")
+        if desde:
+            consulta += " AND t.periodo >= ?"
+            parametros += (desde,)
+        if hasta:
+            consulta += " AND t.periodo <= ?"
+            parametros += (hasta,)
+        grupos = {}
+        for ruta, moneda, fraccion, periodo, unidades in self.conexion.execute(
+            consulta, parametros
+        ):
+            grupo = ".".join(ruta.split(".")[:profundidad])
+            meses = grupos.setdefault(grupo, {}).setdefault(moneda, {})
+            meses[periodo] = meses.get(periodo, 0) + Decimal(unidades) / fraccion
+        resumen = {}
+        for grupo, por_moneda in grupos.items():
+            moneda, meses = self._una_moneda(por_moneda, grupo, {})
+            if moneda != config.MONEDA_PRINCIPAL:
+                grupo = f"{grupo} ({moneda})"
+            resumen[grupo] = meses
+        return resumen
+
+
+def abrir_cache_actualizada(ruta=None):
+    """
+    Devuelve la caché lista para consultar. Si está al día no se abre el libro;
+    si no, se abre en solo lectura y se reconstruye.
+    """
+    cache = CacheTotales(ruta)
+    if cache.vigente():
+        return cache
+    # Los bindings de GnuCash solo se cargan cuando hay que recorrer el libro.
+    from gnucash.gnucash_core import SessionOpenMode
+
+    from libro import abrir_sesion
+
+    with abrir_sesion(mode=SessionOpenMode.SESSION_READ_ONLY) as session:
+        cache.reconstruir(session.get_book().get_root_account())
+    return cache
@@ -0,0 +1,317 @@
+# cotizaciones.py
+
+"""
+Cotizaciones de moneda extranjera (por defecto USD → ARS).
+Las series históricas (oficial, MEP, CCL, ...) se leen de un CSV local con una
+columna "fecha" y una columna por serie, por ejemplo:
+    fecha;oficial;mep;ccl
+    2025-03-03;1062,50;1218,30;1231,00
+Solo la serie de config.COTIZACIONES["serie"] se carga en la base de precios
+del libro (cargar_en_libro), de una sola vez y en una sesión para todas las
+filas: GnuCash guarda un único precio por par de monedas y día, así que las
+demás series se consultan directamente del CSV (CacheCotizaciones.de_archivo).
+
+CacheCotizaciones guarda cada serie como dos listas paralelas ordenadas por
+fecha (ordinales y cotizaciones enteras en 1/ESCALA de peso), de modo que una
+consulta es una búsqueda binaria de la fecha más cercana. Para valuar muchos
+importes a la vez (valuar, valuar_tenencia) la búsqueda se hace con NumPy
+sobre todas las fechas juntas, sin consultar una cotización por split.
+"""
+
+import csv
+from bisect import bisect_left
+from datetime import date, datetime
+
+import config
+from dinero import Monto, dividir_redondeando
+from gnucash_utils import LOCALE_PREDETERMINADO
+
+# Las cotizaciones se guardan como enteros con cuatro decimales.
+ESCALA = 10_000
+
+
+def a_ordinal(fecha) -> int:
+    """
+    Ordinal de una fecha (date, datetime, texto AAAA-MM-DD o timestamp). Un
+    mes AAAA-MM, como en las series mensuales, es su primer día.
+    """
+    if isinstance(fecha, str):
+        formato = "%Y-%m" if len(fecha) == 7 else "%Y-%m-%d"
+        fecha = datetime.strptime(fecha[:10], formato)
+    elif isinstance(fecha, (int, float)):
+        fecha = datetime.fromtimestamp(fecha)
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    return fecha.toordinal()
+
+
+def leer_series(ruta=None, locale=None, separador=None) -> dict:
+    """
+    Lee el CSV de cotizaciones y devuelve {serie: [(ordinal, cotización)]},
+    ordenado por fecha. Las celdas vacías se omiten (días sin cotización de
+    esa serie); un valor inválido produce ValueError con su línea.
+    Sirve para cualquier CSV con el mismo formato, como el de precios de
+    títulos de cartera.py.
+    """
+    ruta = ruta or config.COTIZACIONES["archivo"]
+    locale = locale or config.COTIZACIONES.get("locale", LOCALE_PREDETERMINADO)
+    separador = separador or config.COTIZACIONES.get("separador", ";")
+    series = {}
+    with open(ruta, encoding="utf-8-sig", newline="") as f:
+        lector = csv.DictReader(f, delimiter=separador)
+        nombres = [c for c in lector.fieldnames or [] if c != "fecha"]
+        if "fecha" not in (lector.fieldnames or []) or not nombres:
+            raise ValueError(
+                f"'{ruta}' necesita una columna 'fecha' y al menos una serie."
+            )
+        for fila in lector:
+            try:
+                ordinal = a_ordinal(fila["fecha"].strip())
+                for nombre in nombres:
+                    texto = (fila.get(nombre) or "").strip()
+                    if texto:
+                        valor = Monto.de_texto(texto, locale, ESCALA).unidades
+                        series.setdefault(nombre, []).append((ordinal, valor))
+            except ValueError as e:
+                raise ValueError(f"{ruta}:{lector.line_num}: {e}") from None
+    return {nombre: sorted(filas) for nombre, filas in series.items()}
+
+
+class CacheCotizaciones:
+    """Series de cotizaciones indexadas por fecha, en memoria."""
+
+    def __init__(self, series: dict, max_dias=None):
+        # serie: (ordinales, cotizaciones), listas paralelas ordenadas.
+        self._series = {}
+        for nombre, filas in series.items():
+            if filas:
+                ordinales, valores = zip(*sorted(filas))
+                self._series[nombre] = (list(ordinales), list(valores))
+        self.max_dias = (
+            config.COTIZACIONES.get("max_dias") if max_dias is None else max_dias
+        )
+        self._arrays = {}
+
+    @classmethod
+    def de_archivo(cls, ruta=None, locale=None, max_dias=None):
+        return cls(leer_series(ruta, locale), max_dias)
+
+    @classmethod
+    def de_libro(cls, book, moneda=None, max_dias=None):
+        """
+        Lee las cotizaciones de 'moneda' en MONEDA_PRINCIPAL de la base de
+        precios del libro. Solo trae la serie de config.COTIZACIONES["serie"]
+        (el tipo, "typestr", de los precios que carga cargar_en_libro); las
+        demás se leen con de_archivo.
+        """
+        moneda = moneda or config.COTIZACIONES["moneda"]
+        serie = config.COTIZACIONES["serie"]
+        tabla = book.get_table()
+        commodity = tabla.lookup("ISO4217", moneda)
+        currency = tabla.lookup("ISO4217", config.MONEDA_PRINCIPAL)
+        filas = [
+            (
+                a_ordinal(precio.get_time64()),
+                Monto.de_gnc(precio.get_value(), ESCALA).unidades,
+            )
+            for precio in book.get_price_db().get_prices(commodity, currency)
+            if precio.get_typestr() == serie
+        ]
+        return cls({serie: filas}, max_dias)
+
+    def series(self) -> list:
+        return sorted(self._series)
+
+    def _serie(self, serie):
+        serie = serie or config.COTIZACIONES["serie"]
+        if serie not in self._series:
+            raise ValueError(f"No hay cotizaciones de la serie '{serie}'.")
+        return serie, self._series[serie]
+
+    def cotizacion(self, fecha, serie=None) -> int:
+        """
+        Cotización (en 1/ESCALA de MONEDA_PRINCIPAL) de la fecha más cercana a
+        'fecha'; ante un empate, la anterior. Lanza ValueError si la más
+        cercana está a más de max_dias días.
+        """
+        serie, (ordinales, valores) = self._serie(serie)
+        ordinal = a_ordinal(fecha)
+        posicion = bisect_left(ordinales, ordinal)
+        if posicion == len(ordinales) or (
+            posicion > 0
+            and ordinal - ordinales[posicion - 1] <= ordinales[posicion] - ordinal
+        ):
+            posicion -= 1
+        distancia = abs(ordinales[posicion] - ordinal)
+        if self.max_dias is not None and distancia > self.max_dias:
+            raise ValueError(
+                f"No hay cotización '{serie}' a menos de {self.max_dias} días "
+                f"del {date.fromordinal(ordinal):%Y-%m-%d}."
+            )
+        return valores[posicion]
+
+    def a_moneda_principal(self, monto: Monto, fecha, serie=None) -> Monto:
+        """Valor en centavos de MONEDA_PRINCIPAL de un importe en moneda extranjera."""
+        cotizacion = self.cotizacion(fecha, serie)
+        return Monto(
+            dividir_redondeando(
+                monto.unidades * cotizacion * 100, monto.fraccion * ESCALA
+            )
+        )
+
+    def a_moneda_extranjera(
+        self, monto: Monto, fecha, fraccion=100, serie=None
+    ) -> Monto:
+        """Importe en moneda extranjera (con 'fraccion') de un valor en pesos."""
+        cotizacion = self.cotizacion(fecha, serie)
+        return Monto(
+            dividir_redondeando(
+                monto.unidades * ESCALA * fraccion, monto.fraccion * cotizacion
+            ),
+            fraccion,
+        )
+
+    def cotizaciones(self, fechas, serie=None):
+        """
+        Versión vectorizada de cotizacion(): 'fechas' es un array datetime64[D]
+        y el resultado, un array int64 con la cotización más cercana a cada una.
+        """
+        import numpy as np
+
+        serie, (ordinales, valores) = self._serie(serie)
+        if serie not in self._arrays:
+            dias = np.array(
+                [date.fromordinal(o) for o in ordinales], dtype="datetime64[D]"
+            ).astype(np.int64)
+            self._arrays[serie] = (dias, np.array(valores, dtype=np.int64))
+        dias, cotizaciones = self._arrays[serie]
+
+        buscados = np.asarray(fechas, dtype="datetime64[D]").astype(np.int64)
+        derecha = np.clip(np.searchsorted(dias, buscados), 0, len(dias) - 1)
+        izquierda = np.clip(derecha - 1, 0, len(dias) - 1)
+        usar_izquierda = np.abs(buscados - dias[izquierda]) <= np.abs(
+            dias[derecha] - buscados
+        )
+        posicion = np.where(usar_izquierda, izquierda, derecha)
+        if self.max_dias is not None:
+            lejos = np.abs(dias[posicion] - buscados) > self.max_dias
+            if lejos.any():
+                primera = np.asarray(fechas, dtype="datetime64[D]")[lejos][0]
+                raise ValueError(
+                    f"No hay cotización '{serie}' a menos de {self.max_dias} días "
+                    f"del {primera}."
+                )
+        return cotizaciones[posicion]
+
+
+def _redondear(numeradores, denominador):
+    """dividir_redondeando sobre un array de enteros."""
+    import numpy as np
+
+    cociente = (np.abs(numeradores) * 2 + denominador) // (2 * denominador)
+    return np.where(numeradores < 0, -cociente, cociente)
+
+
+def valuar(fechas, centavos, cache, serie=None):
+    """
+    Valor en MONEDA_PRINCIPAL de importes en moneda extranjera, cada uno a la
+    cotización de su fecha. 'fechas' y 'centavos' son arrays paralelos; se
+    devuelve un array int64 de centavos.
+    """
+    import numpy as np
+
+    cotizaciones = cache.cotizaciones(fechas, serie)
+    return _redondear(np.asarray(centavos, dtype=np.int64) * cotizaciones, ESCALA)
+
+
+def valuar_tenencia(fechas, centavos, desde, hasta, cache, serie=None):
+    """
+    Valuación diaria de una tenencia en moneda extranjera entre 'desde' y
+    'hasta' (inclusive), a partir de sus movimientos ('fechas' y 'centavos',
+    arrays paralelos en cualquier orden). Los movimientos anteriores a 'desde'
+    forman el saldo inicial.
+    Devuelve (días datetime64[D], tenencia en centavos, valor en centavos de
+    MONEDA_PRINCIPAL), todo en una pasada vectorizada.
+    """
+    import numpy as np
+
+    fechas = np.asarray(fechas, dtype="datetime64[D]")
+    centavos = np.asarray(centavos, dtype=np.int64)
+    desde, hasta = np.datetime64(desde, "D"), np.datetime64(hasta, "D")
+    dias = np.arange(desde, hasta + 1, dtype="datetime64[D]")
+
+    inicial = centavos[fechas < desde].sum()
+    dentro = (fechas >= desde) & (fechas <= hasta)
+    indice = (fechas[dentro] - desde).astype(np.int64)
+    cambios = np.bincount(indice, weights=centavos[dentro], minlength=len(dias))
+    # bincount suma en float64; los centavos entran exactos hasta 2**53.
+    tenencia = inicial + np.cumsum(np.rint(cambios).astype(np.int64))
+    valor = _redondear(tenencia * cache.cotizaciones(dias, serie), ESCALA)
+    return dias, tenencia, valor
+
+
+def agregar_precios(book, commodity, currency, filas, tipo, fuente) -> int:
+    """
+    Agrega a la base de precios del libro los precios de 'commodity' en
+    'currency' de 'filas' ([(ordinal, precio en 1/ESCALA)]) que todavía no
+    estén para ese tipo ("typestr"). GnuCash guarda un solo precio por día
+    para cada par: si ese día ya tiene uno de otro tipo escrito por 'fuente'
+    (una carga anterior) se reemplaza; si lo escribió otro (GnuCash, al
+    registrar una transacción, o el usuario a mano) el día se omite. No
+    guarda el libro. Devuelve cuántos agregó.
+    """
+    import gnucash
+    from gnucash.gnucash_core import GncNumeric
+
+    pdb = book.get_price_db()
+    existentes = {
+        a_ordinal(precio.get_time64()): precio
+        for precio in pdb.get_prices(commodity, currency)
+    }
+    agregados = 0
+    for ordinal, valor in filas:
+        anterior = existentes.get(ordinal)
+        if anterior is not None:
+            if (
+                anterior.get_typestr() == tipo
+                or anterior.get_source_string() != fuente
+            ):
+                continue
+            pdb.remove_price(anterior)
+        dia = date.fromordinal(ordinal)
+        precio = gnucash.GncPrice(book)
+        precio.begin_edit()
+        precio.set_commodity(commodity)
+        precio.set_currency(currency)
+        precio.set_time64(datetime(dia.year, dia.month, dia.day, 12))
+        precio.set_source_string(fuente)
+        precio.set_typestr(tipo)
+        precio.set_value(GncNumeric(valor, ESCALA))
+        precio.commit_edit()
+        pdb.add_price(precio)
+        existentes[ordinal] = precio
+        agregados += 1
+    return agregados
+
+
+def cargar_en_libro(book, series: dict, moneda=None, fuente="cotizaciones.py") -> dict:
+    """
+    Agrega a la base de precios del libro las cotizaciones de la serie de
+    config.COTIZACIONES["serie"] en 'series' ({serie: [(ordinal, cotización)]},
+    como las de leer_series) que todavía no estén, guardando la serie como
+    tipo del precio. Las demás series no se cargan: compartirían el único
+    precio por día del libro. No guarda el libro.
+    Devuelve {serie: precios agregados}.
+    """
+    serie = config.COTIZACIONES["serie"]
+    if serie not in series:
+        raise ValueError(f"No hay cotizaciones de la serie '{serie}'.")
+    moneda = moneda or config.COTIZACIONES["moneda"]
+    tabla = book.get_table()
+    commodity = tabla.lookup("ISO4217", moneda)
+    currency = tabla.lookup("ISO4217", config.MONEDA_PRINCIPAL)
+    if commodity is None or currency is None:
+        raise ValueError(f"El libro no tiene la moneda '{moneda}'.")
+    return {
+        serie: agregar_precios(book, commodity, currency, series[serie], serie, fuente)
+    }
@@ -0,0 +1,364 @@
+# demonio.py
+
+"""
+Demonio del libro: mantiene la sesión de GnuCash abierta (con el índice de
+cuentas y de huellas en memoria) y atiende pedidos por un socket Unix.
+Los guardados se agrupan: se guarda tras unos segundos sin pedidos o, como
+máximo, cada INTERVALO_MAXIMO segundos mientras haya cambios pendientes.
+
+Los scripts usan abrir_libro(): si el demonio está corriendo le envían los
+pedidos (milisegundos); si no, abren el libro ellos mismos como siempre.
+
+Uso:
+    python demonio.py            # inicia el demonio en primer plano
+    python demonio.py --detener  # guarda y detiene el demonio en ejecución
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+
+import config
+from dinero import Monto
+from importador import normalizar_especificacion
+from instrumentacion import contar, medir
+
+SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+    f"expenses-{os.getuid()}.sock",
+)
+ESPERA_INACTIVIDAD = 5.0  # segundos sin pedidos antes de guardar
+INTERVALO_MAXIMO = 60.0  # máximo de segundos con cambios sin guardar
+
+
+class _Manejador(socketserver.StreamRequestHandler):
+    """Un pedido JSON por conexión, una respuesta JSON por línea."""
+
+    def handle(self):
+        try:
+            pedido = json.loads(self.rfile.readline())
+            respuesta = {"ok": True, "resultado": self.server.atender(pedido)}
+        except Exception as e:
+            # El demonio siempre responde: un pedido fallido no lo detiene.
+            error = f"Falta el campo {e}" if isinstance(e, KeyError) else str(e)
+            respuesta = {"ok": False, "error": error}
+        linea = json.dumps(respuesta, ensure_ascii=False, default=str) + "\n"
+        self.wfile.write(linea.encode("utf-8"))
+
+
+class DemonioLibro(socketserver.UnixStreamServer):
+    """Servidor de un solo hilo: los pedidos se atienden de a uno."""
+
+    timeout = 0.5  # cada cuánto se revisa si corresponde guardar
+
+    def __init__(self, servicio, ruta_socket=SOCKET):
+        if os.path.exists(ruta_socket):
+            os.unlink(ruta_socket)
+        super().__init__(ruta_socket, _Manejador)
+        os.chmod(ruta_socket, 0o600)
+        self.servicio = servicio
+        self.ruta_socket = ruta_socket
+        self.detenido = False
+        self.ultimo_pedido = time.monotonic()
+        self.primer_pendiente = None
+
+    def atender(self, pedido):
+        self.ultimo_pedido = time.monotonic()
+        op = pedido.get("op")
+        if op == "ping":
+            return "pong"
+        if op == "cuentas":
+            return self.servicio.cuentas()
+        if op == "verificar_cuentas":
+            return self.servicio.verificar_cuentas(pedido["referencias"])
+        if op == "saldo":
+            saldo = self.servicio.saldo(pedido["cuenta"], pedido.get("fecha"))
+            return [saldo.unidades, saldo.fraccion]
+        if op == "existe":
+            return self.servicio.existe(pedido["id_externo"])
+        if op == "asegurar_titulo":
+            ruta = self.servicio.asegurar_titulo(pedido["cuenta"], pedido["especie"])
+            if self.servicio.pendientes and self.primer_pendiente is None:
+                self.primer_pendiente = self.ultimo_pedido
+            return ruta
+        if op == "costo_titulo":
+            costo = self.servicio.costo_titulo(
+                pedido["cuenta"], Monto(*pedido["cantidad"]), pedido["fecha"]
+            )
+            return [costo.unidades, costo.fraccion]
+        if op == "publicar":
+            resultado = self.servicio.publicar(
+                pedido["transaccion"], forzar=pedido.get("forzar", False)
+            )
+            if self.servicio.pendientes and self.primer_pendiente is None:
+                self.primer_pendiente = self.ultimo_pedido
+            return resultado
+        if op == "guardar":
+            self.guardar()
+            return "guardado"
+        if op == "detener":
+            self.detenido = True
+            return "detenido"
+        raise ValueError(f"Operación desconocida: '{op}'.")
+
+    def guardar(self):
+        if self.servicio.pendientes:
+            self.servicio.guardar()
+            print(f"Libro guardado ({time.strftime('%H:%M:%S')}).")
+        self.primer_pendiente = None
+
+    def revisar_guardado(self):
+        if self.primer_pendiente is None:
+            return
+        ahora = time.monotonic()
+        if (
+            ahora - self.ultimo_pedido >= ESPERA_INACTIVIDAD
+            or ahora - self.primer_pendiente >= INTERVALO_MAXIMO
+        ):
+            self.guardar()
+
+    def ejecutar(self):
+        while not self.detenido:
+            self.handle_request()
+            self.revisar_guardado()
+        self.guardar()
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.ruta_socket):
+            os.unlink(self.ruta_socket)
+
+
+class ClienteDemonio:
+    """Misma interfaz que ServicioLibro, pero atendida por el demonio."""
+
+    def __init__(self, ruta_socket=SOCKET):
+        self.ruta_socket = ruta_socket
+
+    def _pedir(self, op, **datos):
+        contar("pedidos_demonio")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexion:
+            conexion.connect(self.ruta_socket)
+            # Los Monto de los registros leídos viajan como texto canónico.
+            pedido = (
+                json.dumps({"op": op, **datos}, ensure_ascii=False, default=str) + "\n"
+            )
+            conexion.sendall(pedido.encode("utf-8"))
+            with conexion.makefile("r", encoding="utf-8") as lector:
+                respuesta = json.loads(lector.readline())
+        if not respuesta["ok"]:
+            raise ValueError(respuesta["error"])
+        return respuesta["resultado"]
+
+    def cuentas(self):
+        return self._pedir("cuentas")
+
+    def verificar_cuentas(self, referencias):
+        return self._pedir("verificar_cuentas", referencias=list(referencias))
+
+    def saldo(self, referencia, fecha=None) -> Monto:
+        if fecha is not None:
+            fecha = fecha.strftime("%Y-%m-%d")
+        return Monto(*self._pedir("saldo", cuenta=referencia, fecha=fecha))
+
+    def existe(self, id_externo) -> bool:
+        return self._pedir("existe", id_externo=id_externo)
+
+    def asegurar_titulo(self, referencia, especie) -> str:
+        return self._pedir("asegurar_titulo", cuenta=referencia, especie=especie)
+
+    def costo_titulo(self, referencia, cantidad: Monto, fecha) -> Monto:
+        return Monto(
+            *self._pedir(
+                "costo_titulo",
+                cuenta=referencia,
+                cantidad=[cantidad.unidades, cantidad.fraccion],
+                fecha=fecha,
+            )
+        )
+
+    def publicar(self, registro, forzar=False) -> dict:
+        return self._pedir("publicar", transaccion=registro, forzar=forzar)
+
+    def guardar(self):
+        self._pedir("guardar")
+
+    def detener(self):
+        self._pedir("detener")
+
+
+class LibroSimulado:
+    """
+    Misma interfaz que ServicioLibro, sin abrir el libro: valida y muestra
+    cada transacción en lugar de registrarla. Sin el libro no hay saldos,
+    costos de títulos ni duplicados, y las cuentas conocidas son solo las de
+    config.CUENTAS: de las referencias solo se controla que sean una clave o
+    una ruta completa.
+    """
+
+    pendientes = 0
+
+    def cuentas(self):
+        return sorted(set(config.CUENTAS.values()))
+
+    def verificar_cuentas(self, referencias):
+        return [r for r in referencias if r not in config.CUENTAS and "." not in r]
+
+    def saldo(self, referencia, fecha=None) -> Monto:
+        return Monto(0)
+
+    def existe(self, id_externo) -> bool:
+        return False
+
+    def costo_titulo(self, referencia, cantidad, fecha):
+        # Sin los lotes del libro el costo es desconocido (ver cartera._registro).
+        return None
+
+    def asegurar_titulo(self, referencia, especie) -> str:
+        return f"{config.CUENTAS.get(referencia, referencia)}.{especie}"
+
+    def validar(self, registro) -> dict:
+        """Especificación normalizada del registro, si está balanceado."""
+        spec = normalizar_especificacion(registro)
+        if sum(monto for _, monto in spec["splits"]):
+            raise ValueError("Los splits de la transacción no suman cero.")
+        return spec
+
+    def publicar(self, registro, forzar=False) -> dict:
+        spec = self.validar(registro)
+        id_externo = f" [{spec['id_externo']}]" if spec["id_externo"] else ""
+        print(
+            f"\033[94m[SIMULACIÓN] {spec['fecha'].strftime('%d/%m/%Y')} "
+            f"{spec['descripcion']}{id_externo}\033[0m"
+        )
+        for (referencia, monto), cantidad in zip(spec["splits"], spec["cantidades"]):
+            ruta = config.CUENTAS.get(referencia, referencia)
+            linea = f"  {ruta:<70} {monto:>16,.2f}"
+            print(f"{linea} ({cantidad:,.2f})" if cantidad is not None else linea)
+        return {"estado": "simulada"}
+
+    def guardar(self):
+        pass
+
+
+def demonio_disponible(ruta_socket=SOCKET) -> bool:
+    try:
+        return ClienteDemonio(ruta_socket)._pedir("ping") == "pong"
+    except (OSError, ValueError):
+        return False
+
+
+def _en_cola():
+    from cola import LibroEnCola
+
+    cola = LibroEnCola()
+    try:
+        yield cola
+    finally:
+        cola.cerrar()
+
+
+@contextmanager
+def abrir_libro(usar_demonio=True, simular=False, diferir=False, usar_cola=True):
+    """
+    Entrega un objeto con la interfaz de ServicioLibro: el demonio si está
+    corriendo, o un servicio sobre una sesión propia que se guarda al salir.
+    Con 'simular' entrega un LibroSimulado y no se carga GnuCash.
+    Con 'diferir', o si el libro está bloqueado por otro programa (salvo que
+    'usar_cola' sea False), entrega la cola local de cola.py: las
+    transacciones se registran después, todas juntas, al vaciarla.
+    """
+    if simular:
+        yield LibroSimulado()
+        return
+    if diferir:
+        yield from _en_cola()
+        return
+    if usar_demonio and demonio_disponible():
+        yield ClienteDemonio()
+        return
+    # Los bindings de GnuCash solo se cargan cuando hace falta abrir el libro.
+    with medir("importar_gnucash"):
+        from libro import abrir_sesion, libro_no_disponible
+        from servicio import ServicioLibro
+
+    sesion = ExitStack()
+    try:
+        session = sesion.enter_context(abrir_sesion())
+    except Exception as e:
+        if not (usar_cola and libro_no_disponible(e)):
+            raise
+        session = None
+        print(
+            "\033[93mEl libro no está disponible (¿GnuCash lo tiene abierto?): "
+            "las transacciones se guardan en la cola.\033[0m"
+        )
+    if session is None:
+        yield from _en_cola()
+        return
+
+    servicio = None
+    try:
+        with sesion:
+            servicio = ServicioLibro(session)
+            yield servicio
+        servicio.confirmar()
+    finally:
+        if servicio:
+            servicio.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Demonio del libro de GnuCash.")
+    parser.add_argument(
+        "--detener", action="store_true", help="Guarda y detiene el demonio."
+    )
+    args = parser.parse_args()
+
+    if args.detener:
+        if not demonio_disponible():
+            print("El demonio no está en ejecución.")
+            return
+        ClienteDemonio().detener()
+        print("Demonio detenido.")
+        return
+
+    if demonio_disponible():
+        print("El demonio ya está en ejecución.")
+        sys.exit(1)
+
+    from libro import abrir_sesion
+    from servicio import ServicioLibro
+
+    # SIGTERM se trata igual que Ctrl+C: se guarda antes de salir.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print("Abriendo el libro...")
+    try:
+        with abrir_sesion() as session:
+            servicio = ServicioLibro(session)
+            servicio.cuentas()  # precalienta el índice de cuentas
+            servidor = DemonioLibro(servicio)
+            print(f"\033[92mDemonio escuchando en {SOCKET}\033[0m")
+            try:
+                servidor.ejecutar()
+            except KeyboardInterrupt:
+                servidor.guardar()
+            finally:
+                servidor.server_close()
+        servicio.confirmar()
+        servicio.cerrar()
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+    print("Libro guardado y sesión cerrada.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# dinero.py
+
+"""
+Representación exacta de importes: un entero de unidades mínimas (centavos
+para las monedas habituales) junto con la fracción del commodity, igual que
+los GncNumeric de GnuCash. Los importes se pasan al libro y se leen de él con
+numerador y denominador, sin conversiones intermedias a texto ni a Decimal.
+"""
+
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from functools import total_ordering
+
+from gnucash_utils import LOCALE_PREDETERMINADO, parse_centavos, parse_decimal
+
+# Fracción de ARS, USD y la mayoría de las monedas: dos decimales.
+FRACCION_PREDETERMINADA = 100
+
+
+def dividir_redondeando(numerador: int, denominador: int) -> int:
+    """División entera con redondeo a la mitad hacia afuera del cero."""
+    cociente, resto = divmod(abs(numerador), denominador)
+    if resto * 2 >= denominador:
+        cociente += 1
+    return -cociente if numerador < 0 else cociente
+
+
+@total_ordering
+class Monto:
+    """Importe exacto: 'unidades' enteras de 1/'fraccion' de la moneda."""
+
+    __slots__ = ("unidades", "fraccion")
+
+    def __init__(self, unidades: int = 0, fraccion: int = FRACCION_PREDETERMINADA):
+        self.unidades = int(unidades)
+        self.fraccion = int(fraccion)
+
+    # --- Construcción ---
+
+    @classmethod
+    def de_texto(
+        cls, texto: str, locale=LOCALE_PREDETERMINADO, fraccion=FRACCION_PREDETERMINADA
+    ):
+        """Interpreta un monto escrito con el formato 'locale' (ver parse_decimal)."""
+        if fraccion == 100:
+            return cls(parse_centavos([texto], locale)[0])
+        return cls.de_decimal(parse_decimal(texto, locale), fraccion)
+
+    @classmethod
+    def de_decimal(cls, valor, fraccion=FRACCION_PREDETERMINADA):
+        """Convierte un Decimal (o int), redondeando a la fracción indicada."""
+        unidades = (Decimal(valor) * fraccion).to_integral_value(rounding=ROUND_HALF_UP)
+        return cls(unidades, fraccion)
+
+    @classmethod
+    def de_gnc(cls, numero, fraccion=None):
+        """
+        Lee un GncNumeric (o cualquier objeto con num() y denom()). Sin
+        'fraccion' conserva el denominador del número tal como está.
+        """
+        num, denom = numero.num(), numero.denom()
+        if fraccion is None or denom == fraccion:
+            return cls(num, denom)
+        return cls(dividir_redondeando(num * fraccion, denom), fraccion)
+
+    @classmethod
+    def de_saldo(cls, cuenta, fecha=None):
+        """
+        Saldo exacto de la cuenta en la fracción de su commodity; con 'fecha',
+        el saldo al final de ese día.
+        """
+        if fecha is None:
+            balance = cuenta.GetBalance()
+        else:
+            balance = cuenta.GetBalanceAsOfDate(
+                datetime(fecha.year, fecha.month, fecha.day, 23, 59, 59)
+            )
+        return cls.de_gnc(balance, cuenta.GetCommodity().get_fraction())
+
+    # --- Conversión ---
+
+    def a_fraccion(self, fraccion: int) -> "Monto":
+        if fraccion == self.fraccion:
+            return self
+        return Monto(
+            dividir_redondeando(self.unidades * fraccion, self.fraccion), fraccion
+        )
+
+    def centavos(self) -> int:
+        return self.a_fraccion(100).unidades
+
+    def a_decimal(self) -> Decimal:
+        return Decimal(self.unidades) / Decimal(self.fraccion)
+
+    def texto(self) -> str:
+        """Formato canónico, igual que monto_a_texto: coma decimal, sin miles."""
+        signo = "-" if self.unidades < 0 else ""
+        entero, resto = divmod(abs(self.unidades), self.fraccion)
+        decimales = len(str(self.fraccion)) - 1
+        if decimales <= 0:
+            return f"{signo}{entero}"
+        return f"{signo}{entero},{resto:0{decimales}d}"
+
+    # --- Aritmética y comparaciones ---
+
+    def _alinear(self, otro):
+        """Lleva 'otro' (Monto o entero) a unidades de la misma fracción."""
+        if isinstance(otro, Monto):
+            if otro.fraccion != self.fraccion:
+                raise ValueError(
+                    f"No se pueden combinar montos con fracciones {self.fraccion} "
+                    f"y {otro.fraccion}."
+                )
+            return otro.unidades
+        if isinstance(otro, int):
+            return otro * self.fraccion
+        return NotImplemented
+
+    def __add__(self, otro):
+        unidades = self._alinear(otro)
+        if unidades is NotImplemented:
+            return NotImplemented
+        return Monto(self.unidades + unidades, self.fraccion)
+
+    __radd__ = __add__
+
+    def __sub__(self, otro):
+        unidades = self._alinear(otro)
+        if unidades is NotImplemented:
+            return NotImplemented
+        return Monto(self.unidades - unidades, self.fraccion)
+
+    def __rsub__(self, otro):
+        unidades = self._alinear(otro)
+        if unidades is NotImplemented:
+            return NotImplemented
+        return Monto(unidades - self.unidades, self.fraccion)
+
+    def __neg__(self):
+        return Monto(-self.unidades, self.fraccion)
+
+    def __abs__(self):
+        return Monto(abs(self.unidades), self.fraccion)
+
+    def __bool__(self):
+        return self.unidades != 0
+
+    def __eq__(self, otro):
+        unidades = self._alinear(otro)
+        if unidades is NotImplemented:
+            return NotImplemented
+        return self.unidades == unidades
+
+    def __lt__(self, otro):
+        unidades = self._alinear(otro)
+        if unidades is NotImplemented:
+            return NotImplemented
+        return self.unidades < unidades
+
+    def __hash__(self):
+        # Un monto entero es igual al int que vale (ver _alinear): mismo hash.
+        entero, resto = divmod(self.unidades, self.fraccion)
+        if not resto:
+            return hash(entero)
+        return hash((self.unidades, self.fraccion))
+
+    def __format__(self, formato):
+        return format(self.a_decimal(), formato)
+
+    def __str__(self):
+        return self.texto()
+
+    def __repr__(self):
+        return f"Monto({self.unidades}, {self.fraccion})"
@@ -0,0 +1,257 @@
+# exportar.py
+
+"""
+Exportación columnar de todos los splits del libro para análisis.
+Cada exportación agrega una "parte" (un archivo .npz de NumPy con una columna
+por campo) al directorio de exportación. El modo incremental escribe solo los
+splits de transacciones nuevas o modificadas: cada split lleva la huella del
+contenido de su transacción, y las partes con transacciones que cambiaron o
+se borraron del libro se reescriben sin ellas. El directorio guarda además
+la marca del libro exportado, para avisar cuando la exportación quedó vieja.
+
+Columnas:
+    fecha        datetime64[D]
+    cuenta       clave de config.CUENTAS ("" si la cuenta no tiene clave)
+    ruta         ruta completa de la cuenta
+    centavos     valor del split en centavos (int64)
+    moneda       moneda de la transacción
+    descripcion  descripción de la transacción
+    tx_guid      GUID de la transacción
+"""
+
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+import config
+from dinero import Monto
+from gnucash_utils import ruta_de_cuenta
+from huellas import marca_libro, ruta_sidecar, transacciones_del_libro
+
+COLUMNAS = ("fecha", "cuenta", "ruta", "centavos", "moneda", "descripcion", "tx_guid")
+# Huella del contenido de la transacción, repetida en cada uno de sus splits.
+COLUMNA_HUELLA = "tx_huella"
+
+
+def directorio_exportacion(uri=None) -> str:
+    return ruta_sidecar("splits", uri)
+
+
+def _partes(directorio):
+    return sorted(glob.glob(os.path.join(directorio, "parte-*.npz")))
+
+
+def _ruta_marca(directorio):
+    return os.path.join(directorio, "marca_libro")
+
+
+def exportacion_vigente(directorio=None, uri=None) -> bool:
+    """Indica si la última exportación corresponde al libro tal como está en disco."""
+    try:
+        with open(_ruta_marca(directorio or directorio_exportacion(uri))) as f:
+            return f.read().strip() == marca_libro(uri)
+    except OSError:
+        return False
+
+
+def huellas_exportadas(directorio):
+    """
+    {GUID de transacción: huella} de lo ya exportado (solo lee esas dos
+    columnas), o None si alguna parte es de una exportación sin huellas.
+    """
+    huellas = {}
+    for parte in _partes(directorio):
+        with np.load(parte) as datos:
+            if COLUMNA_HUELLA not in datos.files:
+                return None
+            huellas.update(
+                zip(datos["tx_guid"].tolist(), datos[COLUMNA_HUELLA].tolist())
+            )
+    return huellas
+
+
+def transacciones_exportables(root_account):
+    """
+    Genera (GUID, huella, filas) por transacción, con una tupla por split en
+    el orden de COLUMNAS. La huella cambia si cambia cualquier columna.
+    """
+    claves = {}
+    for clave, ruta in config.CUENTAS.items():
+        claves.setdefault(ruta, clave)
+    rutas = {}
+    for tx in transacciones_del_libro(root_account):
+        tx_guid = tx.GetGUID().to_string()
+        fecha = tx.GetDate().strftime("%Y-%m-%d")
+        moneda = tx.GetCurrency().get_mnemonic()
+        descripcion = tx.GetDescription()
+        filas = []
+        for split in tx.GetSplitList():
+            cuenta = split.GetAccount()
+            guid = cuenta.GetGUID().to_string()
+            ruta = rutas.get(guid)
+            if ruta is None:
+                ruta = rutas[guid] = ruta_de_cuenta(cuenta)
+            filas.append(
+                (
+                    fecha,
+                    claves.get(ruta, ""),
+                    ruta,
+                    Monto.de_gnc(split.GetValue(), 100).unidades,
+                    moneda,
+                    descripcion,
+                    tx_guid,
+                )
+            )
+        huella = hashlib.sha1(repr(filas).encode("utf-8")).hexdigest()[:16]
+        yield tx_guid, huella, filas
+
+
+def _guardar_parte(destino, datos):
+    temporal = f"{destino}.tmp.npz"
+    np.savez_compressed(temporal, **datos)
+    os.replace(temporal, destino)
+
+
+def _quitar_transacciones(directorio, guids):
+    """
+    Reescribe sin los splits de 'guids' las partes que los tienen; las que
+    quedan vacías se borran.
+    """
+    guids = np.array(sorted(guids), dtype=str)
+    for parte in _partes(directorio):
+        with np.load(parte) as datos:
+            conservar = ~np.isin(datos["tx_guid"], guids)
+            if conservar.all():
+                continue
+            restantes = {columna: datos[columna][conservar] for columna in datos.files}
+        if conservar.any():
+            _guardar_parte(parte, restantes)
+        else:
+            os.remove(parte)
+
+
+def exportar(root_account, directorio=None, incremental=True) -> int:
+    """
+    Recorre el libro una vez y escribe una parte nueva con los splits.
+    En modo incremental escribe solo las transacciones nuevas o modificadas
+    y quita de las partes anteriores las modificadas y las borradas del
+    libro; si no, borra las partes anteriores. Devuelve la cantidad de
+    splits escritos.
+    """
+    directorio = directorio or directorio_exportacion()
+    os.makedirs(directorio, exist_ok=True)
+    exportadas = huellas_exportadas(directorio) if incremental else None
+    if exportadas is None:
+        for parte in _partes(directorio):
+            os.remove(parte)
+        exportadas = {}
+
+    filas = []
+    vigentes = set()
+    obsoletas = set()
+    for tx_guid, huella, filas_tx in transacciones_exportables(root_account):
+        vigentes.add(tx_guid)
+        anterior = exportadas.get(tx_guid)
+        if anterior == huella:
+            continue
+        if anterior is not None:
+            obsoletas.add(tx_guid)
+        filas.extend(fila + (huella,) for fila in filas_tx)
+    obsoletas.update(exportadas.keys() - vigentes)
+    if obsoletas:
+        _quitar_transacciones(directorio, obsoletas)
+
+    if filas:
+        columnas = list(zip(*filas))
+        datos = {
+            "fecha": np.array(columnas[0], dtype="datetime64[D]"),
+            "cuenta": np.array(columnas[1], dtype=str),
+            "ruta": np.array(columnas[2], dtype=str),
+            "centavos": np.array(columnas[3], dtype=np.int64),
+            "moneda": np.array(columnas[4], dtype=str),
+            "descripcion": np.array(columnas[5], dtype=str),
+            "tx_guid": np.array(columnas[6], dtype=str),
+            COLUMNA_HUELLA: np.array(columnas[7], dtype=str),
+        }
+        partes = _partes(directorio)
+        # Las partes vaciadas se borran, así que el número sigue a la última.
+        numero = int(partes[-1][-9:-4]) + 1 if partes else 1
+        _guardar_parte(os.path.join(directorio, f"parte-{numero:05d}.npz"), datos)
+    with open(_ruta_marca(directorio), "w") as f:
+        f.write(marca_libro() or "")
+    return len(filas)
+
+
+def cargar(directorio=None, columnas=COLUMNAS, como_dataframe=False):
+    """
+    Carga todas las partes exportadas y devuelve un diccionario de arrays
+    de NumPy (o un DataFrame de pandas si se pide 'como_dataframe').
+    """
+    directorio = directorio or directorio_exportacion()
+    trozos = {columna: [] for columna in columnas}
+    for parte in _partes(directorio):
+        with np.load(parte) as datos:
+            for columna in columnas:
+                trozos[columna].append(datos[columna])
+    resultado = {
+        columna: np.concatenate(valores) if valores else np.array([])
+        for columna, valores in trozos.items()
+    }
+    if como_dataframe:
+        import pandas as pd
+
+        return pd.DataFrame(resultado)
+    return resultado
+
+
+def factorizar(valores):
+    """
+    (distintos, índice) de un array de textos, con 'índice' tal que
+    distintos[índice] == valores. Con pocos valores distintos (como las rutas
+    de cuentas) un diccionario es mucho más rápido que ordenar los textos.
+    """
+    codigos = {}
+    indice = np.fromiter(
+        (codigos.setdefault(v, len(codigos)) for v in valores.tolist()),
+        dtype=np.int64,
+        count=len(valores),
+    )
+    return np.array(list(codigos), dtype=str), indice
+
+
+def resumir_por_categoria(datos, raiz="Gastos", nivel=1):
+    """
+    Suma los centavos por categoría (la ruta truncada a 'nivel' segmentos por
+    debajo de 'raiz') y por mes, con operaciones vectorizadas.
+    Devuelve (categorías, meses AAAA-MM, matriz de centavos categoría × mes).
+    """
+    rutas_unicas, indice_ruta = factorizar(datos["ruta"])
+    profundidad = raiz.count(".") + 1 + nivel
+    prefijo = raiz + "."
+    # La categoría se calcula una vez por ruta distinta, no por split.
+    categoria_de_ruta = [
+        ".".join(r.split(".")[:profundidad]) if r.startswith(prefijo) else ""
+        for r in rutas_unicas.tolist()
+    ]
+    categorias = np.array(sorted(set(categoria_de_ruta) - {""}), dtype=str)
+    numero = {categoria: i for i, categoria in enumerate(categorias.tolist())}
+    numero_de_ruta = np.array(
+        [numero.get(c, -1) for c in categoria_de_ruta], dtype=np.int64
+    )
+    indice_categoria = numero_de_ruta[indice_ruta]
+    seleccion = indice_categoria >= 0
+    indice_categoria = indice_categoria[seleccion]
+
+    meses_split = datos["fecha"][seleccion].astype("datetime64[M]")
+    meses, indice_mes = np.unique(meses_split, return_inverse=True)
+
+    # bincount suma en float64; los centavos entran exactos hasta 2**53.
+    celdas = np.bincount(
+        indice_categoria * len(meses) + indice_mes,
+        weights=datos["centavos"][seleccion],
+        minlength=len(categorias) * len(meses),
+    )
+    matriz = np.rint(celdas).astype(np.int64).reshape(len(categorias), len(meses))
+    return categorias, meses.astype(str), matriz
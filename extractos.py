@@ -0,0 +1,386 @@
+# extractos.py
+
+"""
+Importación de extractos bancarios, de tarjetas, de brokers y de Mercado Pago.
+Cada archivo se lee según su fuente de config.EXTRACTOS (CSV, OFX, JSON o las
+actividades de Mercado Pago) y se normaliza a movimientos comunes:
+    {"fuente", "linea", "fecha" (AAAA-MM-DD), "descripcion", "centavos",
+     "moneda", "id_externo", "cuenta", "contrapartida"}
+donde "centavos" es el importe visto desde la cuenta del extracto (positivo si
+entra dinero, es decir un débito), en la "moneda" del extracto, y
+"contrapartida" la cuenta que asignan las reglas (None si ninguna aplica).
+Los movimientos en moneda extranjera se registran con su valor en
+MONEDA_PRINCIPAL a la cotización del día (ver cotizaciones.py).
+
+La lectura y la clasificación de cada archivo corren en un proceso aparte
+(ProcessPoolExecutor), así que escalan con los núcleos disponibles. Cada
+proceso devuelve sus movimientos ordenados por fecha; el proceso principal
+los intercala con heapq.merge y los registra él solo, en una única sesión, a
+través de importador.importar.
+
+Las transferencias entre cuentas propias aparecen en los dos extractos (la
+salida del banco y la entrada en Mercado Pago, el pago de la tarjeta en el
+banco y en el resumen): si ambos lados coinciden en fecha, importe y cuentas
+se registra una sola vez. Su id externo sale de esa misma clave y no del
+extracto, así que el segundo lado también se reconoce como duplicado cuando
+llega en otra importación.
+"""
+
+import csv
+import hashlib
+import heapq
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import config
+from clasificador_mp import (
+    ClasificadorMP,
+    fecha_actividad,
+    monto_actividad,
+    texto_actividad,
+)
+from dinero import Monto
+from gnucash_utils import LOCALE_PREDETERMINADO, parse_centavos
+
+# Bloques <STMTTRN> de un OFX (SGML o XML) y sus campos.
+_OFX_TRANSACCION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+_OFX_CAMPO = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+# Clasificadores de cada proceso, creados al procesar el primer archivo.
+_clasificadores = {}
+
+
+def fuente_de_archivo(ruta: str, fuentes=None):
+    """
+    Devuelve (fuente, ruta) para un argumento "FUENTE=RUTA", o deduce la fuente
+    del nombre del archivo: la clave de 'fuentes' (por defecto
+    config.EXTRACTOS) más larga con la que empieza (por ejemplo
+    "galicia_ars_2025-03.csv").
+    """
+    fuentes = config.EXTRACTOS if fuentes is None else fuentes
+    fuente, separador, resto = ruta.partition("=")
+    if separador and fuente in fuentes:
+        return fuente, resto
+    nombre = os.path.basename(ruta).lower()
+    candidatas = [f for f in fuentes if nombre.startswith(f)]
+    if not candidatas:
+        raise ValueError(
+            f"No se reconoce la fuente de '{ruta}'. Usa FUENTE=RUTA con una de: "
+            f"{', '.join(fuentes)}."
+        )
+    return max(candidatas, key=len), ruta
+
+
+def _clasificador(fuente):
+    es_mp = config.EXTRACTOS[fuente]["formato"] == "mp"
+    reglas = "REGLAS_MP" if es_mp else "REGLAS_EXTRACTOS"
+    if reglas not in _clasificadores:
+        _clasificadores[reglas] = ClasificadorMP(getattr(config, reglas))
+    return _clasificadores[reglas]
+
+
+def _id_movimiento(fuente, fecha, descripcion, centavos, repeticion):
+    """
+    Id externo de un movimiento sin identificador propio: estable entre
+    importaciones del mismo extracto, y distinto para movimientos idénticos
+    del mismo día gracias al número de repetición.
+    """
+    contenido = f"{fecha}|{descripcion}|{centavos}|{repeticion}"
+    return f"{fuente}:{hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _filas_csv(ruta, spec):
+    with open(ruta, encoding=spec.get("codificacion", "utf-8-sig"), newline="") as f:
+        lector = csv.DictReader(f, delimiter=spec.get("separador", ","))
+        return [(lector.line_num, fila) for fila in lector]
+
+
+def _filas_json(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        contenido = f.read()
+    if contenido.lstrip().startswith("["):
+        return list(enumerate(json.loads(contenido), start=1))
+    return [
+        (numero, json.loads(linea))
+        for numero, linea in enumerate(contenido.splitlines(), start=1)
+        if linea.strip()
+    ]
+
+
+def _columnas(filas, spec, locale):
+    """
+    Convierte las filas de un CSV o JSON a (linea, fecha, descripcion, id,
+    centavos), con los montos de todo el archivo en una sola pasada.
+    """
+    columnas = spec["columnas"]
+
+    def textos(nombre):
+        return [str(fila.get(columnas[nombre]) or "").strip() for _, fila in filas]
+
+    if "monto" in columnas:
+        montos = parse_centavos(textos("monto"), locale, estricto=False)
+    else:
+        debitos = parse_centavos(textos("debito"), locale, estricto=False)
+        creditos = parse_centavos(textos("credito"), locale, estricto=False)
+        montos = [
+            None if d is None and c is None else (c or 0) - (d or 0)
+            for d, c in zip(debitos, creditos)
+        ]
+    for (linea, fila), centavos in zip(filas, montos):
+        yield (
+            linea,
+            str(fila.get(columnas["fecha"]) or "").strip(),
+            str(fila.get(columnas.get("descripcion"), "") or "").strip(),
+            str(fila.get(columnas["id"]) or "").strip() if "id" in columnas else "",
+            centavos,
+        )
+
+
+def _leer_ofx(ruta):
+    with open(ruta, encoding="utf-8", errors="replace") as f:
+        contenido = f.read()
+    bloques = [
+        dict(_OFX_CAMPO.findall(b)) for b in _OFX_TRANSACCION.findall(contenido)
+    ]
+    # Los importes de OFX usan punto decimal y no llevan separador de miles.
+    montos = parse_centavos(
+        [b.get("TRNAMT", "").strip().replace(",", ".") for b in bloques],
+        "en",
+        estricto=False,
+    )
+    for numero, (bloque, centavos) in enumerate(zip(bloques, montos), start=1):
+        fecha = bloque.get("DTPOSTED", "").strip()[:8]
+        descripcion = " ".join(
+            p.strip() for p in (bloque.get("NAME"), bloque.get("MEMO")) if p
+        )
+        yield numero, fecha, descripcion, bloque.get("FITID", "").strip(), centavos
+
+
+def _leer_mp(ruta):
+    for numero, actividad in _filas_json(ruta):
+        try:
+            centavos = Monto.de_decimal(monto_actividad(actividad)).unidades
+            fecha = fecha_actividad(actividad)
+        except ValueError:
+            centavos, fecha = None, ""
+        yield (
+            numero,
+            fecha,
+            texto_actividad(actividad) or "Mercado Pago",
+            str(actividad.get("id", "")),
+            centavos,
+            actividad,
+        )
+
+
+def procesar_archivo(fuente, ruta):
+    """
+    Lee, normaliza y clasifica un archivo completo. Se ejecuta en un proceso
+    del pool, así que solo recibe y devuelve datos simples.
+    Devuelve (movimientos ordenados por fecha, errores [(linea, motivo)]).
+    """
+    spec = config.EXTRACTOS[fuente]
+    formato = spec["formato"]
+    locale = spec.get("locale", LOCALE_PREDETERMINADO)
+    signo = spec.get("signo", 1)
+    formato_fecha = spec.get(
+        "formato_fecha", "%Y%m%d" if formato == "ofx" else "%Y-%m-%d"
+    )
+    clasificador = _clasificador(fuente)
+
+    if formato == "csv":
+        filas = _columnas(_filas_csv(ruta, spec), spec, locale)
+    elif formato == "json":
+        filas = _columnas(_filas_json(ruta), spec, locale)
+    elif formato == "ofx":
+        filas = _leer_ofx(ruta)
+    elif formato == "mp":
+        filas = _leer_mp(ruta)
+    else:
+        raise ValueError(
+            f"La fuente '{fuente}' tiene un formato desconocido: '{formato}'."
+        )
+
+    movimientos = []
+    errores = []
+    repeticiones = {}
+    for linea, fecha, descripcion, identificador, centavos, *actividad in filas:
+        if centavos is None:
+            errores.append((linea, "El monto no es válido."))
+            continue
+        if formato != "mp":
+            try:
+                fecha = datetime.strptime(fecha, formato_fecha).strftime("%Y-%m-%d")
+            except ValueError:
+                errores.append((linea, f"La fecha '{fecha}' no es válida."))
+                continue
+        centavos *= signo
+        if formato == "mp":
+            # Los ids de Mercado Pago coinciden con los de mp_a_transacciones.py.
+            id_externo = f"mp:{identificador}"
+            contrapartida = clasificador.clasificar(actividad[0])
+        else:
+            if identificador:
+                id_externo = f"{fuente}:{identificador}"
+            else:
+                clave = (fecha, descripcion, centavos)
+                repeticiones[clave] = repeticiones.get(clave, 0) + 1
+                id_externo = _id_movimiento(fuente, *clave, repeticiones[clave])
+            contrapartida = clasificador.clasificar(
+                {
+                    "type": fuente,
+                    "title": descripcion,
+                    "amount": {"value": str(Monto(centavos).a_decimal())},
+                }
+            )
+        movimientos.append(
+            {
+                "fuente": fuente,
+                "linea": f"{os.path.basename(ruta)}:{linea}",
+                "fecha": fecha,
+                "descripcion": descripcion,
+                "centavos": centavos,
+                "moneda": spec.get("moneda", config.MONEDA_PRINCIPAL),
+                "id_externo": id_externo,
+                "cuenta": spec["cuenta"],
+                "contrapartida": contrapartida,
+            }
+        )
+    movimientos.sort(key=lambda m: m["fecha"])
+    return movimientos, errores
+
+
+def procesar_archivos(archivos, procesos=None):
+    """
+    Procesa en paralelo una lista de (fuente, ruta). Devuelve la lista de
+    (movimientos, errores) de cada archivo, en el orden recibido.
+    """
+    if len(archivos) <= 1 or procesos == 1:
+        return [procesar_archivo(fuente, ruta) for fuente, ruta in archivos]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [
+            pool.submit(procesar_archivo, fuente, ruta) for fuente, ruta in archivos
+        ]
+        return [futuro.result() for futuro in futuros]
+
+
+def _clave_transferencia(movimiento):
+    """Fecha, importe y par de cuentas, igual desde cualquiera de los dos lados."""
+    cuenta = config.CUENTAS.get(movimiento["cuenta"], movimiento["cuenta"])
+    contrapartida = config.CUENTAS.get(
+        movimiento["contrapartida"], movimiento["contrapartida"]
+    )
+    lado = (cuenta, movimiento["centavos"])
+    otro = (contrapartida, -movimiento["centavos"])
+    return (movimiento["fecha"], *sorted((lado, otro)))
+
+
+def _cuentas_de_extractos():
+    """Rutas de las cuentas que tienen extracto propio en config.EXTRACTOS."""
+    return {
+        config.CUENTAS.get(spec["cuenta"], spec["cuenta"])
+        for spec in config.EXTRACTOS.values()
+    }
+
+
+def _id_transferencia(clave, repeticion):
+    """
+    Id externo de una transferencia entre cuentas con extracto: el mismo desde
+    los dos lados, y distinto para transferencias idénticas del mismo día
+    gracias al número de repetición dentro de cada extracto.
+    """
+    contenido = f"{clave!r}|{repeticion}"
+    digesto = hashlib.sha1(contenido.encode("utf-8")).hexdigest()[:16]
+    return f"transferencia:{digesto}"
+
+
+def en_moneda_extranjera(archivos) -> bool:
+    """Indica si alguna de las fuentes de (fuente, ruta) no está en MONEDA_PRINCIPAL."""
+    return any(
+        config.EXTRACTOS[fuente].get("moneda", config.MONEDA_PRINCIPAL)
+        != config.MONEDA_PRINCIPAL
+        for fuente, _ in archivos
+    )
+
+
+def _splits(movimiento, cotizaciones):
+    cantidad = Monto(movimiento["centavos"])
+    if movimiento["moneda"] == config.MONEDA_PRINCIPAL:
+        return [
+            {"cuenta": movimiento["cuenta"], "monto": cantidad.texto()},
+            {"cuenta": movimiento["contrapartida"], "monto": (-cantidad).texto()},
+        ]
+    if cotizaciones is None:
+        raise ValueError(
+            f"Faltan las cotizaciones para los movimientos en {movimiento['moneda']}."
+        )
+    valor = cotizaciones.a_moneda_principal(cantidad, movimiento["fecha"])
+    # Si la contrapartida también está en moneda extranjera, el libro calcula
+    # su cantidad con la misma cotización.
+    return [
+        {
+            "cuenta": movimiento["cuenta"],
+            "monto": valor.texto(),
+            "cantidad": cantidad.texto(),
+        },
+        {"cuenta": movimiento["contrapartida"], "monto": (-valor).texto()},
+    ]
+
+
+def intercalar(resultados, sin_clasificar=None, cotizaciones=None, errores=None):
+    """
+    Intercala por fecha los movimientos ya ordenados de cada archivo y genera
+    pares (linea, registro) con el formato de importador.py. Los movimientos
+    sin contrapartida se agregan a 'sin_clasificar' (si es una lista) y las
+    transferencias ya vistas desde el otro extracto se omiten.
+    Los movimientos en moneda extranjera se valúan con 'cotizaciones' (una
+    CacheCotizaciones); los que no tienen cotización van a 'errores' como
+    pares (linea, motivo).
+    """
+    # Transferencias de cada clave todavía sin su otro lado, por fuente.
+    sin_pareja = {}
+    # Transferencias de cada clave vistas en cada extracto, para su id.
+    repeticiones = {}
+    cuentas_extracto = _cuentas_de_extractos()
+    for movimiento in heapq.merge(
+        *(movimientos for movimientos, _ in resultados), key=lambda m: m["fecha"]
+    ):
+        if movimiento["contrapartida"] is None:
+            if sin_clasificar is not None:
+                sin_clasificar.append(movimiento)
+            continue
+        clave = _clave_transferencia(movimiento)
+        fuentes = sin_pareja.setdefault(clave, [])
+        otro_lado = next(
+            (i for i, f in enumerate(fuentes) if f != movimiento["fuente"]), None
+        )
+        if otro_lado is not None:
+            del fuentes[otro_lado]
+            continue
+        fuentes.append(movimiento["fuente"])
+        id_externo = movimiento["id_externo"]
+        contrapartida = config.CUENTAS.get(
+            movimiento["contrapartida"], movimiento["contrapartida"]
+        )
+        if contrapartida in cuentas_extracto:
+            # El k-ésimo lado de un extracto corresponde al k-ésimo del otro,
+            # se importen juntos o por separado.
+            repeticion = (clave, movimiento["fuente"])
+            repeticiones[repeticion] = repeticiones.get(repeticion, 0) + 1
+            id_externo = _id_transferencia(clave, repeticiones[repeticion])
+        try:
+            splits = _splits(movimiento, cotizaciones)
+        except ValueError as e:
+            if errores is None:
+                raise
+            errores.append((movimiento["linea"], str(e)))
+            continue
+        yield movimiento["linea"], {
+            "fecha": movimiento["fecha"],
+            "descripcion": movimiento["descripcion"],
+            "id_externo": id_externo,
+            "splits": splits,
+        }
@@ -1,42 +1,282 @@
-from decimal import Decimal, InvalidOperation
+import re
+import unicodedata
+from decimal import Decimal
 
+from instrumentacion import contar, medir
 
-def parse_decimal(numero_str: str) -> Decimal:
+
+# Separadores (miles, decimales) de cada formato de montos aceptado.
+LOCALES = {"es-AR": (".", ","), "en": (",", ".")}
+LOCALE_PREDETERMINADO = "es-AR"
+
+
+def _patron_monto(miles, decimal):
+    m, d = re.escape(miles), re.escape(decimal)
+    # Signo, parte entera (con grupos de miles completos o sin separar) y
+    # decimales opcionales.
+    return (
+        rf"[ \t]*(?P<signo>[+-]?)[ \t]*"
+        rf"(?P<entero>\d{{1,3}}(?:{m}\d{{3}})+|\d+)"
+        rf"(?:{d}(?P<decimales>\d+))?[ \t]*"
+    )
+
+
+_PATRONES = {
+    locale: re.compile(_patron_monto(*separadores))
+    for locale, separadores in LOCALES.items()
+}
+# Variante para recorrer una columna entera unida por saltos de línea: cada
+# línea produce exactamente un match, válido o marcado como 'malo'.
+_PATRONES_COLUMNA = {
+    locale: re.compile(
+        rf"^(?:{_patron_monto(*separadores)}$|(?P<malo>[^\n]*))", re.MULTILINE
+    )
+    for locale, separadores in LOCALES.items()
+}
+
+
+def _separadores(locale):
+    try:
+        return LOCALES[locale]
+    except KeyError:
+        raise ValueError(
+            f"Formato de montos '{locale}' desconocido. Usa uno de {list(LOCALES)}."
+        )
+
+
+def parse_decimal(numero_str: str, locale: str = LOCALE_PREDETERMINADO) -> Decimal:
     """
     Convierte una cadena de texto con formato numérico a un objeto Decimal.
-    Maneja ',' y '.' como separadores de miles y decimales.
+    El formato es explícito: "es-AR" (1.234,56) o "en" (1,234.56). Los
+    separadores de miles deben agrupar de a tres dígitos, así que "1.234" en
+    es-AR es 1234 y "1.5" es un error en lugar de una suposición.
     """
-    try:
-        clean_str = numero_str.replace(".", "").replace(",", ".")
-        if "," in numero_str:
-            clean_str = numero_str.replace(".", "").replace(",", ".")
-        else:  # Si no había comas, los puntos podrían ser miles o un decimal.
-            clean_str = numero_str.replace(",", ".")
-
-        # Un apaño final para el caso "1.234,56" vs "1,234.56"
-        if clean_str.count(".") > 1:
-            parts = clean_str.split(".")
-            clean_str = "".join(parts[:-1]) + "." + parts[-1]
-
-        return Decimal(clean_str)
-    except InvalidOperation:
+    miles, _ = _separadores(locale)
+    coincidencia = _PATRONES[locale].fullmatch(numero_str)
+    if coincidencia is None:
         raise ValueError(f"El formato del número '{numero_str}' no es válido.")
+    signo, entero, decimales = coincidencia.group("signo", "entero", "decimales")
+    if miles in entero:
+        entero = entero.replace(miles, "")
+    if decimales:
+        return Decimal(f"{signo}{entero}.{decimales}")
+    return Decimal(f"{signo}{entero}")
+
+
+def parse_centavos(valores, locale: str = LOCALE_PREDETERMINADO, estricto=True):
+    """
+    Convierte una columna completa de montos en texto a centavos (int), sin
+    construir un Decimal por valor: la columna se recorre con una sola
+    búsqueda de la expresión regular compilada. Con más de dos decimales se
+    redondea al centavo, la mitad hacia afuera.
+    Con 'estricto' un valor inválido produce ValueError; si no, su posición
+    queda en None.
+    """
+    miles, _ = _separadores(locale)
+    valores = list(valores)
+    if not valores:
+        return []
+    patron = _PATRONES_COLUMNA[locale]
+    grupos = patron.findall("\n".join(valores))
+    if len(grupos) != len(valores):
+        # Algún valor trae saltos de línea: se procesa uno por uno.
+        grupos = [
+            patron.fullmatch(valor).groups("") if "\n" not in valor else ("",) * 4
+            for valor in valores
+        ]
+    resultado = []
+    agregar = resultado.append
+    for posicion, (signo, entero, decimales, *_) in enumerate(grupos):
+        if not entero:  # Solo los valores inválidos no tienen parte entera.
+            if estricto:
+                raise ValueError(
+                    f"El formato del número '{valores[posicion]}' no es válido."
+                )
+            agregar(None)
+            continue
+        centavos = int(entero.replace(miles, "")) * 100
+        if len(decimales) == 2:
+            centavos += int(decimales)
+        elif decimales:
+            centavos += int(decimales[:2].ljust(2, "0"))
+            if len(decimales) > 2 and decimales[2] >= "5":
+                centavos += 1
+        agregar(-centavos if signo == "-" else centavos)
+    return resultado
+
+
+def centavos_a_texto(centavos: int) -> str:
+    """Igual que monto_a_texto, pero a partir de centavos enteros."""
+    signo = "-" if centavos < 0 else ""
+    entero, resto = divmod(abs(centavos), 100)
+    return f"{signo}{entero},{resto:02d}"
+
+
+def monto_a_texto(monto: Decimal) -> str:
+    """
+    Representa un Decimal con coma decimal y sin separador de miles,
+    un formato que parse_decimal interpreta sin ambigüedad.
+    """
+    return f"{monto:f}".replace(".", ",")
+
+
+def normalizar_ruta(path: str) -> str:
+    """
+    Devuelve la forma canónica de una ruta de cuenta: sin tildes, en minúsculas
+    y con los espacios colapsados en cada segmento.
+    """
+    partes = []
+    for parte in path.split("."):
+        sin_tildes = "".join(
+            c
+            for c in unicodedata.normalize("NFKD", parte)
+            if not unicodedata.combining(c)
+        )
+        partes.append(" ".join(sin_tildes.split()).casefold())
+    return ".".join(partes)
+
+
+class IndiceCuentas:
+    """
+    Índice de cuentas construido en una sola pasada sobre el árbol.
+    Mapea la ruta completa (nombres separados por puntos) y su forma normalizada
+    a la cuenta correspondiente, de modo que cada búsqueda es O(1).
+    Una ruta que no está en el índice lo reconstruye a lo sumo una vez hasta la
+    próxima invalidación: después, las rutas inexistentes se responden sin
+    recorrer el árbol. Los renombres y movimientos no se detectan en cada
+    búsqueda: quien los hace llama a invalidar_indice_cuentas, que avanza la
+    generación de cuentas, y un índice de una generación anterior se
+    reconstruye en su próxima consulta.
+    """
+
+    # Marca para rutas normalizadas que corresponden a más de una cuenta.
+    _AMBIGUA = object()
+
+    def __init__(self, root_account):
+        self.root_account = root_account
+        self._por_ruta = None
+        self._por_ruta_normalizada = None
+        # Generación de cuentas con la que se construyó el índice.
+        self._generacion = None
+        # True si el índice ya se reconstruyó por una ruta ausente.
+        self._revisado = False
+
+    @medir("indice_cuentas")
+    def construir(self):
+        """Recorre el árbol una única vez y llena los diccionarios del índice."""
+        por_ruta = {}
+        por_ruta_normalizada = {}
+        pendientes = [
+            (child, child.GetName()) for child in self.root_account.get_children()
+        ]
+        while pendientes:
+            cuenta, ruta = pendientes.pop()
+            por_ruta[ruta] = cuenta
+            clave = normalizar_ruta(ruta)
+            if por_ruta_normalizada.get(clave, cuenta) is not cuenta:
+                por_ruta_normalizada[clave] = self._AMBIGUA
+            else:
+                por_ruta_normalizada[clave] = cuenta
+            for child in cuenta.get_children():
+                pendientes.append((child, f"{ruta}.{child.GetName()}"))
+        self._por_ruta = por_ruta
+        self._por_ruta_normalizada = por_ruta_normalizada
+        self._generacion = _generacion_cuentas
+        contar("cuentas_recorridas", len(por_ruta))
+
+    def invalidar(self):
+        """Descarta el índice; se reconstruye en la próxima búsqueda."""
+        self._por_ruta = None
+        self._por_ruta_normalizada = None
+        self._revisado = False
+
+    def _asegurar(self):
+        """Construye el índice si falta o si es de una generación anterior."""
+        if self._por_ruta is None or self._generacion != _generacion_cuentas:
+            self.construir()
+            self._revisado = False
+
+    def rutas(self):
+        """Devuelve todas las rutas completas indexadas."""
+        self._asegurar()
+        return list(self._por_ruta)
+
+    def _consultar(self, path: str):
+        """Devuelve la cuenta indexada para 'path', exacta o normalizada, o None."""
+        cuenta = self._por_ruta.get(path)
+        if cuenta is None:
+            cuenta = self._por_ruta_normalizada.get(normalizar_ruta(path))
+            if cuenta is self._AMBIGUA:
+                return None
+        return cuenta
+
+    def buscar(self, path: str, reconstruir=True):
+        """
+        Busca una cuenta por su ruta completa, exacta o normalizada.
+        Si no la encuentra reconstruye el índice una vez por invalidación, para
+        contemplar cuentas agregadas. Con 'reconstruir' en False nunca lo
+        reconstruye por una ruta ausente.
+        """
+        self._asegurar()
+        cuenta = self._consultar(path)
+        if cuenta is None and reconstruir and not self._revisado:
+            self.construir()
+            self._revisado = True
+            cuenta = self._consultar(path)
+        return cuenta
+
+
+def ruta_de_cuenta(account) -> str:
+    """Ruta completa de una cuenta, con nombres separados por puntos."""
+    partes = []
+    while account is not None and not account.is_root():
+        partes.append(account.GetName())
+        account = account.get_parent()
+    return ".".join(reversed(partes))
+
+
+# Índices por libro, reutilizados por todas las búsquedas de la sesión.
+_indices_cuentas = {}
+
+# Generación del árbol de cuentas: avanza con cada invalidación, de modo que
+# también quedan viejos los índices que alguien conserve fuera de este módulo.
+_generacion_cuentas = 0
+
+
+def _clave_libro(root_account):
+    return root_account.GetGUID().to_string()
+
+
+def get_indice_cuentas(root_account) -> IndiceCuentas:
+    """Devuelve el índice de cuentas del libro, creándolo si hace falta."""
+    clave = _clave_libro(root_account)
+    indice = _indices_cuentas.get(clave)
+    if indice is None:
+        indice = IndiceCuentas(root_account)
+        _indices_cuentas[clave] = indice
+    return indice
+
+
+def invalidar_indice_cuentas(root_account=None):
+    """
+    Invalida el índice de un libro. Debe llamarse después de agregar,
+    renombrar o mover cuentas. Sin argumentos descarta todos los índices, lo
+    que corresponde al cerrar una sesión: sus cuentas dejan de ser válidas.
+    """
+    global _generacion_cuentas
+    _generacion_cuentas += 1
+    if root_account is None:
+        _indices_cuentas.clear()
+        return
+    indice = _indices_cuentas.get(_clave_libro(root_account))
+    if indice is not None:
+        indice.invalidar()
 
 
 def find_account_by_path(root_account, path: str):
     """
-    Busca una cuenta navegando manualmente a través del árbol de cuentas.
-    'path' debe ser una cadena con nombres separados por puntos.
-    """
-    current_account = root_account
-    for part in path.split("."):
-        found_child = None
-        for child in current_account.get_children():
-            if child.GetName() == part:
-                found_child = child
-                break
-        if found_child:
-            current_account = found_child
-        else:
-            return None
-    return current_account
+    Busca una cuenta por su ruta completa usando el índice del libro.
+    'path' debe ser una cadena con nombres separados por puntos; también se
+    aceptan variantes sin tildes o con distinto uso de mayúsculas.
+    """
+    return get_indice_cuentas(root_account).buscar(path)
@@ -0,0 +1,191 @@
+# huellas.py
+
+"""
+Índice persistente de huellas de transacciones, para detectar duplicados.
+Se guarda en un archivo SQLite junto al libro y se mantiene de forma
+incremental: cada transacción registrada por este proyecto agrega su huella.
+Solo hace falta recorrer el libro completo al reconstruirlo.
+
+- Las transacciones con id externo (por ejemplo "mp:<id>") se deduplican por
+  ese id, que también se guarda en el campo "Num" de la transacción. Todos
+  los ids tienen la forma "prefijo:resto"; al reconstruir el índice solo se
+  toman como id los Num con esa forma, así que un número de cheque o una
+  referencia manual ("1", "2", ...) no se confunde con un id importado.
+- Las demás se deduplican por su huella: fecha + (cuenta, monto) de cada split.
+  El índice cuenta cuántas transacciones del libro tienen cada huella, así
+  que dos compras idénticas del mismo día se distinguen por su número de
+  repetición dentro del lote (ver importador.importar).
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from urllib.parse import unquote, urlparse
+
+import config
+from dinero import Monto
+
+# Forma de los ids externos que escribe este proyecto: "prefijo:resto".
+PATRON_ID_EXTERNO = re.compile(r"[\w.-]+:\S")
+
+
+def ruta_libro(uri=None) -> str:
+    """Ruta en disco del libro a partir de su URI (file://, xml://, sqlite3://)."""
+    return unquote(urlparse(uri or config.FILE_URI).path)
+
+
+def marca_libro(uri=None):
+    """Fecha de modificación del archivo del libro, o None si no existe."""
+    try:
+        return str(os.stat(ruta_libro(uri)).st_mtime_ns)
+    except OSError:
+        return None
+
+
+def ruta_sidecar(sufijo: str, uri=None) -> str:
+    """Ruta de un archivo auxiliar guardado junto al libro."""
+    return f"{ruta_libro(uri)}.{sufijo}"
+
+
+def calcular_huella(fecha, splits) -> str:
+    """
+    Huella de una transacción: fecha y pares (GUID de cuenta, monto en centavos),
+    ordenados para que no dependa del orden de los splits.
+    'splits' es una lista de pares (cuenta, Monto).
+    """
+    partes = sorted(
+        f"{cuenta.GetGUID().to_string()}:{monto.centavos()}" for cuenta, monto in splits
+    )
+    texto = f"{fecha.strftime('%Y-%m-%d')}|{'|'.join(partes)}"
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def id_externo_de_num(num):
+    """Id externo guardado en el Num de una transacción, o None si no tiene."""
+    if num and PATRON_ID_EXTERNO.match(num):
+        return num
+    return None
+
+
+def huella_de_transaccion(tx) -> str:
+    """Calcula la huella de una transacción ya registrada en el libro."""
+    splits = [
+        (split.GetAccount(), Monto.de_gnc(split.GetValue()))
+        for split in tx.GetSplitList()
+    ]
+    return calcular_huella(tx.GetDate(), splits)
+
+
+def transacciones_del_libro(root_account):
+    """Genera cada transacción del libro una única vez, recorriendo sus cuentas."""
+    vistas = set()
+    pendientes = list(root_account.get_children())
+    while pendientes:
+        cuenta = pendientes.pop()
+        pendientes.extend(cuenta.get_children())
+        for split in cuenta.GetSplitList():
+            tx = split.GetParent()
+            guid = tx.GetGUID().to_string()
+            if guid not in vistas:
+                vistas.add(guid)
+                yield tx
+
+
+class IndiceHuellas:
+    """Índice en SQLite de huellas e ids externos ya registrados."""
+
+    # Versión del esquema; un índice anterior se descarta y se reconstruye.
+    VERSION = 2
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_sidecar("huellas.sqlite")
+        self.conexion = sqlite3.connect(self.ruta)
+        (version,) = self.conexion.execute("PRAGMA user_version").fetchone()
+        self.desactualizado = version != self.VERSION
+        if self.desactualizado:
+            self.conexion.executescript(
+                f"""
+                DROP TABLE IF EXISTS huellas;
+                DROP TABLE IF EXISTS externos;
+                PRAGMA user_version = {self.VERSION};
+                """
+            )
+        self.conexion.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS huellas (
+                huella TEXT NOT NULL,
+                tx_guid TEXT NOT NULL,
+                PRIMARY KEY (huella, tx_guid)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS externos (
+                id_externo TEXT PRIMARY KEY,
+                tx_guid TEXT NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def existe(self, huella=None, id_externo=None, repeticion=1) -> bool:
+        """
+        Indica si la transacción ya fue registrada. Si tiene id externo se
+        decide solo por él; si no, por la huella: la 'repeticion'-ésima
+        transacción idéntica de un lote ya existe si el libro tiene al menos
+        esa cantidad de transacciones con la misma huella.
+        """
+        if id_externo:
+            return (
+                self.conexion.execute(
+                    "SELECT 1 FROM externos WHERE id_externo = ?", (id_externo,)
+                ).fetchone()
+                is not None
+            )
+        (cantidad,) = self.conexion.execute(
+            "SELECT COUNT(*) FROM huellas WHERE huella = ?", (huella,)
+        ).fetchone()
+        return cantidad >= repeticion
+
+    def registrar(self, huella, tx_guid, id_externo=None):
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO huellas VALUES (?, ?)", (huella, tx_guid)
+        )
+        if id_externo:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO externos VALUES (?, ?)", (id_externo, tx_guid)
+            )
+
+    def registrar_transaccion(self, tx):
+        """Agrega al índice una transacción del libro."""
+        self.registrar(
+            huella_de_transaccion(tx),
+            tx.GetGUID().to_string(),
+            id_externo_de_num(tx.GetNum()),
+        )
+
+    def reconstruir(self, root_account) -> int:
+        """Vacía el índice y lo vuelve a llenar recorriendo todo el libro."""
+        self.conexion.execute("DELETE FROM huellas")
+        self.conexion.execute("DELETE FROM externos")
+        cantidad = 0
+        for tx in transacciones_del_libro(root_account):
+            self.registrar_transaccion(tx)
+            cantidad += 1
+        self.conexion.commit()
+        return cantidad
+
+    def confirmar(self):
+        """Persiste los cambios. Debe llamarse después de guardar el libro."""
+        self.conexion.commit()
+
+    def cerrar(self):
+        self.conexion.close()
+
+    @classmethod
+    def abrir(cls, root_account, ruta=None):
+        """
+        Abre el índice del libro, construyéndolo si todavía no existe o si
+        tiene un esquema anterior.
+        """
+        indice = cls(ruta or ruta_sidecar("huellas.sqlite"))
+        if indice.desactualizado:
+            indice.reconstruir(root_account)
+        return indice
@@ -0,0 +1,280 @@
+# importador.py
+
+"""
+Motor de importación masiva de transacciones.
+Lee especificaciones desde CSV o JSONL y las registra todas dentro de una
+única sesión, guardando al final o cada N transacciones. Las filas con
+errores se escriben en un archivo de rechazos en lugar de abortar el lote.
+
+Formatos aceptados:
+- JSONL: una transacción por línea, por ejemplo
+  {"fecha": "12/03/2025", "descripcion": "Super", "id_externo": "123",
+   "splits": [{"cuenta": "activo_mp", "monto": "-1500,50"},
+              {"cuenta": "gasto_alimentos", "monto": "1500,50"}]}
+  Los splits de cuentas en otra moneda pueden llevar además "cantidad", el
+  importe en la moneda de la cuenta ("monto" es siempre el valor en la moneda
+  de la transacción); si falta, se calcula con la cotización del día.
+- CSV: columnas fecha, descripcion, monto, origen, destino (y opcionalmente
+  id_externo); cada fila genera una transacción de dos splits, igual que
+  transaction.py.
+Un id externo sin prefijo ("123") se guarda como "lote:123", con la forma
+"prefijo:resto" que huellas.py reconoce al reconstruir el índice.
+Los montos en texto se leen con el formato indicado ("es-AR" 1.234,56 o "en"
+1,234.56) y se convierten a Monto de a bloques, sin construir un Decimal por
+valor; el registro lleva ese Monto, así que no se vuelven a interpretar al
+registrarlo.
+Las cuentas pueden indicarse con una clave de config.CUENTAS o con la ruta
+completa. Las transacciones ya registradas se omiten (ver huellas.py), de modo
+que un lote interrumpido se puede reimportar completo. Las filas sin id
+externo que se repiten dentro del lote (dos compras idénticas del mismo día)
+llevan su número de repetición, así que solo se omiten las que el libro ya
+tiene tantas veces como aparecen.
+"""
+
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+
+from dinero import Monto
+from gnucash_utils import (
+    LOCALE_PREDETERMINADO,
+    parse_centavos,
+    parse_decimal,
+)
+from huellas import id_externo_de_num
+
+# Cantidad de registros cuyos montos se convierten juntos.
+TAMANO_BLOQUE = 5000
+
+
+def parse_fecha(fecha_str: str) -> datetime:
+    """Acepta fechas DD/MM/AAAA o AAAA-MM-DD."""
+    fecha_str = fecha_str.strip()
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(fecha_str, formato)
+        except ValueError:
+            continue
+    raise ValueError(
+        f"El formato de fecha '{fecha_str}' no es válido. Usa DD/MM/AAAA."
+    )
+
+
+def parse_monto(valor) -> Monto:
+    if isinstance(valor, str):
+        return Monto.de_texto(valor)
+    if isinstance(valor, Monto):
+        return valor
+    return Monto.de_decimal(Decimal(str(valor)))
+
+
+def parse_cantidad(valor) -> Monto:
+    """
+    Como parse_monto, pero conserva todos los decimales escritos: las
+    cantidades de títulos o cuotapartes pueden tener más de dos.
+    """
+    if isinstance(valor, str):
+        _, coma, decimales = valor.strip().rpartition(",")
+        fraccion = 10 ** len(decimales) if coma else 1
+        return Monto.de_texto(valor, fraccion=max(fraccion, 100))
+    if isinstance(valor, (int, float)):
+        numero = Decimal(str(valor))
+        fraccion = 10 ** max(-numero.as_tuple().exponent, 0)
+        return Monto.de_decimal(numero, max(fraccion, 100))
+    return parse_monto(valor)
+
+
+def _leer_registros(ruta: str):
+    with open(ruta, encoding="utf-8", newline="") as f:
+        if ruta.lower().endswith(".csv"):
+            lector = csv.DictReader(f)
+            for registro in lector:
+                yield lector.line_num, registro
+            return
+        for numero, linea in enumerate(f, start=1):
+            if not linea.strip():
+                continue
+            try:
+                yield numero, json.loads(linea)
+            except json.JSONDecodeError:
+                yield numero, linea.rstrip("\n")
+
+
+def _montos_en_texto(registro, campo="monto"):
+    """Diccionarios del registro (él mismo o sus splits) con 'campo' en texto."""
+    if not isinstance(registro, dict):
+        return []
+    contenedores = registro.get("splits") if "splits" in registro else [registro]
+    if not isinstance(contenedores, list):
+        return []
+    return [
+        contenedor
+        for contenedor in contenedores
+        if isinstance(contenedor, dict) and isinstance(contenedor.get(campo), str)
+    ]
+
+
+def _cantidad_leida(texto, locale):
+    """Cantidad como Monto con todos sus decimales (o None si no es válida)."""
+    try:
+        valor = parse_decimal(texto, locale)
+    except ValueError:
+        return None
+    return Monto.de_decimal(valor, 10 ** max(-valor.as_tuple().exponent, 2))
+
+
+def canonizar_montos(pares, locale=LOCALE_PREDETERMINADO):
+    """
+    Reemplaza los montos en texto de cada registro por Monto, convirtiendo la
+    columna de montos de cada bloque con una sola llamada a parse_centavos.
+    Los montos inválidos quedan como estaban, para que el registro se rechace
+    con su error al importarlo.
+    Las cantidades (pocas, y con más decimales que un monto) se convierten
+    una por una.
+    """
+    pares = iter(pares)
+    while True:
+        bloque = list(islice(pares, TAMANO_BLOQUE))
+        if not bloque:
+            return
+        contenedores = [c for _, registro in bloque for c in _montos_en_texto(registro)]
+        centavos = parse_centavos(
+            [c["monto"] for c in contenedores], locale, estricto=False
+        )
+        for contenedor, valor in zip(contenedores, centavos):
+            if valor is not None:
+                contenedor["monto"] = Monto(valor)
+        for _, registro in bloque:
+            for contenedor in _montos_en_texto(registro, "cantidad"):
+                cantidad = _cantidad_leida(contenedor["cantidad"], locale)
+                if cantidad is not None:
+                    contenedor["cantidad"] = cantidad
+        yield from bloque
+
+
+def leer_especificaciones(ruta: str, locale=LOCALE_PREDETERMINADO):
+    """
+    Genera pares (número de línea, registro) a partir de un archivo CSV o JSONL,
+    con los montos ya convertidos a Monto.
+    Las líneas JSON inválidas se entregan como texto para que el importador
+    las rechace sin cortar la lectura.
+    """
+    return canonizar_montos(_leer_registros(ruta), locale)
+
+
+def normalizar_especificacion(registro) -> dict:
+    """
+    Convierte un registro leído (JSONL o fila CSV) a una especificación con
+    fecha datetime, descripción, id externo, splits [(referencia, Monto)] y
+    sus "cantidades" (Monto en la moneda de la cuenta, o None).
+    """
+    if not isinstance(registro, dict):
+        raise ValueError("La línea no es un objeto JSON válido.")
+    if "splits" in registro:
+        splits = [
+            (split["cuenta"], parse_monto(split["monto"]))
+            for split in registro["splits"]
+        ]
+        cantidades = [
+            parse_cantidad(split["cantidad"]) if split.get("cantidad") else None
+            for split in registro["splits"]
+        ]
+    else:
+        monto = parse_monto(registro["monto"])
+        splits = [(registro["origen"], -monto), (registro["destino"], monto)]
+        cantidades = [None, None]
+    if len(splits) < 2:
+        raise ValueError("La transacción necesita al menos dos splits.")
+    return {
+        "fecha": parse_fecha(registro["fecha"]),
+        "descripcion": registro.get("descripcion", ""),
+        "id_externo": normalizar_id_externo(registro.get("id_externo")),
+        "splits": splits,
+        "cantidades": cantidades,
+        "repeticion": int(registro.get("repeticion", 1)),
+    }
+
+
+def normalizar_id_externo(id_externo):
+    """Id externo con prefijo: los que no lo tienen pasan a "lote:<id>"."""
+    if not id_externo:
+        return None
+    id_externo = str(id_externo)
+    if id_externo_de_num(id_externo):
+        return id_externo
+    return f"lote:{id_externo}"
+
+
+# Errores de una transacción que la rechazan sin interrumpir el lote.
+ERRORES_REGISTRO = (ValueError, KeyError, TypeError, ArithmeticError)
+
+
+def escribir_rechazo(rechazos, linea, registro, error):
+    """Escribe en 'rechazos' la línea JSON de una transacción rechazada."""
+    if isinstance(error, KeyError):
+        error = f"Falta el campo {error}"
+    rechazos.write(
+        json.dumps(
+            {"linea": linea, "registro": registro, "error": str(error)},
+            ensure_ascii=False,
+            default=str,
+        )
+        + "\n"
+    )
+
+
+def _contenido_sin_id(registro):
+    """
+    Texto con el contenido que define la huella de un registro sin id
+    externo, para contar sus repeticiones en el lote; None si tiene id.
+    """
+    if not isinstance(registro, dict) or registro.get("id_externo"):
+        return None
+    campos = ("fecha", "splits", "monto", "origen", "destino")
+    return json.dumps(
+        [registro.get(campo) for campo in campos], sort_keys=True, default=str
+    )
+
+
+def importar(libro, registros, rechazos, guardar_cada=0, deduplicar=True):
+    """
+    Registra todas las transacciones de 'registros', un iterable de pares
+    (línea, registro) como los que entrega leer_especificaciones, a través de
+    'libro' (un ServicioLibro o el cliente del demonio).
+    Cada fila con errores se escribe como línea JSON en 'rechazos' (un archivo
+    abierto) y el lote continúa. Si 'guardar_cada' es mayor que cero se guarda
+    el libro cada esa cantidad de transacciones registradas.
+    Con 'deduplicar' se omiten las transacciones ya registradas; una fila sin
+    id externo que aparece k veces en el lote se omite solo si el libro ya
+    tiene k transacciones con su huella.
+    Si 'libro' es la cola local (cola.py) las transacciones se cuentan como
+    "encoladas": se registran después, al vaciarla.
+    Devuelve un diccionario con los contadores del lote.
+    """
+    resumen = {"registradas": 0, "rechazadas": 0, "duplicadas": 0, "encoladas": 0}
+    repeticiones = Counter()
+
+    for linea, registro in registros:
+        contenido = _contenido_sin_id(registro)
+        if contenido is not None:
+            repeticiones[contenido] += 1
+            if repeticiones[contenido] > 1:
+                registro = {**registro, "repeticion": repeticiones[contenido]}
+        try:
+            resultado = libro.publicar(registro, forzar=not deduplicar)
+        except ERRORES_REGISTRO as e:
+            resumen["rechazadas"] += 1
+            escribir_rechazo(rechazos, linea, registro, e)
+            continue
+
+        if resultado["estado"] in ("duplicada", "encolada"):
+            resumen[f"{resultado['estado']}s"] += 1
+            continue
+        resumen["registradas"] += 1
+        if guardar_cada > 0 and resumen["registradas"] % guardar_cada == 0:
+            libro.guardar()
+
+    return resumen
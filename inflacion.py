@@ -0,0 +1,141 @@
+# inflacion.py
+
+"""
+Importes en pesos constantes con el índice de precios al consumidor mensual
+(config.INFLACION).
+Cada split se lleva a pesos del mes base multiplicándolo por IPC(base) /
+IPC(mes del split). El índice se guarda como un array con un valor por mes
+consecutivo, así que el factor de todos los splits sale de una resta de meses
+y una indexación, sin buscar nada split por split.
+Los datos son los de la exportación columnar (exportar.cargar), y las tablas
+por categoría reutilizan exportar.resumir_por_categoria con los importes ya
+deflactados.
+"""
+
+from datetime import date
+
+import numpy as np
+
+import config
+from cotizaciones import leer_series
+from exportar import factorizar, resumir_por_categoria
+
+
+class IndicePrecios:
+    """Serie mensual del IPC, sin meses faltantes."""
+
+    def __init__(self, filas):
+        """'filas' es [(ordinal, valor)], como las de cotizaciones.leer_series."""
+        if not filas:
+            raise ValueError("La serie del IPC está vacía.")
+        por_mes = {}
+        for ordinal, valor in sorted(filas):
+            por_mes[date.fromordinal(ordinal).strftime("%Y-%m")] = valor
+        meses = np.array(list(por_mes), dtype="datetime64[M]")
+        faltantes = np.flatnonzero(np.diff(meses).astype(np.int64) != 1)
+        if len(faltantes):
+            raise ValueError(
+                f"Al IPC le faltan meses después de {meses[faltantes[0]]}."
+            )
+        self.primero = meses[0]
+        self.ultimo = meses[-1]
+        self.valores = np.array(list(por_mes.values()), dtype=np.float64)
+
+    @classmethod
+    def de_archivo(cls, ruta=None, serie=None):
+        opciones = config.INFLACION
+        serie = serie or opciones["serie"]
+        series = leer_series(
+            ruta or opciones["archivo"],
+            opciones.get("locale"),
+            opciones.get("separador"),
+        )
+        if serie not in series:
+            raise ValueError(f"El archivo del IPC no tiene la serie '{serie}'.")
+        return cls(series[serie])
+
+    def _posiciones(self, meses):
+        """Posición de cada mes en la serie; los posteriores usan el último."""
+        posiciones = (meses - self.primero).astype(np.int64)
+        if len(posiciones) and posiciones.min() < 0:
+            raise ValueError(f"El IPC empieza en {self.primero}: faltan meses previos.")
+        return np.minimum(posiciones, len(self.valores) - 1)
+
+    def factores(self, fechas, base=None):
+        """
+        Factor de cada fecha para llevar un importe a pesos del mes 'base'
+        (AAAA-MM; por defecto el último del índice). Los meses posteriores al
+        último publicado usan el último valor.
+        """
+        meses = np.asarray(fechas).astype("datetime64[M]")
+        base = np.datetime64(base, "M") if base else self.ultimo
+        valor_base = self.valores[self._posiciones(np.array([base]))[0]]
+        return valor_base / self.valores[self._posiciones(meses)]
+
+    def deflactar(self, fechas, centavos, base=None):
+        """Centavos en pesos constantes del mes 'base', como int64."""
+        reales = np.asarray(centavos, dtype=np.int64) * self.factores(fechas, base)
+        return np.rint(reales).astype(np.int64)
+
+    def sin_publicar(self, fechas) -> int:
+        """Cuántas fechas caen después del último mes publicado."""
+        return int((np.asarray(fechas).astype("datetime64[M]") > self.ultimo).sum())
+
+
+def en_moneda_principal(datos) -> dict:
+    """Filas de la exportación con transacciones en MONEDA_PRINCIPAL."""
+    seleccion = datos["moneda"] == config.MONEDA_PRINCIPAL
+    return {columna: valores[seleccion] for columna, valores in datos.items()}
+
+
+def resumen_real(datos, indice, raiz="Gastos", nivel=1, base=None):
+    """
+    Como exportar.resumir_por_categoria, con los centavos en pesos del mes
+    'base': (categorías, meses AAAA-MM, matriz categoría × mes).
+    """
+    reales = indice.deflactar(datos["fecha"], datos["centavos"], base)
+    return resumir_por_categoria({**datos, "centavos": reales}, raiz, nivel)
+
+
+def _en_subarbol(unicas, raiz):
+    """Máscara de las rutas distintas que son 'raiz' o están debajo."""
+    return np.array(
+        [r == raiz or r.startswith(f"{raiz}.") for r in unicas.tolist()], dtype=bool
+    )
+
+
+def sueldo_contra_gastos(datos, indice, sueldo=None, gastos=None, base=None):
+    """
+    Sueldo cobrado y gastos de cada mes en pesos del mes 'base'. Devuelve
+    (meses AAAA-MM, sueldo, gastos), con los importes como arrays int64 de
+    centavos en positivo.
+    """
+    sueldo = sueldo or config.INFLACION["sueldo"]
+    gastos = gastos or config.INFLACION["gastos"]
+    sueldo = config.CUENTAS.get(sueldo, sueldo)
+    gastos = config.CUENTAS.get(gastos, gastos)
+    unicas, indice_ruta = factorizar(datos["ruta"])
+    es_sueldo = _en_subarbol(unicas, sueldo)[indice_ruta]
+    es_gasto = _en_subarbol(unicas, gastos)[indice_ruta]
+    seleccion = es_sueldo | es_gasto
+    fechas = datos["fecha"][seleccion]
+    reales = indice.deflactar(fechas, datos["centavos"][seleccion], base)
+    if not len(fechas):
+        return np.array([], dtype=str), np.zeros(0, np.int64), np.zeros(0, np.int64)
+
+    meses_split = fechas.astype("datetime64[M]")
+    primero = meses_split.min()
+    posicion = (meses_split - primero).astype(np.int64)
+    cantidad = posicion.max() + 1
+    es_sueldo = es_sueldo[seleccion]
+
+    def sumar(mascara):
+        # bincount suma en float64; los centavos entran exactos hasta 2**53.
+        suma = np.bincount(
+            posicion[mascara], weights=reales[mascara], minlength=cantidad
+        )
+        return np.rint(suma).astype(np.int64)
+
+    meses = np.arange(primero, primero + cantidad, dtype="datetime64[M]")
+    # El sueldo se acredita en el haber de la cuenta de ingresos.
+    return meses.astype(str), -sumar(es_sueldo), sumar(~es_sueldo)
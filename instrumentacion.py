@@ -0,0 +1,118 @@
+# instrumentacion.py
+
+"""
+Mediciones de tiempo y contadores de cada ejecución de los scripts.
+- medir("fase") es un context manager (y también decorador) que acumula
+  cuánto tarda cada fase: abrir la sesión, armar el índice de cuentas,
+  registrar, guardar, etc.
+- contar("nombre", n) suma a un contador: cuentas recorridas, splits creados,
+  bytes guardados...
+- ejecutar_script(main) corre el main de un script y al terminar agrega una
+  línea JSON con todo lo medido a <libro>.metricas.jsonl (o a la ruta de la
+  variable de entorno EXPENSES_METRICAS). Con --profile en la línea de
+  comandos además guarda la salida de cProfile y muestra las funciones más
+  costosas.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+_fases = {}
+_contadores = {}
+
+
+@contextmanager
+def medir(fase):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos, veces = _fases.get(fase, (0.0, 0))
+        _fases[fase] = (segundos + time.perf_counter() - inicio, veces + 1)
+
+
+def contar(nombre, cantidad=1):
+    _contadores[nombre] = _contadores.get(nombre, 0) + cantidad
+
+
+def reiniciar():
+    _fases.clear()
+    _contadores.clear()
+
+
+def resumen() -> dict:
+    return {
+        "fases": {
+            fase: {"segundos": round(segundos, 6), "veces": veces}
+            for fase, (segundos, veces) in _fases.items()
+        },
+        "contadores": dict(_contadores),
+    }
+
+
+def ruta_metricas() -> str:
+    if os.environ.get("EXPENSES_METRICAS"):
+        return os.environ["EXPENSES_METRICAS"]
+    from huellas import ruta_sidecar
+
+    return ruta_sidecar("metricas.jsonl")
+
+
+def _escribir(registro):
+    try:
+        with open(ruta_metricas(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"\033[93mNo se pudieron guardar las métricas: {e}\033[0m")
+
+
+def _mostrar_perfil(perfil, ruta, cantidad=25):
+    import io
+    import pstats
+
+    salida = io.StringIO()
+    estadisticas = pstats.Stats(perfil, stream=salida)
+    estadisticas.sort_stats("cumulative").print_stats(cantidad)
+    print(f"\n\033[94m--- PERFIL (guardado en '{ruta}') ---\033[0m", file=sys.stderr)
+    print(salida.getvalue(), file=sys.stderr)
+
+
+def ejecutar_script(main, nombre=None, *args, **kwargs):
+    """
+    Corre main(*args, **kwargs) registrando sus métricas. Si la línea de
+    comandos incluye --profile, se quita antes de que el script la lea y la
+    ejecución se hace bajo cProfile.
+    """
+    nombre = nombre or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    perfilar = "--profile" in sys.argv
+    if perfilar:
+        sys.argv.remove("--profile")
+    perfil = None
+    if perfilar:
+        # Solo se importa si se pide: cargar el perfilador también cuesta.
+        import cProfile
+
+        perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    fecha = datetime.now().isoformat(timespec="seconds")
+    try:
+        if perfil is not None:
+            return perfil.runcall(main, *args, **kwargs)
+        return main(*args, **kwargs)
+    finally:
+        registro = {
+            "fecha": fecha,
+            "script": nombre,
+            "segundos": round(time.perf_counter() - inicio, 6),
+            **resumen(),
+        }
+        if perfil is not None:
+            ruta = f"{nombre}-{datetime.now():%Y%m%d-%H%M%S}.prof"
+            perfil.dump_stats(ruta)
+            registro["perfil"] = os.path.abspath(ruta)
+            _mostrar_perfil(perfil, ruta)
+        _escribir(registro)
@@ -0,0 +1,181 @@
+# libro.py
+
+"""
+Utilidades compartidas para trabajar con el libro de GnuCash:
+abrir la sesión, resolver cuentas y registrar transacciones.
+"""
+
+import os
+from contextlib import contextmanager
+
+import gnucash
+from gnucash import GncNumeric
+from gnucash.gnucash_core import SessionOpenMode
+from gnucash.gnucash_core_c import (
+    ACCT_TYPE_STOCK,
+    ERR_BACKEND_CANT_CONNECT,
+    ERR_BACKEND_LOCKED,
+    string_to_guid,
+)
+
+import config
+from gnucash_utils import find_account_by_path, invalidar_indice_cuentas
+from huellas import ruta_libro
+from instrumentacion import contar, medir
+
+
+# Esquemas de URI cuyos backends escriben cada cambio al confirmarlo.
+BACKENDS_SQL = ("sqlite3", "mysql", "postgres")
+
+
+def es_backend_sql(uri=None) -> bool:
+    return (uri or config.FILE_URI).split("://", 1)[0] in BACKENDS_SQL
+
+
+def guardar_sesion(session, uri=None):
+    """
+    Guarda el libro. Con un backend SQL los cambios ya quedaron escritos fila
+    por fila al confirmar cada transacción, y session.save() reescribiría la
+    base completa, así que no se llama.
+    """
+    if es_backend_sql(uri):
+        return
+    with medir("guardar"):
+        session.save()
+    try:
+        contar("bytes_guardados", os.path.getsize(ruta_libro(uri)))
+    except OSError:
+        pass
+
+
+@contextmanager
+def abrir_sesion(uri=None, mode=SessionOpenMode.SESSION_NORMAL_OPEN):
+    """
+    Abre el libro y entrega la sesión. Al salir sin errores guarda el libro
+    (salvo que se haya abierto en solo lectura); en cualquier caso cierra la
+    sesión.
+    """
+    uri = uri or config.FILE_URI
+    with medir("abrir_sesion"):
+        session = gnucash.Session(uri, mode=mode)
+    try:
+        yield session
+        if mode != SessionOpenMode.SESSION_READ_ONLY:
+            guardar_sesion(session, uri)
+    finally:
+        with medir("cerrar_sesion"):
+            session.end()
+        invalidar_indice_cuentas()
+
+
+def libro_no_disponible(error) -> bool:
+    """
+    True si 'error' (de abrir la sesión) indica que el libro está bloqueado
+    por otro programa, como GnuCash abierto, o que no se puede conectar con
+    su base de datos.
+    """
+    return isinstance(error, gnucash.GnuCashBackendException) and any(
+        codigo in (ERR_BACKEND_LOCKED, ERR_BACKEND_CANT_CONNECT)
+        for codigo in error.errors
+    )
+
+
+def resolver_cuenta(root_account, referencia: str):
+    """
+    Devuelve la cuenta indicada por una clave de config.CUENTAS
+    o por su ruta completa. Lanza ValueError si no existe.
+    """
+    path = config.CUENTAS.get(referencia, referencia)
+    cuenta = find_account_by_path(root_account, path)
+    if not cuenta:
+        raise ValueError(f"La cuenta '{referencia}' no fue encontrada.")
+    return cuenta
+
+
+def cuenta_por_guid(book, guid_texto: str):
+    """Cuenta con ese GUID (en texto), o None si ya no existe en el libro."""
+    guid = gnucash.GUID()
+    if not string_to_guid(guid_texto, guid.get_instance()):
+        return None
+    return guid.AccountLookup(book)
+
+
+def crear_cuenta_titulo(book, padre, especie: str):
+    """
+    Crea bajo 'padre' (una cuenta de broker) la cuenta de acciones del título
+    'especie', con su commodity en el espacio config.CARTERA["espacio"]; el
+    commodity se agrega a la tabla del libro si todavía no existe.
+    """
+    espacio = config.CARTERA["espacio"]
+    tabla = book.get_table()
+    commodity = tabla.lookup(espacio, especie)
+    if commodity is None:
+        commodity = gnucash.GncCommodity(
+            book, especie, espacio, especie, "", config.CARTERA["fraccion"]
+        )
+        commodity = tabla.insert(commodity)
+    cuenta = gnucash.Account(book)
+    cuenta.BeginEdit()
+    cuenta.SetName(especie)
+    cuenta.SetType(ACCT_TYPE_STOCK)
+    cuenta.SetCommodity(commodity)
+    padre.append_child(cuenta)
+    cuenta.CommitEdit()
+    invalidar_indice_cuentas(book.get_root_account())
+    return cuenta
+
+
+def a_gnc_numeric(monto) -> GncNumeric:
+    """GncNumeric equivalente a un Monto, armado con numerador y denominador."""
+    return GncNumeric(monto.unidades, monto.fraccion)
+
+
+def crear_transaccion(book, fecha, descripcion, splits, currency=None, num=None):
+    """
+    Crea y confirma una transacción balanceada.
+    'splits' es una lista de pares (cuenta, Monto): positivos para débitos y
+    negativos para créditos. Los montos se llevan a la fracción de la moneda
+    de la transacción.
+    Las cuentas en otra moneda reciben ternas (cuenta, valor, cantidad): el
+    valor en la moneda de la transacción, que es lo que se balancea, y la
+    cantidad en la moneda de la cuenta.
+    """
+    if currency is None:
+        currency = book.get_table().lookup("ISO4217", config.MONEDA_PRINCIPAL)
+    fraccion = currency.get_fraction()
+    splits = [
+        (
+            cuenta,
+            monto.a_fraccion(fraccion),
+            cantidad[0].a_fraccion(cuenta.GetCommodity().get_fraction())
+            if cantidad and cantidad[0] is not None
+            else None,
+        )
+        for cuenta, monto, *cantidad in splits
+    ]
+    if sum(monto.unidades for _, monto, _ in splits) != 0:
+        raise ValueError("Los splits de la transacción no suman cero.")
+
+    tx = gnucash.Transaction(book)
+    tx.BeginEdit()
+    try:
+        tx.SetCurrency(currency)
+        tx.SetDate(fecha.day, fecha.month, fecha.year)
+        tx.SetDescription(descripcion)
+        if num:
+            tx.SetNum(num)
+        for cuenta, monto, cantidad in splits:
+            split = gnucash.Split(book)
+            split.SetParent(tx)
+            split.SetAccount(cuenta)
+            split.SetValue(a_gnc_numeric(monto))
+            if cantidad is not None:
+                split.SetAmount(a_gnc_numeric(cantidad))
+        tx.CommitEdit()
+        contar("transacciones_creadas")
+        contar("splits_creados", len(splits))
+    except Exception:
+        if tx.IsInEdit():
+            tx.RollbackEdit()
+        raise
+    return tx
@@ -0,0 +1,281 @@
+# nomina.py
+
+"""
+Motor de cálculo de sueldos.
+Compila una única vez config.DEDUCCIONES en un plan de deducciones (montos
+fijos en centavos y porcentajes como fracciones exactas) y calcula recibos en
+ambos sentidos: del bruto al neto, o del neto recibido al bruto.
+Todo el cálculo es con enteros, así que simular años de recibos o escenarios
+("¿y si el préstamo termina en marzo?") no toca el libro ni crea Decimals.
+
+Cada deducción de config.DEDUCCIONES puede indicar opcionalmente "desde" y
+"hasta" (AAAA-MM, inclusive) para limitar los meses en que se aplica.
+"""
+
+import csv
+from datetime import datetime
+from decimal import Decimal
+
+import config
+from dinero import Monto, dividir_redondeando
+from gnucash_utils import parse_centavos
+
+CUENTA_SUELDO = "ingreso_sueldo"
+CUENTA_AGUINALDO = "ingreso_aguinaldo"
+CUENTA_NETO = "banco_sueldo"
+
+# Margen (en centavos de bruto) alrededor de la estimación al buscar el bruto
+# que produce exactamente un neto dado.
+_MARGEN_BUSQUEDA = 3
+
+
+def _fraccion(valor):
+    """Numerador y denominador exactos de un valor de config (int, float o str)."""
+    return Decimal(str(valor)).as_integer_ratio()
+
+
+def calcular_aguinaldo(base: int) -> int:
+    """Aguinaldo bruto: PORCENTAJE_AGUINALDO del mejor sueldo bruto del semestre."""
+    numerador, denominador = _fraccion(config.PORCENTAJE_AGUINALDO)
+    return dividir_redondeando(base * numerador, denominador * 100)
+
+
+class PlanDeducciones:
+    """Deducciones de config.DEDUCCIONES compiladas para calcular rápido."""
+
+    def __init__(self, deducciones=None):
+        self.deducciones = []
+        for d in config.DEDUCCIONES if deducciones is None else deducciones:
+            if d["tipo"] not in ("fijo", "porcentaje"):
+                raise ValueError(
+                    f"La deducción '{d['nombre']}' tiene un tipo desconocido: "
+                    f"'{d['tipo']}'."
+                )
+            numerador, denominador = _fraccion(d["valor"])
+            compilada = {
+                "nombre": d["nombre"],
+                "cuenta": d["cuenta_destino"],
+                "tipo": d["tipo"],
+                "desde": d.get("desde"),
+                "hasta": d.get("hasta"),
+                "original": d,
+            }
+            if d["tipo"] == "fijo":
+                compilada["centavos"] = dividir_redondeando(
+                    numerador * 100, denominador
+                )
+            else:
+                # valor% del bruto = bruto * numerador / (denominador * 100)
+                compilada["numerador"] = numerador
+                compilada["denominador"] = denominador * 100
+            self.deducciones.append(compilada)
+        # Deducciones vigentes por período, calculadas una vez por período.
+        self._vigentes = {}
+
+    # --- Escenarios ---
+
+    def modificado(self, sin=(), cambios=None):
+        """
+        Devuelve un plan nuevo sin las deducciones de 'sin' (por nombre) y con
+        los campos de 'cambios' ({nombre: {campo: valor}}) reemplazados, por
+        ejemplo {"Descuento Prestamo": {"hasta": "2025-03"}}.
+        """
+        cambios = cambios or {}
+        conocidas = {d["nombre"] for d in self.deducciones}
+        for nombre in set(sin) | set(cambios):
+            if nombre not in conocidas:
+                raise ValueError(f"No existe la deducción '{nombre}'.")
+        return PlanDeducciones(
+            [
+                {**d["original"], **cambios.get(d["nombre"], {})}
+                for d in self.deducciones
+                if d["nombre"] not in sin
+            ]
+        )
+
+    # --- Cálculo ---
+
+    def vigentes(self, periodo=None):
+        """Deducciones que se aplican en el período AAAA-MM (todas si es None)."""
+        vigentes = self._vigentes.get(periodo)
+        if vigentes is None:
+            vigentes = self._vigentes[periodo] = [
+                d
+                for d in self.deducciones
+                if periodo is None
+                or (
+                    (d["desde"] is None or d["desde"] <= periodo)
+                    and (d["hasta"] is None or periodo <= d["hasta"])
+                )
+            ]
+        return vigentes
+
+    def deducir(self, bruto: int, periodo=None):
+        """Lista de (deducción, centavos) para un bruto total en centavos."""
+        resultado = []
+        for d in self.vigentes(periodo):
+            if d["tipo"] == "fijo":
+                resultado.append((d, d["centavos"]))
+            else:
+                resultado.append(
+                    (
+                        d,
+                        dividir_redondeando(bruto * d["numerador"], d["denominador"]),
+                    )
+                )
+        return resultado
+
+    def neto(self, bruto: int, periodo=None) -> int:
+        return bruto - sum(centavos for _, centavos in self.deducir(bruto, periodo))
+
+    def bruto_desde_neto(self, neto: int, periodo=None) -> int:
+        """
+        Bruto total (en centavos) cuyo neto es 'neto'. Por el redondeo de cada
+        porcentaje puede no existir uno exacto; en ese caso se devuelve la
+        estimación y el neto del recibo difiere en algún centavo.
+        """
+        fijos = 0
+        porcentaje_num, porcentaje_den = 0, 1
+        for d in self.vigentes(periodo):
+            if d["tipo"] == "fijo":
+                fijos += d["centavos"]
+            else:
+                porcentaje_num = (
+                    porcentaje_num * d["denominador"]
+                    + d["numerador"] * porcentaje_den
+                )
+                porcentaje_den *= d["denominador"]
+        if porcentaje_num >= porcentaje_den:
+            raise ValueError("Las deducciones porcentuales suman 100% o más.")
+        # bruto = (neto + fijos) / (1 - porcentaje)
+        estimado = dividir_redondeando(
+            (neto + fijos) * porcentaje_den, porcentaje_den - porcentaje_num
+        )
+        for desvio in sorted(
+            range(-_MARGEN_BUSQUEDA, _MARGEN_BUSQUEDA + 1), key=abs
+        ):
+            if self.neto(estimado + desvio, periodo) == neto:
+                return estimado + desvio
+        return estimado
+
+    def recibo(self, periodo, sueldo_bruto: int, aguinaldo_bruto: int = 0) -> dict:
+        """Recibo completo a partir de los brutos (en centavos) del período."""
+        bruto_total = sueldo_bruto + aguinaldo_bruto
+        deducciones = [
+            (d["nombre"], d["cuenta"], centavos)
+            for d, centavos in self.deducir(bruto_total, periodo)
+        ]
+        return {
+            "periodo": periodo,
+            "sueldo_bruto": sueldo_bruto,
+            "aguinaldo_bruto": aguinaldo_bruto,
+            "deducciones": deducciones,
+            "neto": bruto_total - sum(c for _, _, c in deducciones),
+        }
+
+    def recibo_desde_neto(self, periodo, neto: int, base_aguinaldo: int = 0) -> dict:
+        """
+        Recibo a partir del neto cobrado. Si hay 'base_aguinaldo', el bruto se
+        reparte entre el aguinaldo (ver calcular_aguinaldo) y el sueldo.
+        """
+        aguinaldo = calcular_aguinaldo(base_aguinaldo)
+        bruto_total = self.bruto_desde_neto(neto, periodo)
+        return self.recibo(periodo, bruto_total - aguinaldo, aguinaldo)
+
+
+def recibo_a_registro(recibo, fecha=None) -> dict:
+    """
+    Transacción del recibo con el formato de importador.py: ingresos como
+    créditos, deducciones y neto como débitos. Sin 'fecha' se usa la del
+    recibo o el primer día del período. El id externo "sueldo:AAAA-MM" evita
+    registrar dos veces el mismo mes.
+    """
+    fecha = fecha or recibo.get("fecha")
+    if fecha is None:
+        fecha = datetime.strptime(recibo["periodo"], "%Y-%m")
+    splits = [
+        {"cuenta": CUENTA_SUELDO, "monto": Monto(-recibo["sueldo_bruto"]).texto()}
+    ]
+    if recibo["aguinaldo_bruto"]:
+        splits.append(
+            {
+                "cuenta": CUENTA_AGUINALDO,
+                "monto": Monto(-recibo["aguinaldo_bruto"]).texto(),
+            }
+        )
+    for _, cuenta, centavos in recibo["deducciones"]:
+        splits.append({"cuenta": cuenta, "monto": Monto(centavos).texto()})
+    splits.append({"cuenta": CUENTA_NETO, "monto": Monto(recibo["neto"]).texto()})
+
+    aguinaldo = " con Aguinaldo" if recibo["aguinaldo_bruto"] else ""
+    return {
+        "fecha": fecha.strftime("%d/%m/%Y"),
+        "descripcion": f"Sueldo {fecha.strftime('%B %Y')}{aguinaldo}",
+        "id_externo": f"sueldo:{recibo['periodo']}",
+        "splits": splits,
+    }
+
+
+def leer_historial(ruta):
+    """
+    Lee un historial de sueldos CSV con columnas periodo (AAAA-MM) y bruto o
+    neto; opcionalmente fecha (DD/MM/AAAA) y base_aguinaldo para los meses con
+    aguinaldo. Los montos de todo el archivo se convierten en una sola pasada.
+    Devuelve una lista de diccionarios con montos en centavos (o None).
+    """
+    with open(ruta, encoding="utf-8", newline="") as f:
+        filas = list(csv.DictReader(f))
+    columnas = {}
+    for columna in ("bruto", "neto", "base_aguinaldo"):
+        textos = [(fila.get(columna) or "").strip() for fila in filas]
+        valores = parse_centavos(textos, estricto=False)
+        for posicion, (texto, valor) in enumerate(zip(textos, valores)):
+            if texto and valor is None:
+                raise ValueError(
+                    f"Fila {posicion + 2}: el monto '{texto}' de '{columna}' "
+                    "no es válido."
+                )
+        columnas[columna] = valores
+
+    historial = []
+    for posicion, fila in enumerate(filas):
+        periodo = (fila.get("periodo") or "").strip()
+        try:
+            datetime.strptime(periodo, "%Y-%m")
+        except ValueError:
+            raise ValueError(
+                f"Fila {posicion + 2}: el período '{periodo}' no es válido. "
+                "Usa AAAA-MM."
+            )
+        bruto = columnas["bruto"][posicion]
+        neto = columnas["neto"][posicion]
+        if bruto is None and neto is None:
+            raise ValueError(f"Fila {posicion + 2}: falta el bruto o el neto.")
+        fecha = (fila.get("fecha") or "").strip()
+        historial.append(
+            {
+                "periodo": periodo,
+                "fecha": datetime.strptime(fecha, "%d/%m/%Y") if fecha else None,
+                "bruto": bruto,
+                "neto": neto,
+                "base_aguinaldo": columnas["base_aguinaldo"][posicion] or 0,
+            }
+        )
+    return historial
+
+
+def calcular_historial(plan, historial):
+    """Recibo de cada mes del historial, en el mismo orden."""
+    recibos = []
+    for mes in historial:
+        if mes["neto"] is not None:
+            recibo = plan.recibo_desde_neto(
+                mes["periodo"], mes["neto"], mes["base_aguinaldo"]
+            )
+        else:
+            recibo = plan.recibo(
+                mes["periodo"], mes["bruto"], calcular_aguinaldo(mes["base_aguinaldo"])
+            )
+        recibo["fecha"] = mes["fecha"]
+        recibos.append(recibo)
+    return recibos
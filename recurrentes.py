@@ -0,0 +1,232 @@
+# recurrentes.py
+
+"""
+Programador de transacciones recurrentes (config.RECURRENTES).
+Calcula todas las ocurrencias vencidas de cada regla desde la última ejecución
+y las registra en orden de fecha dentro de una misma sesión, de modo que
+ponerse al día con varios meses atrasados es una sola ejecución.
+
+- Cada ocurrencia lleva el id externo "<prefijo>:AAAA-MM", así que nunca se
+  registra dos veces aunque el estado se pierda.
+- El último mes procesado de cada regla se guarda junto al libro para no
+  volver a revisar meses viejos en cada ejecución. Sin estado guardado (la
+  primera vez, o si se perdió) se empieza por el mes en curso: los meses
+  anteriores pueden estar en el libro sin ese id, cargados a mano. Para
+  ponerse al día desde antes se indica el mes explícitamente ('desde').
+  Con el libro en la cola (cola.py) el estado no avanza: las ocurrencias
+  solo quedaron encoladas y, si al vaciarla se rechazan, la próxima
+  ejecución con el libro las vuelve a intentar.
+- Con "poner_en_cero", el saldo positivo de la cuenta al día de la ocurrencia
+  se pasa a la contrapartida antes de registrarla (como la recarga de Allaria).
+"""
+
+import calendar
+import json
+import os
+from datetime import date, datetime
+
+import config
+from cola import LibroEnCola
+from dinero import Monto
+from huellas import ruta_sidecar
+
+PREGUNTAR = "preguntar"
+
+
+def _mes_siguiente(anio, mes):
+    return (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+
+
+def fecha_ocurrencia(regla, anio, mes) -> date:
+    """Día de la regla en ese mes, limitado al último día del mes."""
+    ultimo = calendar.monthrange(anio, mes)[1]
+    return date(anio, mes, min(regla["dia"], ultimo))
+
+
+def ocurrencias(regla, hasta: date, desde=None):
+    """
+    Fechas de la regla entre el mes 'desde' (AAAA-MM, por defecto el "desde"
+    de la regla) y 'hasta' inclusive.
+    """
+    anio, mes = map(int, (desde or regla["desde"]).split("-"))
+    while (anio, mes) <= (hasta.year, hasta.month):
+        fecha = fecha_ocurrencia(regla, anio, mes)
+        if fecha > hasta:
+            break
+        yield fecha
+        anio, mes = _mes_siguiente(anio, mes)
+
+
+def id_ocurrencia(regla, fecha) -> str:
+    prefijo = regla.get("id_externo") or f"recurrente:{regla['nombre']}"
+    return f"{prefijo}:{fecha.strftime('%Y-%m')}"
+
+
+class EstadoRecurrentes:
+    """Último mes procesado de cada regla, guardado junto al libro."""
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_sidecar("recurrentes.json")
+        try:
+            with open(self.ruta, encoding="utf-8") as f:
+                self.ultimos = json.load(f)
+        except (OSError, ValueError):
+            self.ultimos = {}
+
+    def desde(self, regla, hasta: date, inicio=None):
+        """
+        Primer mes a revisar (AAAA-MM): el siguiente al último procesado. Si
+        la regla no tiene estado, el mes 'inicio' o, sin él, el de 'hasta'.
+        Nunca antes del "desde" de la regla.
+        """
+        ultimo = self.ultimos.get(regla["nombre"])
+        if ultimo:
+            anio, mes = _mes_siguiente(*map(int, ultimo.split("-")))
+            primero = f"{anio:04d}-{mes:02d}"
+        else:
+            primero = inicio or hasta.strftime("%Y-%m")
+        return max(primero, regla["desde"])
+
+    def marcar(self, regla, fecha):
+        self.ultimos[regla["nombre"]] = fecha.strftime("%Y-%m")
+
+    def guardar(self):
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.ultimos, f, ensure_ascii=False, indent=2)
+        os.replace(temporal, self.ruta)
+
+
+def pendientes(libro, reglas, hasta: date, estado, desde=None):
+    """
+    Lista de (regla, fecha) vencidas y todavía no registradas, ordenada por
+    fecha. 'libro' es un ServicioLibro o el cliente del demonio; 'desde'
+    (AAAA-MM) es el primer mes de las reglas sin estado guardado.
+    """
+    resultado = []
+    for regla in reglas:
+        for fecha in ocurrencias(regla, hasta, estado.desde(regla, hasta, desde)):
+            if not libro.existe(id_ocurrencia(regla, fecha)):
+                resultado.append((regla, fecha))
+    resultado.sort(key=lambda par: par[1])
+    return resultado
+
+
+def monto_ocurrencia(regla, fecha, libro, pedir_monto=None) -> Monto:
+    monto = regla["monto"]
+    if callable(monto):
+        return monto(fecha, libro)
+    if monto == PREGUNTAR:
+        if pedir_monto is None:
+            raise ValueError(
+                f"La regla '{regla['nombre']}' pide el monto y la ejecución no es "
+                "interactiva."
+            )
+        return pedir_monto(regla, fecha)
+    return Monto.de_texto(monto)
+
+
+def registrar_ocurrencia(libro, regla, fecha, monto) -> dict:
+    """
+    Registra una ocurrencia (y antes, si corresponde, el ajuste a cero).
+    Devuelve {"ajuste": Monto o None, "monto": Monto}.
+    """
+    fecha_str = fecha.strftime("%d/%m/%Y")
+    id_externo = id_ocurrencia(regla, fecha)
+    ajuste = None
+    cero = regla.get("poner_en_cero")
+    if cero:
+        saldo = libro.saldo(cero["cuenta"], fecha)
+        if saldo > 0:
+            ajuste = saldo
+            # Origen: sale dinero de la cuenta (crédito).
+            # Destino: la contrapartida (débito).
+            libro.publicar(
+                {
+                    "fecha": fecha_str,
+                    "descripcion": cero["descripcion"],
+                    "id_externo": f"{id_externo}:ajuste",
+                    "splits": [
+                        {"cuenta": cero["cuenta"], "monto": (-saldo).texto()},
+                        {"cuenta": cero["contrapartida"], "monto": saldo.texto()},
+                    ],
+                }
+            )
+    libro.publicar(
+        {
+            "fecha": fecha_str,
+            "descripcion": regla["descripcion"],
+            "id_externo": id_externo,
+            "splits": [
+                {"cuenta": regla["origen"], "monto": (-monto).texto()},
+                {"cuenta": regla["destino"], "monto": monto.texto()},
+            ],
+        }
+    )
+    return {"ajuste": ajuste, "monto": monto}
+
+
+def verificar_reglas(libro, reglas):
+    """Lanza ValueError si alguna regla usa cuentas que no existen en el libro."""
+    referencias = set()
+    for regla in reglas:
+        referencias.update((regla["origen"], regla["destino"]))
+        cero = regla.get("poner_en_cero")
+        if cero:
+            referencias.update((cero["cuenta"], cero["contrapartida"]))
+    faltantes = libro.verificar_cuentas(sorted(referencias))
+    if faltantes:
+        raise ValueError(
+            f"Las cuentas {', '.join(faltantes)} no fueron encontradas en el libro."
+        )
+
+
+def ejecutar(
+    libro,
+    reglas=None,
+    hasta=None,
+    pedir_monto=None,
+    estado=None,
+    simular=False,
+    al_registrar=None,
+    desde=None,
+):
+    """
+    Registra todas las ocurrencias pendientes hasta 'hasta' (hoy por defecto).
+    Las reglas sin estado guardado empiezan en el mes 'desde' (AAAA-MM) o,
+    sin él, en el de 'hasta'.
+    'pedir_monto(regla, fecha)' se usa para las reglas con monto "preguntar";
+    'al_registrar(regla, fecha, resultado)' se llama después de cada una.
+    Con 'simular' solo devuelve las pendientes. Devuelve la lista de
+    (regla, fecha) pendientes que se procesaron. Si 'libro' es la cola, el
+    estado no se guarda.
+    """
+    reglas = config.RECURRENTES if reglas is None else reglas
+    hasta = hasta or datetime.now().date()
+    estado = estado or EstadoRecurrentes()
+    verificar_reglas(libro, reglas)
+    lista = pendientes(libro, reglas, hasta, estado, desde)
+    if simular:
+        return lista
+    # Los montos se piden antes de tocar el libro.
+    montos = [
+        monto_ocurrencia(regla, fecha, libro, pedir_monto) for regla, fecha in lista
+    ]
+    for (regla, fecha), monto in zip(lista, montos):
+        resultado = registrar_ocurrencia(libro, regla, fecha, monto)
+        estado.marcar(regla, fecha)
+        if al_registrar:
+            al_registrar(regla, fecha, resultado)
+    # Las reglas sin pendientes quedan al día hasta el mes procesado.
+    for regla in reglas:
+        ultima = None
+        for ultima in ocurrencias(regla, hasta, estado.desde(regla, hasta, desde)):
+            pass
+        if ultima is not None:
+            estado.marcar(regla, ultima)
+    # Si algo falla antes de llegar acá el estado no cambia: las ocurrencias
+    # que sí se registraron se reconocen por su id externo. Las encoladas
+    # todavía pueden rechazarse al vaciar la cola.
+    if not isinstance(libro, LibroEnCola):
+        estado.guardar()
+    return lista
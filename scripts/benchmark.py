@@ -0,0 +1,245 @@
+# benchmark.py
+"""
+Script de BENCHMARK de los caminos críticos del proyecto.
+Genera libros sintéticos del tamaño indicado (cuentas, profundidad,
+transacciones) en un directorio temporal y mide, para cada backend (XML y
+SQLite):
+- carga y guardado del libro,
+- búsqueda de cuentas (índice en frío y en caliente),
+- registro de una transacción y de un lote,
+- consulta de saldos (GetBalance y caché de totales).
+Los resultados se agregan como una línea JSON por corrida al archivo indicado,
+para poder seguir regresiones en el tiempo.
+Uso:
+    python scripts/benchmark.py [--cuentas 2000] [--profundidad 4]
+                                [--transacciones 20000] [--lote 1000]
+                                [--backends xml sqlite3] [--salida RUTA]
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import config
+from consultas import CacheTotales
+from dinero import Monto
+from gnucash_utils import find_account_by_path, invalidar_indice_cuentas
+
+FECHA_INICIAL = datetime(2020, 1, 1)
+
+
+class Cronometro:
+    """Acumula la duración de cada fase medida."""
+
+    def __init__(self):
+        self.metricas = {}
+
+    @contextmanager
+    def medir(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metricas[nombre] = round(time.perf_counter() - inicio, 6)
+
+
+def generar_rutas(cantidad, profundidad):
+    """Rutas sintéticas repartidas en un árbol balanceado de la profundidad dada."""
+    abanico = max(2, round(cantidad ** (1 / profundidad)))
+    rutas = []
+    for i in range(cantidad):
+        partes = []
+        n = i
+        for nivel in range(profundidad):
+            partes.append(f"N{nivel}-{n % abanico:03d}")
+            n //= abanico
+        rutas.append("Bench." + ".".join(partes))
+    return sorted(set(rutas))
+
+
+def crear_cuentas(book, rutas, currency):
+    """Crea en el libro todas las cuentas (y sus padres) de 'rutas'."""
+    import gnucash
+    from gnucash.gnucash_core_c import ACCT_TYPE_EXPENSE
+
+    root = book.get_root_account()
+    creadas = {"": root}
+    for ruta in rutas:
+        partes = ruta.split(".")
+        for i in range(1, len(partes) + 1):
+            parcial = ".".join(partes[:i])
+            if parcial in creadas:
+                continue
+            cuenta = gnucash.Account(book)
+            cuenta.SetName(partes[i - 1])
+            cuenta.SetType(ACCT_TYPE_EXPENSE)
+            cuenta.SetCommodity(currency)
+            creadas[".".join(partes[: i - 1])].append_child(cuenta)
+            creadas[parcial] = cuenta
+
+
+def transacciones_aleatorias(rutas, cantidad, semilla):
+    """Genera (fecha, descripción, origen, destino, monto) reproducibles."""
+    azar = random.Random(semilla)
+    for i in range(cantidad):
+        origen, destino = azar.sample(rutas, 2)
+        fecha = FECHA_INICIAL + timedelta(days=azar.randrange(5 * 365))
+        monto = Monto(azar.randrange(100, 10_000_000))
+        yield fecha, f"Bench {i}", origen, destino, monto
+
+
+def postear(book, root, movimientos, currency):
+    from libro import crear_transaccion
+
+    for fecha, descripcion, origen, destino, monto in movimientos:
+        crear_transaccion(
+            book,
+            fecha,
+            descripcion,
+            [
+                (find_account_by_path(root, origen), -monto),
+                (find_account_by_path(root, destino), monto),
+            ],
+            currency=currency,
+        )
+
+
+def correr_backend(backend, directorio, args):
+    """Ejecuta todas las mediciones sobre un libro nuevo del backend dado."""
+    # Los bindings de GnuCash se cargan recién al medir, así --help no los necesita.
+    import gnucash
+    from gnucash.gnucash_core import SessionOpenMode
+
+    from libro import guardar_sesion
+
+    extension = "gnucash" if backend == "xml" else "sqlite.gnucash"
+    uri = f"{backend}://{os.path.join(directorio, f'bench.{extension}')}"
+    rutas = generar_rutas(args.cuentas, args.profundidad)
+    crono = Cronometro()
+
+    # --- Generación del libro sintético ---
+    session = gnucash.Session(uri, mode=SessionOpenMode.SESSION_NEW_OVERWRITE)
+    book = session.get_book()
+    currency = book.get_table().lookup("ISO4217", config.MONEDA_PRINCIPAL)
+    with crono.medir("generar_cuentas"):
+        crear_cuentas(book, rutas, currency)
+    with crono.medir("generar_transacciones"):
+        postear(
+            book,
+            book.get_root_account(),
+            transacciones_aleatorias(rutas, args.transacciones, args.semilla),
+            currency,
+        )
+    with crono.medir("guardar_inicial"):
+        session.save()
+    session.end()
+    invalidar_indice_cuentas()
+
+    # --- Carga ---
+    with crono.medir("cargar"):
+        session = gnucash.Session(uri, mode=SessionOpenMode.SESSION_NORMAL_OPEN)
+        book = session.get_book()
+    root = book.get_root_account()
+    currency = book.get_table().lookup("ISO4217", config.MONEDA_PRINCIPAL)
+
+    try:
+        # --- Búsqueda de cuentas ---
+        muestra = random.Random(args.semilla).sample(rutas, min(len(rutas), 1000))
+        with crono.medir("busqueda_indice_frio"):
+            for ruta in muestra:
+                find_account_by_path(root, ruta)
+        with crono.medir("busqueda_indice_caliente"):
+            for ruta in muestra:
+                find_account_by_path(root, ruta)
+
+        # --- Registro individual y guardado, como en los scripts ---
+        # (con SQLite el guardado no hace nada: cada confirmación ya escribe)
+        uno = list(transacciones_aleatorias(rutas, 1, args.semilla + 1))
+        with crono.medir("registro_individual"):
+            postear(book, root, uno, currency)
+        with crono.medir("guardar_individual"):
+            guardar_sesion(session, uri)
+
+        # --- Registro por lote ---
+        lote = list(transacciones_aleatorias(rutas, args.lote, args.semilla + 2))
+        with crono.medir("registro_lote"):
+            postear(book, root, lote, currency)
+        with crono.medir("guardar_lote"):
+            guardar_sesion(session, uri)
+
+        # --- Consultas de saldo ---
+        cuentas = [find_account_by_path(root, ruta) for ruta in muestra]
+        with crono.medir("saldo_getbalance"):
+            for cuenta in cuentas:
+                cuenta.GetBalance()
+        cache = CacheTotales(os.path.join(directorio, f"{backend}.totales.sqlite"))
+        try:
+            with crono.medir("cache_totales_reconstruir"):
+                cache.reconstruir(root)
+            with crono.medir("saldo_cache_totales"):
+                for ruta in muestra:
+                    cache.saldo(ruta)
+        finally:
+            cache.cerrar()
+    finally:
+        session.end()
+        invalidar_indice_cuentas()
+
+    crono.metricas["tamano_archivo_bytes"] = os.path.getsize(uri.split("://", 1)[1])
+    return crono.metricas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de libros sintéticos.")
+    parser.add_argument("--cuentas", type=int, default=2000)
+    parser.add_argument("--profundidad", type=int, default=4)
+    parser.add_argument("--transacciones", type=int, default=20000)
+    parser.add_argument("--lote", type=int, default=1000)
+    parser.add_argument("--semilla", type=int, default=12345)
+    parser.add_argument(
+        "--backends", nargs="+", default=["xml", "sqlite3"], choices=["xml", "sqlite3"]
+    )
+    parser.add_argument(
+        "--salida",
+        default="benchmark_results.jsonl",
+        help="Archivo JSONL al que se agregan los resultados.",
+    )
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        print(f"\n--- Backend {backend} ---")
+        try:
+            with tempfile.TemporaryDirectory(prefix="expenses-bench-") as directorio:
+                metricas = correr_backend(backend, directorio, args)
+        except Exception as e:
+            print(f"\n\033[91mERROR: {e}\033[0m")
+            sys.exit(1)
+        for nombre, valor in metricas.items():
+            print(f"  {nombre:30} {valor}")
+        resultado = {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "backend": backend,
+            "cuentas": args.cuentas,
+            "profundidad": args.profundidad,
+            "transacciones": args.transacciones,
+            "lote": args.lote,
+            "metricas": metricas,
+        }
+        with open(args.salida, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resultado) + "\n")
+
+    print(f"\n\033[92mResultados agregados a '{args.salida}'.\033[0m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# cargar_cotizaciones.py
+"""
+Script para CARGAR las cotizaciones históricas en la base de precios del libro.
+Lee el CSV de config.COTIZACIONES (o el indicado) y agrega en una única sesión
+todos los precios de config.COTIZACIONES["serie"] que todavía no estén en el
+libro; se puede volver a ejecutar con el archivo actualizado y solo se agregan
+los días nuevos. Las demás series del archivo no se cargan (GnuCash guarda un
+solo precio por día); los scripts las leen del CSV con --archivo.
+Uso:
+    python scripts/cargar_cotizaciones.py [--archivo RUTA] [--simular]
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+from datetime import date
+
+import config
+from cotizaciones import ESCALA, leer_series
+from instrumentacion import contar, ejecutar_script, medir
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Carga las series de cotizaciones en la base de precios."
+    )
+    parser.add_argument(
+        "--archivo",
+        default=None,
+        help=f"CSV de cotizaciones (por defecto, {config.COTIZACIONES['archivo']}).",
+    )
+    parser.add_argument(
+        "--simular",
+        action="store_true",
+        help="Solo lee el archivo y muestra lo que contiene.",
+    )
+    args = parser.parse_args()
+
+    serie = config.COTIZACIONES["serie"]
+    try:
+        with medir("leer_cotizaciones"):
+            series = leer_series(args.archivo)
+        if serie not in series:
+            raise ValueError(f"El archivo no tiene la serie '{serie}'.")
+    except (OSError, ValueError) as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    moneda = config.COTIZACIONES["moneda"]
+    print(f"\033[94m--- COTIZACIONES {moneda}/{config.MONEDA_PRINCIPAL} ---\033[0m")
+    for nombre, filas in series.items():
+        desde, hasta = date.fromordinal(filas[0][0]), date.fromordinal(filas[-1][0])
+        print(
+            f"  {nombre:10} {len(filas):6} días, {desde:%d/%m/%Y} a {hasta:%d/%m/%Y} "
+            f"(última: {filas[-1][1] / ESCALA:,.4f})"
+            + ("" if nombre == serie else " — solo en el CSV")
+        )
+    if args.simular:
+        print("\nSimulación: no se registraron cambios en el libro.")
+        return
+
+    from cotizaciones import cargar_en_libro
+    from libro import abrir_sesion
+
+    try:
+        with abrir_sesion() as session, medir("cargar_precios"):
+            agregados = cargar_en_libro(session.get_book(), series)
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    total = sum(agregados.values())
+    contar("precios_agregados", total)
+    print(f"\n\033[92m¡ÉXITO! {total} cotizaciones agregadas al libro.\033[0m")
+    ya_cargadas = len(series[serie]) - agregados[serie]
+    if ya_cargadas:
+        print(f"  {serie}: {ya_cargadas} ya estaban cargadas.")
+
+
+if __name__ == "__main__":
+    ejecutar_script(main)
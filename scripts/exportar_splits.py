@@ -0,0 +1,59 @@
+# exportar_splits.py
+"""
+Script para EXPORTAR todos los splits del libro en formato columnar (NumPy).
+Por defecto actualiza solo las transacciones nuevas, modificadas o borradas
+desde la última exportación; con --completo reescribe todo.
+Los datos se leen después con exportar.cargar().
+Uso:
+    python scripts/exportar_splits.py [--destino DIR] [--completo]
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exporta los splits del libro a archivos columnar .npz."
+    )
+    parser.add_argument(
+        "--destino",
+        default=None,
+        help="Directorio de exportación (por defecto, junto al libro).",
+    )
+    parser.add_argument(
+        "--completo",
+        action="store_true",
+        help="Descarta lo exportado y vuelve a exportar todo el libro.",
+    )
+    args = parser.parse_args()
+
+    # NumPy y GnuCash se cargan recién después de validar los argumentos.
+    from gnucash.gnucash_core import SessionOpenMode
+
+    from exportar import directorio_exportacion, exportar
+    from libro import abrir_sesion
+
+    destino = args.destino or directorio_exportacion()
+
+    try:
+        with abrir_sesion(mode=SessionOpenMode.SESSION_READ_ONLY) as session:
+            cantidad = exportar(
+                session.get_book().get_root_account(),
+                destino,
+                incremental=not args.completo,
+            )
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    print(f"\n\033[92m¡ÉXITO! Se exportaron {cantidad} splits a '{destino}'.\033[0m")
+
+
+if __name__ == "__main__":
+    main()
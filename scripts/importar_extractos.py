@@ -0,0 +1,149 @@
+# importar_extractos.py
+"""
+Script para IMPORTAR EXTRACTOS de bancos, tarjetas, IEB y Mercado Pago.
+- Lee y clasifica los archivos en paralelo (un proceso por archivo).
+- Intercala todos los movimientos por fecha y los registra en una única
+  sesión (o a través del demonio del libro, si está corriendo).
+- Los movimientos que ninguna regla clasifica van a un archivo aparte para
+  revisar; las filas con errores, al archivo de rechazos.
+- Los extractos en moneda extranjera se valúan con las cotizaciones de
+  config.COTIZACIONES (ver cotizaciones.py).
+La fuente de cada archivo se deduce de su nombre ("bbva_2025-03.csv") o se
+indica como FUENTE=RUTA; las fuentes se configuran en config.EXTRACTOS.
+Uso:
+    python scripts/importar_extractos.py ARCHIVO [ARCHIVO ...] [--procesos N]
+                                         [--rechazos RUTA] [--sin-clasificar RUTA]
+                                         [--simular | --diferir]
+Con --diferir, o si GnuCash tiene el libro abierto, las transacciones quedan en
+la cola local (ver cola.py) y se registran con 'python cli.py cola'.
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+import json
+
+from cola import aviso_encoladas
+from cotizaciones import CacheCotizaciones
+from demonio import abrir_libro
+from extractos import (
+    en_moneda_extranjera,
+    fuente_de_archivo,
+    intercalar,
+    procesar_archivos,
+)
+from importador import importar
+from instrumentacion import contar, ejecutar_script, medir
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Importa extractos de varias cuentas en una sola sesión."
+    )
+    parser.add_argument(
+        "archivos", nargs="+", metavar="ARCHIVO", help="Extracto o FUENTE=RUTA."
+    )
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Procesos para leer los archivos (por defecto, uno por núcleo).",
+    )
+    parser.add_argument(
+        "--rechazos",
+        default="extractos.rechazos.jsonl",
+        help="Archivo JSONL con las filas que no se pudieron importar.",
+    )
+    parser.add_argument(
+        "--sin-clasificar",
+        default="extractos_sin_clasificar.jsonl",
+        help="Archivo JSONL con los movimientos que ninguna regla clasificó.",
+    )
+    parser.add_argument(
+        "--simular",
+        action="store_true",
+        help="Muestra las transacciones sin cargar el libro.",
+    )
+    parser.add_argument(
+        "--diferir",
+        action="store_true",
+        help="Deja las transacciones en la cola sin abrir el libro (ver cola.py).",
+    )
+    args = parser.parse_args()
+
+    try:
+        archivos = [fuente_de_archivo(archivo) for archivo in args.archivos]
+        cotizaciones = None
+        if en_moneda_extranjera(archivos):
+            with medir("leer_cotizaciones"):
+                cotizaciones = CacheCotizaciones.de_archivo()
+        with medir("leer_extractos"):
+            resultados = procesar_archivos(archivos, args.procesos)
+    except (OSError, ValueError) as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    print("\033[94m--- EXTRACTOS ---\033[0m")
+    for (fuente, ruta), (movimientos, errores) in zip(archivos, resultados):
+        contar("movimientos_leidos", len(movimientos))
+        aviso = f", \033[93m{len(errores)} con errores\033[0m" if errores else ""
+        print(f"  {fuente:12} {ruta}: {len(movimientos)} movimientos{aviso}")
+
+    sin_clasificar = []
+    sin_cotizacion = []
+    try:
+        with abrir_libro(simular=args.simular, diferir=args.diferir) as libro, open(
+            args.rechazos, "w", encoding="utf-8"
+        ) as rechazos:
+            errores_archivos = [
+                (f"{os.path.basename(ruta)}:{linea}", error)
+                for (_, ruta), (_, errores) in zip(archivos, resultados)
+                for linea, error in errores
+            ]
+            registros = intercalar(
+                resultados, sin_clasificar, cotizaciones, sin_cotizacion
+            )
+            resumen = importar(libro, registros, rechazos)
+            for linea, error in errores_archivos + sin_cotizacion:
+                rechazos.write(
+                    json.dumps({"linea": linea, "error": error}, ensure_ascii=False)
+                    + "\n"
+                )
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    with open(args.sin_clasificar, "w", encoding="utf-8") as f:
+        for movimiento in sin_clasificar:
+            f.write(json.dumps(movimiento, ensure_ascii=False) + "\n")
+
+    rechazadas = resumen["rechazadas"] + len(errores_archivos) + len(sin_cotizacion)
+    if args.simular:
+        print(f"\n{resumen['registradas']} transacciones válidas (simulación).")
+    elif resumen["encoladas"]:
+        print(aviso_encoladas(resumen["encoladas"]))
+    else:
+        print(
+            f"\n\033[92m¡ÉXITO! {resumen['registradas']} transacciones "
+            "registradas.\033[0m"
+        )
+    if resumen["duplicadas"]:
+        print(f"Se omitieron {resumen['duplicadas']} transacciones ya registradas.")
+    if sin_clasificar:
+        print(
+            f"\033[93m{len(sin_clasificar)} movimientos sin clasificar → "
+            f"'{args.sin_clasificar}'.\033[0m"
+        )
+    if rechazadas:
+        print(
+            f"\033[93m{rechazadas} filas rechazadas; revisa '{args.rechazos}'.\033[0m"
+        )
+
+
+if __name__ == "__main__":
+    ejecutar_script(main)
@@ -0,0 +1,106 @@
+# importar_lote.py
+"""
+Script de IMPORTACIÓN MASIVA de transacciones.
+Registra todas las transacciones de un archivo CSV o JSONL en una única sesión
+(o a través del demonio del libro, si está corriendo).
+Las transacciones que ya estaban en el libro se omiten (ver huellas.py).
+Uso:
+    python scripts/importar_lote.py ARCHIVO [--rechazos RUTA] [--guardar-cada N]
+                                    [--sin-deduplicar] [--locale es-AR|en]
+                                    [--simular | --diferir]
+Con --diferir, o si GnuCash tiene el libro abierto, las transacciones quedan en
+la cola local (ver cola.py) y se registran con 'python cli.py cola'.
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+
+from cola import aviso_encoladas
+from demonio import abrir_libro
+from gnucash_utils import LOCALE_PREDETERMINADO, LOCALES
+from importador import importar, leer_especificaciones
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Importa un lote de transacciones en una sola sesión."
+    )
+    parser.add_argument("archivo", help="Archivo CSV o JSONL con las transacciones.")
+    parser.add_argument(
+        "--rechazos",
+        help="Archivo JSONL donde se escriben las filas rechazadas "
+        "(por defecto ARCHIVO.rechazos.jsonl).",
+    )
+    parser.add_argument(
+        "--guardar-cada",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Guarda el libro cada N transacciones (0 = solo al final).",
+    )
+    parser.add_argument(
+        "--sin-deduplicar",
+        action="store_true",
+        help="Registra las transacciones aunque ya existan en el libro.",
+    )
+    parser.add_argument(
+        "--locale",
+        choices=list(LOCALES),
+        default=LOCALE_PREDETERMINADO,
+        help="Formato de los montos del archivo: es-AR (1.234,56) o en (1,234.56).",
+    )
+    parser.add_argument(
+        "--simular",
+        action="store_true",
+        help="Valida y muestra las transacciones sin cargar el libro.",
+    )
+    parser.add_argument(
+        "--diferir",
+        action="store_true",
+        help="Deja las transacciones en la cola sin abrir el libro (ver cola.py).",
+    )
+    args = parser.parse_args()
+    ruta_rechazos = args.rechazos or f"{args.archivo}.rechazos.jsonl"
+
+    try:
+        with abrir_libro(simular=args.simular, diferir=args.diferir) as libro, open(
+            ruta_rechazos, "w", encoding="utf-8"
+        ) as rechazos:
+            resumen = importar(
+                libro,
+                leer_especificaciones(args.archivo, args.locale),
+                rechazos,
+                guardar_cada=args.guardar_cada,
+                deduplicar=not args.sin_deduplicar,
+            )
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    if args.simular:
+        print(f"\n{resumen['registradas']} transacciones válidas (simulación).")
+    elif resumen["encoladas"]:
+        print(aviso_encoladas(resumen["encoladas"]))
+    else:
+        print(
+            f"\n\033[92m¡ÉXITO! {resumen['registradas']} transacciones "
+            "registradas.\033[0m"
+        )
+    if resumen["duplicadas"]:
+        print(f"Se omitieron {resumen['duplicadas']} transacciones ya registradas.")
+    if resumen["rechazadas"]:
+        print(
+            f"\033[93m{resumen['rechazadas']} filas rechazadas; "
+            f"revisa '{ruta_rechazos}'.\033[0m"
+        )
+    if not args.simular and not resumen["encoladas"]:
+        print("Libro guardado y sesión cerrada.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# inversiones.py
+"""
+Script de la CARTERA DE INVERSIONES de las cuentas de broker (ver cartera.py).
+- importar: registra las compras, ventas y dividendos de los archivos del
+  broker en una única sesión; crea las cuentas de los títulos nuevos.
+- precios: carga el CSV de precios en la base de precios del libro y muestra
+  la cartera revaluada.
+- posiciones: cantidad, costo, valor y resultados de cada título.
+- evolucion: valor y resultados de toda la cartera al cierre de cada mes,
+  con todos los días calculados de una vez (--csv guarda la serie diaria).
+Uso:
+    python scripts/inversiones.py importar ARCHIVO [ARCHIVO ...]
+                                  [--simular | --diferir]
+    python scripts/inversiones.py precios [ARCHIVO]
+    python scripts/inversiones.py posiciones [--fecha AAAA-MM-DD]
+    python scripts/inversiones.py evolucion [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+                                            [--csv RUTA]
+La fuente de cada archivo de operaciones se deduce de su nombre
+("ieb_ars_2025.csv") o se indica como FUENTE=RUTA; las fuentes se configuran en
+config.OPERACIONES_BROKER.
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+import csv
+import json
+from datetime import date
+
+import config
+from cartera import (
+    Cartera,
+    cargar_precios,
+    leer_operaciones,
+    leer_precios,
+    registros,
+    verificar_cuentas_cartera,
+)
+from cotizaciones import CacheCotizaciones
+from instrumentacion import contar, ejecutar_script, medir
+
+
+def importar_operaciones(args):
+    from cola import aviso_encoladas
+    from demonio import abrir_libro
+    from extractos import fuente_de_archivo
+    from importador import importar
+
+    try:
+        archivos = [
+            fuente_de_archivo(a, config.OPERACIONES_BROKER) for a in args.archivos
+        ]
+        cotizaciones = None
+        if any(
+            config.OPERACIONES_BROKER[f].get("moneda", config.MONEDA_PRINCIPAL)
+            != config.MONEDA_PRINCIPAL
+            for f, _ in archivos
+        ):
+            cotizaciones = CacheCotizaciones.de_archivo()
+        with medir("leer_operaciones"):
+            leidos = [leer_operaciones(fuente, ruta) for fuente, ruta in archivos]
+    except (OSError, ValueError) as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    print("\033[94m--- OPERACIONES ---\033[0m")
+    for (fuente, ruta), (operaciones, errores) in zip(archivos, leidos):
+        contar("operaciones_leidas", len(operaciones))
+        aviso = f", \033[93m{len(errores)} con errores\033[0m" if errores else ""
+        print(f"  {fuente:12} {ruta}: {len(operaciones)} operaciones{aviso}")
+
+    errores = [
+        (f"{os.path.basename(ruta)}:{linea}", error)
+        for (_, ruta), (_, errores_archivo) in zip(archivos, leidos)
+        for linea, error in errores_archivo
+    ]
+    resumen = {"registradas": 0, "rechazadas": 0, "duplicadas": 0, "encoladas": 0}
+    try:
+        with abrir_libro(simular=args.simular, diferir=args.diferir) as libro, open(
+            args.rechazos, "w", encoding="utf-8"
+        ) as rechazos:
+            verificar_cuentas_cartera(libro)
+            for (fuente, ruta), (operaciones, _) in zip(archivos, leidos):
+                sin_cotizacion = []
+                parcial = importar(
+                    libro,
+                    registros(operaciones, fuente, libro, cotizaciones, sin_cotizacion),
+                    rechazos,
+                )
+                for clave in resumen:
+                    resumen[clave] += parcial[clave]
+                errores.extend(
+                    (f"{os.path.basename(ruta)}:{linea}", error)
+                    for linea, error in sin_cotizacion
+                )
+            for linea, error in errores:
+                rechazos.write(
+                    json.dumps({"linea": linea, "error": error}, ensure_ascii=False)
+                    + "\n"
+                )
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    if args.simular:
+        print(f"\n{resumen['registradas']} operaciones válidas (simulación).")
+        print(
+            "Las ventas se muestran por lo cobrado: su costo FIFO y el resultado "
+            "se calculan con el libro al importarlas."
+        )
+    elif resumen["encoladas"]:
+        print(aviso_encoladas(resumen["encoladas"], "operaciones"))
+    else:
+        print(
+            f"\n\033[92m¡ÉXITO! {resumen['registradas']} operaciones "
+            "registradas.\033[0m"
+        )
+    if resumen["duplicadas"]:
+        print(f"Se omitieron {resumen['duplicadas']} operaciones ya registradas.")
+    rechazadas = resumen["rechazadas"] + len(errores)
+    if rechazadas:
+        print(
+            f"\033[93m{rechazadas} filas rechazadas; revisa '{args.rechazos}'.\033[0m"
+        )
+
+
+def leer_cartera(modo):
+    """Abre el libro y devuelve (cartera, precios, cotizaciones)."""
+    from libro import abrir_sesion
+
+    with abrir_sesion(mode=modo) as session:
+        book = session.get_book()
+        with medir("leer_cartera"):
+            cartera = Cartera.del_libro(book.get_root_account())
+            precios = cartera.precios_del_libro(book)
+        cotizaciones = None
+        if any(m != config.MONEDA_PRINCIPAL for m in cartera.monedas):
+            cotizaciones = CacheCotizaciones.de_libro(book)
+    return cartera, precios, cotizaciones
+
+
+def mostrar_posiciones(cartera, precios, cotizaciones, fecha):
+    with medir("valuar_cartera"):
+        resultado = cartera.valuar(fecha, fecha, precios, cotizaciones)
+    print(f"\033[94m--- CARTERA AL {fecha} ---\033[0m")
+    print(
+        f"  {'Título':<60} {'Cantidad':>14} {'Costo':>16} {'Valor':>16} "
+        f"{'No realizado':>16} {'Realizado':>16}"
+    )
+    totales = [0.0] * 4
+    for numero, ruta in sorted(enumerate(cartera.titulos), key=lambda t: t[1]):
+        fila = [
+            resultado[clave][numero, -1] / 100
+            for clave in ("costo", "valor", "no_realizado", "realizado")
+        ]
+        cantidad = resultado["cantidad"][numero, -1]
+        if not cantidad and not fila[3]:
+            continue
+        totales = [t + v for t, v in zip(totales, fila)]
+        sin_precio = "" if numero in precios else " \033[93m(sin precio)\033[0m"
+        print(
+            f"  {ruta:<60} {cantidad:>14,.4f} "
+            + " ".join(f"{v:>16,.2f}" for v in fila)
+            + sin_precio
+        )
+    print(f"  {'TOTAL':<60} {'':>14} " + " ".join(f"{v:>16,.2f}" for v in totales))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cartera de inversiones.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_importar = sub.add_parser("importar", help="Importa operaciones del broker.")
+    p_importar.add_argument(
+        "archivos", nargs="+", metavar="ARCHIVO", help="Archivo o FUENTE=RUTA."
+    )
+    p_importar.add_argument(
+        "--rechazos",
+        default="inversiones.rechazos.jsonl",
+        help="Archivo JSONL con las filas que no se pudieron importar.",
+    )
+    p_importar.add_argument(
+        "--simular",
+        action="store_true",
+        help="Muestra las transacciones sin cargar el libro.",
+    )
+    p_importar.add_argument(
+        "--diferir",
+        action="store_true",
+        help="Deja las operaciones en la cola sin abrir el libro (ver cola.py).",
+    )
+
+    p_precios = sub.add_parser("precios", help="Carga precios y revalúa la cartera.")
+    p_precios.add_argument(
+        "archivo", nargs="?", default=None, help="CSV de precios (por defecto, config)."
+    )
+
+    p_posiciones = sub.add_parser("posiciones", help="Posiciones y resultados.")
+    p_posiciones.add_argument("--fecha", help="Día de la valuación (por defecto, hoy).")
+
+    p_evolucion = sub.add_parser("evolucion", help="Valor de la cartera por mes.")
+    p_evolucion.add_argument("--desde", help="Primer día (por defecto, el primero).")
+    p_evolucion.add_argument("--hasta", help="Último día (por defecto, hoy).")
+    p_evolucion.add_argument("--csv", default=None, help="Guarda la serie diaria.")
+    args = parser.parse_args()
+
+    if args.comando == "importar":
+        importar_operaciones(args)
+        return
+
+    from gnucash.gnucash_core import SessionOpenMode
+
+    from libro import abrir_sesion
+
+    hoy = date.today().isoformat()
+    try:
+        if args.comando == "precios":
+            with medir("leer_precios"):
+                series = leer_precios(args.archivo)
+            with abrir_sesion() as session, medir("cargar_precios"):
+                agregados, ajenas = cargar_precios(session.get_book(), series)
+            contar("precios_agregados", sum(agregados.values()))
+            print(
+                f"\033[92m¡ÉXITO! {sum(agregados.values())} precios agregados "
+                f"para {len(agregados)} títulos.\033[0m"
+            )
+            if ajenas:
+                print(f"\033[93mSin títulos en cartera: {', '.join(ajenas)}.\033[0m")
+        cartera, precios, cotizaciones = leer_cartera(
+            SessionOpenMode.SESSION_READ_ONLY
+        )
+        if not cartera.titulos:
+            print("No hay títulos en las cuentas de broker.")
+            return
+        if args.comando in ("precios", "posiciones"):
+            fecha = getattr(args, "fecha", None) or hoy
+            mostrar_posiciones(cartera, precios, cotizaciones, fecha)
+            return
+
+        desde = args.desde or str(cartera.fechas.min())
+        with medir("valuar_cartera"):
+            resultado = cartera.valuar(
+                desde, args.hasta or hoy, precios, cotizaciones
+            )
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    import numpy as np
+
+    dias = resultado["dias"]
+    totales = {
+        clave: resultado[clave].sum(axis=0) / 100
+        for clave in ("costo", "valor", "no_realizado", "realizado")
+    }
+    print("\033[94m--- CARTERA AL CIERRE DE CADA MES ---\033[0m")
+    print(
+        f"  {'Fecha':10} {'Costo':>16} {'Valor':>16} {'No realizado':>16} "
+        f"{'Realizado':>16}"
+    )
+    meses = dias.astype("datetime64[M]")
+    cierres = np.flatnonzero(np.append(meses[1:] != meses[:-1], True))
+    for i in cierres.tolist():
+        print(
+            f"  {str(dias[i]):10} "
+            + " ".join(f"{totales[c][i]:>16,.2f}" for c in totales)
+        )
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["fecha", *totales])
+            escritor.writerows(
+                zip(dias.astype(str).tolist(), *(v.tolist() for v in totales.values()))
+            )
+        print(f"\nSerie diaria guardada en '{args.csv}'.")
+
+
+if __name__ == "__main__":
+    ejecutar_script(main)
@@ -0,0 +1,186 @@
+# migrar_sqlite.py
+"""
+Script para MIGRAR el libro del backend XML a SQLite.
+Copia el libro de config.LIBROS["xml"] a config.LIBROS["sqlite3"] y después
+abre los dos y compara, cuenta por cuenta, que los saldos coincidan.
+Si todo coincide, copia junto al libro nuevo los archivos auxiliares que no
+se pueden reconstruir (índice de huellas, estado de las reglas recurrentes,
+cuentas recientes y métricas) y basta con poner BACKEND = "sqlite3" en
+config.py para que todos los scripts usen el libro nuevo. Las cachés (totales,
+configuración compilada, exportación) se rearman solas con el libro nuevo.
+No migra si la cola local (cola.py) tiene transacciones: hay que vaciarla
+antes, para que no queden asociadas al libro viejo.
+El libro XML no se modifica.
+Uso:
+    python scripts/migrar_sqlite.py [--origen URI] [--destino URI]
+                                    [--sobrescribir] [--solo-verificar]
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+import shutil
+
+import config
+from cola import ruta_cola
+from dinero import Monto
+from gnucash_utils import get_indice_cuentas, invalidar_indice_cuentas
+from huellas import ruta_sidecar, transacciones_del_libro
+
+# Archivos auxiliares que no se reconstruyen a partir del libro.
+AUXILIARES = (
+    "huellas.sqlite",
+    "recurrentes.json",
+    "recientes.json",
+    "metricas.jsonl",
+    "cola.rechazos.jsonl",
+)
+
+
+def verificar_cola(origen):
+    """ValueError si la cola local del libro de origen tiene transacciones."""
+    ruta = ruta_cola(origen)
+    if os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+        raise ValueError(
+            f"La cola '{ruta}' tiene transacciones pendientes; vacíala con "
+            "'python cli.py cola' antes de migrar."
+        )
+
+
+def copiar_auxiliares(origen, destino, sobrescribir=False) -> list:
+    """
+    Copia los archivos auxiliares del libro de origen junto al de destino.
+    Los que ya existen en el destino se conservan salvo con 'sobrescribir'.
+    Devuelve los copiados.
+    """
+    copiados = []
+    for sufijo in AUXILIARES:
+        desde = ruta_sidecar(sufijo, origen)
+        hacia = ruta_sidecar(sufijo, destino)
+        if not os.path.exists(desde):
+            continue
+        if os.path.exists(hacia) and not sobrescribir:
+            print(f"\033[93mSe conserva '{hacia}', que ya existía.\033[0m")
+            continue
+        shutil.copy2(desde, hacia)
+        copiados.append(hacia)
+    return copiados
+
+
+def copiar_libro(origen, destino, sobrescribir=False):
+    """Escribe en 'destino' una copia completa del libro de 'origen'."""
+    import gnucash
+    from gnucash.gnucash_core import SessionOpenMode
+
+    from libro import abrir_sesion
+
+    modo = (
+        SessionOpenMode.SESSION_NEW_OVERWRITE
+        if sobrescribir
+        else SessionOpenMode.SESSION_NEW_STORE
+    )
+    with abrir_sesion(origen, mode=SessionOpenMode.SESSION_READ_ONLY) as entrada:
+        salida = gnucash.Session(destino, mode=modo)
+        try:
+            # El libro cargado pasa a la sesión nueva, que lo escribe completo
+            # en la base una única vez.
+            salida.swap_books(entrada)
+            salida.save()
+        finally:
+            salida.end()
+
+
+def resumen_libro(uri):
+    """Saldo exacto de cada cuenta (por ruta) y cantidad de transacciones."""
+    from gnucash.gnucash_core import SessionOpenMode
+
+    from libro import abrir_sesion
+
+    with abrir_sesion(uri, mode=SessionOpenMode.SESSION_READ_ONLY) as session:
+        root = session.get_book().get_root_account()
+        indice = get_indice_cuentas(root)
+        saldos = {}
+        for ruta in indice.rutas():
+            saldos[ruta] = Monto.de_saldo(indice.buscar(ruta))
+        cantidad = sum(1 for _ in transacciones_del_libro(root))
+    invalidar_indice_cuentas()
+    return saldos, cantidad
+
+
+def comparar(origen, destino):
+    """Devuelve la lista de diferencias entre los dos libros (vacía si coinciden)."""
+    saldos_origen, cantidad_origen = resumen_libro(origen)
+    saldos_destino, cantidad_destino = resumen_libro(destino)
+    diferencias = []
+    if cantidad_origen != cantidad_destino:
+        diferencias.append(
+            f"Transacciones: {cantidad_origen} en el origen, "
+            f"{cantidad_destino} en el destino"
+        )
+    for ruta in sorted(saldos_origen.keys() | saldos_destino.keys()):
+        antes = saldos_origen.get(ruta)
+        despues = saldos_destino.get(ruta)
+        if antes != despues:
+            diferencias.append(f"{ruta}: {antes} -> {despues}")
+    return diferencias, len(saldos_origen), cantidad_origen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra el libro XML a SQLite.")
+    parser.add_argument("--origen", default=config.LIBROS["xml"])
+    parser.add_argument("--destino", default=config.LIBROS["sqlite3"])
+    parser.add_argument(
+        "--sobrescribir",
+        action="store_true",
+        help="Reemplaza el libro SQLite si ya existe.",
+    )
+    parser.add_argument(
+        "--solo-verificar",
+        action="store_true",
+        help="No copia nada; solo compara los saldos de ambos libros.",
+    )
+    args = parser.parse_args()
+
+    try:
+        if not args.solo_verificar:
+            verificar_cola(args.origen)
+            print(f"Copiando '{args.origen}' a '{args.destino}'...")
+            copiar_libro(args.origen, args.destino, args.sobrescribir)
+        print("Verificando saldos...")
+        diferencias, cuentas, transacciones = comparar(args.origen, args.destino)
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    if diferencias:
+        print(
+            f"\n\033[91mLos libros NO coinciden "
+            f"({len(diferencias)} diferencias):\033[0m"
+        )
+        for diferencia in diferencias:
+            print(f"  - {diferencia}")
+        sys.exit(1)
+
+    if not args.solo_verificar:
+        try:
+            copiados = copiar_auxiliares(args.origen, args.destino, args.sobrescribir)
+        except OSError as e:
+            print(f"\n\033[91mERROR al copiar los archivos auxiliares: {e}\033[0m")
+            sys.exit(1)
+        for copiado in copiados:
+            print(f"Copiado '{copiado}'.")
+
+    print(
+        f"\n\033[92m¡ÉXITO! {cuentas} cuentas y {transacciones} transacciones "
+        "con saldos idénticos.\033[0m"
+    )
+    if config.BACKEND != "sqlite3":
+        print('Para usar el libro nuevo, cambia BACKEND a "sqlite3" en config.py.')
+
+
+if __name__ == "__main__":
+    main()
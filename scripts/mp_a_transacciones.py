@@ -0,0 +1,96 @@
+# mp_a_transacciones.py
+"""
+Script para CONVERTIR las actividades descargadas de Mercado Pago en
+transacciones listas para importar_lote.py.
+- Clasifica cada actividad con las reglas de config.REGLAS_MP.
+- Las que no coinciden con ninguna regla van a un archivo aparte para revisar.
+Uso:
+    python scripts/mp_a_transacciones.py [ACTIVIDADES] [--salida RUTA]
+                                         [--sin-clasificar RUTA]
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+import json
+import time
+
+import config
+from clasificador_mp import ClasificadorMP, actividad_a_transaccion
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Clasifica actividades de Mercado Pago y arma transacciones."
+    )
+    parser.add_argument(
+        "actividades",
+        nargs="?",
+        default="mercadopago_activities.jsonl",
+        help="Archivo JSONL generado por mp_transactions_retrieval.py.",
+    )
+    parser.add_argument(
+        "--salida",
+        default="mercadopago_transacciones.jsonl",
+        help="Archivo JSONL de transacciones para importar_lote.py.",
+    )
+    parser.add_argument(
+        "--sin-clasificar",
+        default="mercadopago_sin_clasificar.jsonl",
+        help="Archivo JSONL con las actividades que ninguna regla clasificó.",
+    )
+    args = parser.parse_args()
+
+    clasificador = ClasificadorMP(config.REGLAS_MP)
+    vistos = set()
+    contadores = {"clasificadas": 0, "sin_clasificar": 0, "repetidas": 0}
+    tiempo_clasificacion = 0.0
+
+    with open(args.actividades, encoding="utf-8") as entrada, open(
+        args.salida, "w", encoding="utf-8"
+    ) as salida, open(args.sin_clasificar, "w", encoding="utf-8") as pendientes:
+        for linea in entrada:
+            if not linea.strip():
+                continue
+            actividad = json.loads(linea)
+            # El archivo de descargas es de solo agregado y puede repetir IDs.
+            if actividad.get("id") in vistos:
+                contadores["repetidas"] += 1
+                continue
+            vistos.add(actividad.get("id"))
+
+            inicio = time.perf_counter()
+            try:
+                cuenta = clasificador.clasificar(actividad)
+            except ValueError as e:
+                actividad = {**actividad, "error": str(e)}
+                cuenta = None
+            tiempo_clasificacion += time.perf_counter() - inicio
+
+            if cuenta is None:
+                contadores["sin_clasificar"] += 1
+                pendientes.write(json.dumps(actividad, ensure_ascii=False) + "\n")
+                continue
+            contadores["clasificadas"] += 1
+            transaccion = actividad_a_transaccion(actividad, cuenta)
+            salida.write(json.dumps(transaccion, ensure_ascii=False) + "\n")
+
+    print(
+        f"\n\033[92m{contadores['clasificadas']} actividades clasificadas "
+        f"en {tiempo_clasificacion * 1000:.1f} ms → '{args.salida}'.\033[0m"
+    )
+    if contadores["sin_clasificar"]:
+        print(
+            f"\033[93m{contadores['sin_clasificar']} sin clasificar → "
+            f"'{args.sin_clasificar}'.\033[0m"
+        )
+    if contadores["repetidas"]:
+        print(f"Se ignoraron {contadores['repetidas']} actividades repetidas.")
+
+
+if __name__ == "__main__":
+    main()
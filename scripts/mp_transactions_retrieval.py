@@ -1,81 +1,294 @@
-import requests
+# mp_transactions_retrieval.py
+"""
+Script para DESCARGAR las actividades de Mercado Pago de forma incremental.
+- Cada página se agrega a un archivo JSONL (una actividad por línea) apenas llega.
+- Un archivo de estado guarda la última página escrita: si el script se corta,
+  la próxima ejecución retoma desde ahí.
+- Al encontrar actividades que ya estaban descargadas se detiene, de modo que
+  las sincronizaciones diarias solo piden las páginas nuevas.
+- Reutiliza una única sesión HTTP (pool de conexiones) y pide varias páginas
+  en paralelo, escribiéndolas siempre en orden.
+Uso:
+    python scripts/mp_transactions_retrieval.py [--period last_month] [--salida RUTA]
+                                                [--concurrencia N]
+"""
+import argparse
 import json
+import os
+import time
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
 
-# --- INGRESO DE DATOS ---
+BASE_URL = "https://www.mercadopago.com.ar/activities/api/activities/list"
+ARCHIVO_SALIDA = "mercadopago_activities.jsonl"
 
-# 1. Pide la cadena de texto completa de las cookies.
-COOKIE_STRING = input(
-    "🍪 Pega aquí el valor completo de la cabecera 'Cookie' y presiona Enter:\n"
-)
+# Cantidad de IDs recientes que se recuerdan para detectar el punto de corte.
+MAX_IDS_CONOCIDOS = 500
 
-# 2. Pide el token CSRF.
-CSRF_TOKEN = input( "🛡️  Pega aquí el valor de la cabecera 'x-csrf-token' y presiona Enter:\n"
-)
+# Reintentos ante límites de tasa (429) o errores del servidor (5xx).
+MAX_REINTENTOS = 5
+ESPERA_BASE = 1.0  # segundos; se duplica en cada reintento
 
-if not COOKIE_STRING.strip() or not CSRF_TOKEN.strip():
-    print("❌ Error: Debes ingresar ambos valores. El script se detendrá.")
-else:
-    base_url = "https://www.mercadopago.com.ar/activities/api/activities/list"
 
-    # Cabeceras que simulan la solicitud del navegador
-    headers = {
+class CredencialesExpiradas(Exception):
+    """El servidor rechazó la cookie o el token CSRF (401/403)."""
+
+
+def armar_headers(cookie_string, csrf_token):
+    """Cabeceras que simulan la solicitud del navegador."""
+    return {
         "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:140.0) Gecko/20100101 Firefox/140.0",
         "Accept": "application/json, text/plain, */*",
-        "x-csrf-token": CSRF_TOKEN,
-        "Cookie": COOKIE_STRING,
+        "x-csrf-token": csrf_token,
+        "Cookie": cookie_string,
         "Referer": "https://www.mercadopago.com.ar/activities",
     }
 
-    all_activities = []
-    current_page = 1  # La paginación de Mercado Pago empieza en 1
 
-    print("\n🔄 Iniciando la descarga de actividades de Mercado Pago...")
+def crear_sesion_http(headers, concurrencia=1):
+    """Sesión HTTP con un pool de conexiones del tamaño de la concurrencia."""
+    http = requests.Session()
+    http.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(concurrencia, 1))
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    return http
 
-    try:
+
+def _espera_reintento(response, intento):
+    """Respeta 'Retry-After' si viene en segundos; si no, backoff exponencial."""
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+    return ESPERA_BASE * (2**intento)
+
+
+def obtener_pagina(http, period, page, base_url=BASE_URL):
+    """Pide una página de actividades y devuelve la lista de resultados."""
+    params = {
+        "period": period,
+        "page": page,
+        "listing": "activities",
+        "useEmbeddings": "true",
+    }
+    for intento in range(MAX_REINTENTOS + 1):
+        response = http.get(base_url, params=params, timeout=20)
+        # Si el servidor responde con 401 o 403, las credenciales expiraron.
+        if response.status_code in [401, 403]:
+            raise CredencialesExpiradas()
+        if response.status_code == 429 or response.status_code >= 500:
+            if intento < MAX_REINTENTOS:
+                time.sleep(_espera_reintento(response, intento))
+                continue
+        response.raise_for_status()
+        return response.json().get("results", [])
+
+
+def _paginas_en_orden(obtener, http, period, primera, concurrencia):
+    """
+    Genera (número, actividades) en orden de página manteniendo hasta
+    'concurrencia' pedidos en vuelo. Cuando el consumidor deja de iterar,
+    se cancelan los pedidos pendientes.
+    """
+    if concurrencia <= 1:
+        page = primera
         while True:
-            params = {
-                "period": "last_week",  # Puedes cambiarlo a 'last_month', 'last_three_months', etc.
-                "page": current_page,
-                "listing": "activities",
-                "useEmbeddings": "true",
-            }
-
-            print(f"    📄 Obteniendo página {current_page}...")
-
-            response = requests.get(
-                base_url, headers=headers, params=params, timeout=20
-            )
-
-            # Si el servidor responde con 401 o 403, las credenciales expiraron.
-            if response.status_code in [401, 403]:
-                print(
-                    "\n🚨 ¡Error de autorización! Tus credenciales (cookie/token) han expirado."
-                )
-                print(
-                    "Por favor, obtén valores nuevos desde Firefox y vuelve a ejecutar el script."
-                )
-                break
+            yield page, obtener(http, period, page)
+            page += 1
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        siguiente = primera
+        en_vuelo = deque()
+        try:
+            while True:
+                while len(en_vuelo) < concurrencia:
+                    en_vuelo.append(
+                        (siguiente, executor.submit(obtener, http, period, siguiente))
+                    )
+                    siguiente += 1
+                page, futuro = en_vuelo.popleft()
+                yield page, futuro.result()
+        finally:
+            for _, futuro in en_vuelo:
+                futuro.cancel()
+
+
+def ruta_estado(ruta_salida):
+    return f"{ruta_salida}.estado.json"
+
+
+def leer_estado(ruta_salida):
+    """
+    Lee el estado de la sincronización. Si no existe pero ya hay actividades
+    descargadas, toma sus IDs como conocidos (solo ocurre una vez).
+    """
+    try:
+        with open(ruta_estado(ruta_salida), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    ids_conocidos = []
+    if os.path.exists(ruta_salida):
+        with open(ruta_salida, encoding="utf-8") as f:
+            ids_conocidos = [
+                json.loads(linea).get("id") for linea in f if linea.strip()
+            ]
+    return {"en_curso": None, "ids_conocidos": ids_conocidos}
+
 
-            response.raise_for_status()
+def guardar_estado(ruta_salida, estado):
+    """Escribe el estado de forma atómica (archivo temporal + reemplazo)."""
+    destino = ruta_estado(ruta_salida)
+    temporal = f"{destino}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, destino)
 
-            data = response.json()
-            page_activities = data.get("results", [])
+
+def agregar_actividades(archivo, actividades):
+    """Agrega las actividades al JSONL y las fuerza a disco."""
+    for actividad in actividades:
+        archivo.write(json.dumps(actividad, ensure_ascii=False) + "\n")
+    archivo.flush()
+    os.fsync(archivo.fileno())
+
+
+def descargar_actividades(
+    http, period, ruta_salida=ARCHIVO_SALIDA, obtener=None, concurrencia=1
+):
+    """
+    Descarga las actividades nuevas de 'period' agregándolas a 'ruta_salida'.
+    Mercado Pago lista de la más reciente a la más antigua, así que la descarga
+    termina al llegar a una página vacía o a una actividad ya conocida.
+    Con 'concurrencia' mayor a uno se piden varias páginas a la vez; las que
+    sobren al llegar al final simplemente se descartan.
+    Devuelve la cantidad de actividades nuevas escritas.
+    """
+    obtener = obtener or obtener_pagina
+    estado = leer_estado(ruta_salida)
+    conocidos = set(estado["ids_conocidos"])
+
+    en_curso = estado["en_curso"]
+    if en_curso and en_curso["period"] == period:
+        print(f"    ↩️  Retomando desde la página {en_curso['pagina'] + 1}...")
+    else:
+        en_curso = {"period": period, "pagina": 0, "ids_nuevos": [], "ids_pagina": []}
+
+    escritas = 0
+    paginas = _paginas_en_orden(
+        obtener, http, period, en_curso["pagina"] + 1, concurrencia
+    )
+    with open(ruta_salida, "a", encoding="utf-8") as archivo, closing(paginas):
+        for current_page, page_activities in paginas:
+            print(f"    📄 Página {current_page} recibida.")
 
             # Si la página no devuelve resultados, hemos llegado al final.
             if not page_activities:
-                print("    ✅ No se encontraron más actividades. Proceso finalizado.")
+                print("    ✅ No se encontraron más actividades.")
+                break
+
+            # Al retomar, la página puede repetir actividades de la anterior.
+            ya_escritas = set(en_curso["ids_pagina"])
+            nuevas = []
+            alcanzado = False
+            for actividad in page_activities:
+                if actividad.get("id") in conocidos:
+                    alcanzado = True
+                    break
+                if actividad.get("id") not in ya_escritas:
+                    nuevas.append(actividad)
+
+            agregar_actividades(archivo, nuevas)
+            escritas += len(nuevas)
+
+            espacio = MAX_IDS_CONOCIDOS - len(en_curso["ids_nuevos"])
+            en_curso["ids_nuevos"].extend(a.get("id") for a in nuevas[:espacio])
+            en_curso["ids_pagina"] = [a.get("id") for a in page_activities]
+            en_curso["pagina"] = current_page
+            estado["en_curso"] = en_curso
+            guardar_estado(ruta_salida, estado)
+
+            if alcanzado:
+                print("    ✅ Se alcanzaron actividades ya descargadas.")
                 break
 
-            all_activities.extend(page_activities)
-            current_page += 1
+    # Sincronización completa: las actividades nuevas pasan a ser las conocidas.
+    estado = {
+        "en_curso": None,
+        "ids_conocidos": (en_curso["ids_nuevos"] + estado["ids_conocidos"])[
+            :MAX_IDS_CONOCIDOS
+        ],
+    }
+    guardar_estado(ruta_salida, estado)
+    return escritas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Descarga incremental de actividades de Mercado Pago."
+    )
+    parser.add_argument(
+        "--period",
+        default="last_week",
+        help="Período a consultar: last_week, last_month, last_three_months, etc.",
+    )
+    parser.add_argument(
+        "--salida", default=ARCHIVO_SALIDA, help="Archivo JSONL de actividades."
+    )
+    parser.add_argument(
+        "--concurrencia",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Cantidad de páginas pedidas en paralelo (1 = de a una).",
+    )
+    args = parser.parse_args()
+
+    # --- INGRESO DE DATOS ---
+
+    # 1. Pide la cadena de texto completa de las cookies.
+    cookie_string = input(
+        "🍪 Pega aquí el valor completo de la cabecera 'Cookie' y presiona Enter:\n"
+    )
 
-        if all_activities:
-            file_name = "mercadopago_activities.json"
-            with open(file_name, "w", encoding="utf-8") as f:
-                json.dump(all_activities, f, ensure_ascii=False, indent=4)
-            print(
-                f"\n🎉 ¡Éxito! Se guardaron {len(all_activities)} actividades en el archivo '{file_name}'."
-            )
+    # 2. Pide el token CSRF.
+    csrf_token = input(
+        "🛡️  Pega aquí el valor de la cabecera 'x-csrf-token' y presiona Enter:\n"
+    )
 
+    if not cookie_string.strip() or not csrf_token.strip():
+        print("❌ Error: Debes ingresar ambos valores. El script se detendrá.")
+        return
+
+    print("\n🔄 Iniciando la descarga de actividades de Mercado Pago...")
+    try:
+        http = crear_sesion_http(
+            armar_headers(cookie_string, csrf_token), args.concurrencia
+        )
+        escritas = descargar_actividades(
+            http, args.period, args.salida, concurrencia=args.concurrencia
+        )
+        print(
+            f"\n🎉 ¡Éxito! Se agregaron {escritas} actividades nuevas a '{args.salida}'."
+        )
+    except CredencialesExpiradas:
+        print(
+            "\n🚨 ¡Error de autorización! Tus credenciales (cookie/token) han expirado."
+        )
+        print(
+            "Por favor, obtén valores nuevos desde Firefox y vuelve a ejecutar el script."
+        )
+        print("Las páginas ya descargadas quedaron guardadas; se retomará desde ahí.")
     except Exception as e:
         print(f"\n❌ Ocurrió un error inesperado: {e}")
+        print("Las páginas ya descargadas quedaron guardadas; se retomará desde ahí.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# reconstruir_huellas.py
+"""
+Script para RECONSTRUIR el índice de huellas (huellas.py) recorriendo el libro.
+Solo hace falta si el índice se borró o si se cargaron transacciones desde la
+interfaz de GnuCash que también se quieren considerar al deduplicar.
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+
+from huellas import IndiceHuellas
+
+
+def main():
+    argparse.ArgumentParser(
+        description="Reconstruye el índice de huellas recorriendo todo el libro."
+    ).parse_args()
+
+    try:
+        # Los bindings de GnuCash se cargan recién acá, así --help no los necesita.
+        from gnucash.gnucash_core import SessionOpenMode
+
+        from libro import abrir_sesion
+
+        with abrir_sesion(mode=SessionOpenMode.SESSION_READ_ONLY) as session:
+            root = session.get_book().get_root_account()
+            huellas = IndiceHuellas()
+            try:
+                cantidad = huellas.reconstruir(root)
+            finally:
+                huellas.cerrar()
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+    print(f"\n\033[92m¡ÉXITO! Índice reconstruido con {cantidad} transacciones.\033[0m")
+
+
+if __name__ == "__main__":
+    main()
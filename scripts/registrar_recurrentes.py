@@ -0,0 +1,152 @@
+# registrar_recurrentes.py
+"""
+Script para registrar las TRANSACCIONES RECURRENTES de config.RECURRENTES.
+Registra en una sola sesión todas las ocurrencias vencidas que falten desde
+la última ejecución (por ejemplo, tres meses de recargas si no se ejecutó
+antes), pidiendo el monto de las reglas que lo necesitan. La primera vez solo
+registra la del mes en curso; con --desde AAAA-MM se pone al día desde ese mes.
+Si el demonio del libro (demonio.py) está corriendo, las transacciones se le
+envían a él. Con --diferir, o si GnuCash tiene el libro abierto, quedan en la
+cola local (ver cola.py); las reglas que ponen una cuenta en cero necesitan su
+saldo y no se pueden encolar.
+Uso:
+    python scripts/registrar_recurrentes.py [--regla NOMBRE] [--hasta DD/MM/AAAA]
+                                            [--desde AAAA-MM]
+                                            [--simular] [--no-interactivo]
+                                            [--diferir]
+                                            [--profile]
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+from datetime import datetime
+
+import config
+from cola import LibroEnCola, aviso_encoladas
+from demonio import abrir_libro
+from dinero import Monto
+from instrumentacion import ejecutar_script
+from recurrentes import ejecutar
+
+
+def pedir_monto(regla, fecha):
+    while True:
+        try:
+            return Monto.de_texto(
+                input(
+                    f"Introduce el MONTO de '{regla['descripcion']}' "
+                    f"del {fecha.strftime('%d/%m/%Y')}: "
+                )
+            )
+        except ValueError as e:
+            print(f"Error: {e}. Inténtalo de nuevo.")
+
+
+def informar(regla, fecha, resultado):
+    if resultado["ajuste"] is not None:
+        print(
+            f"  {fecha.strftime('%d/%m/%Y')}  Ajuste a cero de "
+            f"${resultado['ajuste']:,.2f}"
+        )
+    print(
+        f"  {fecha.strftime('%d/%m/%Y')}  {regla['descripcion']}: "
+        f"${resultado['monto']:,.2f}"
+    )
+
+
+def seleccionar_reglas(nombres):
+    if not nombres:
+        return config.RECURRENTES
+    reglas = [r for r in config.RECURRENTES if r["nombre"] in nombres]
+    desconocidas = set(nombres) - {r["nombre"] for r in reglas}
+    if desconocidas:
+        raise ValueError(f"Reglas desconocidas: {', '.join(sorted(desconocidas))}.")
+    return reglas
+
+
+def main(reglas_por_defecto=None):
+    parser = argparse.ArgumentParser(
+        description="Registra las transacciones recurrentes pendientes."
+    )
+    parser.add_argument(
+        "--regla",
+        action="append",
+        metavar="NOMBRE",
+        help="Procesa solo esta regla (se puede repetir).",
+    )
+    parser.add_argument(
+        "--hasta",
+        help="Fecha límite DD/MM/AAAA (por defecto, hoy).",
+    )
+    parser.add_argument(
+        "--desde",
+        metavar="AAAA-MM",
+        help=(
+            "Primer mes de las reglas que nunca se ejecutaron (por defecto, el "
+            "mes de --hasta)."
+        ),
+    )
+    parser.add_argument(
+        "--simular",
+        action="store_true",
+        help="Solo muestra las ocurrencias pendientes, sin registrarlas.",
+    )
+    parser.add_argument(
+        "--no-interactivo",
+        action="store_true",
+        help="Falla en lugar de pedir montos por teclado.",
+    )
+    parser.add_argument(
+        "--diferir",
+        action="store_true",
+        help="Deja las transacciones en la cola sin abrir el libro (ver cola.py).",
+    )
+    args = parser.parse_args()
+
+    try:
+        reglas = seleccionar_reglas(args.regla or reglas_por_defecto)
+        hasta = (
+            datetime.strptime(args.hasta, "%d/%m/%Y").date() if args.hasta else None
+        )
+        desde = (
+            datetime.strptime(args.desde, "%Y-%m").strftime("%Y-%m")
+            if args.desde
+            else None
+        )
+        with abrir_libro(diferir=args.diferir) as libro:
+            procesadas = ejecutar(
+                libro,
+                reglas,
+                hasta=hasta,
+                pedir_monto=None if args.no_interactivo else pedir_monto,
+                simular=args.simular,
+                al_registrar=informar,
+                desde=desde,
+            )
+            encoladas = libro.encoladas if isinstance(libro, LibroEnCola) else 0
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    if not procesadas:
+        print("\033[92mNo hay transacciones recurrentes pendientes.\033[0m")
+    elif args.simular:
+        print("Ocurrencias pendientes:")
+        for regla, fecha in procesadas:
+            print(f"  {fecha.strftime('%d/%m/%Y')}  {regla['descripcion']}")
+    elif encoladas:
+        print(aviso_encoladas(encoladas))
+    else:
+        print(
+            f"\n\033[92m¡ÉXITO! {len(procesadas)} transacciones recurrentes "
+            "registradas.\033[0m"
+        )
+
+
+if __name__ == "__main__":
+    ejecutar_script(main)
@@ -0,0 +1,238 @@
+# reporte.py
+"""
+Script de CONSULTAS sobre el libro: saldos, totales por mes y resúmenes.
+Responde desde la caché de totales (consultas.py); solo abre el libro si la
+caché no está al día.
+Uso:
+    python scripts/reporte.py saldo CUENTA [--hasta AAAA-MM] [--sin-subcuentas]
+    python scripts/reporte.py totales CUENTA [--desde AAAA-MM] [--hasta AAAA-MM]
+    python scripts/reporte.py mensual [RAIZ] [--desde AAAA-MM] [--hasta AAAA-MM]
+    python scripts/reporte.py real [RAIZ] [--desde AAAA-MM] [--hasta AAAA-MM]
+                                   [--base AAAA-MM] [--exportar]
+    python scripts/reporte.py sueldo-real [--desde AAAA-MM] [--hasta AAAA-MM]
+                                          [--base AAAA-MM] [--exportar]
+CUENTA puede ser una clave de config.CUENTAS o una ruta completa.
+"real" y "sueldo-real" muestran los importes en pesos constantes del mes
+--base con el IPC de config.INFLACION (ver inflacion.py). Leen la exportación
+columnar de los splits (scripts/exportar_splits.py); con --exportar la
+actualizan antes.
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+
+import config
+from consultas import abrir_cache_actualizada
+from instrumentacion import contar, ejecutar_script, medir
+
+
+def imprimir_tabla(resumen):
+    """Imprime {fila: {AAAA-MM: monto}} con una columna por mes."""
+    periodos = sorted({p for meses in resumen.values() for p in meses})
+    ancho = max([len(fila) for fila in resumen] + [10])
+    print(f"{'':{ancho}}  " + "  ".join(f"{p:>14}" for p in periodos))
+    for fila in sorted(resumen):
+        meses = resumen[fila]
+        celdas = "  ".join(f"{meses.get(p, 0):>14,.2f}" for p in periodos)
+        print(f"{fila:{ancho}}  {celdas}")
+
+
+def cargar_splits(actualizar=False):
+    """Splits exportados en MONEDA_PRINCIPAL; con 'actualizar' exporta antes."""
+    from exportar import cargar, directorio_exportacion, exportacion_vigente, exportar
+    from inflacion import en_moneda_principal
+
+    if actualizar:
+        from gnucash.gnucash_core import SessionOpenMode
+
+        from libro import abrir_sesion
+
+        with abrir_sesion(mode=SessionOpenMode.SESSION_READ_ONLY) as session, medir(
+            "exportar"
+        ):
+            exportar(session.get_book().get_root_account())
+    with medir("cargar_splits"):
+        datos = cargar(columnas=("fecha", "ruta", "centavos", "moneda"))
+    if not len(datos["fecha"]):
+        raise ValueError(
+            f"No hay splits exportados en '{directorio_exportacion()}'; "
+            "usa --exportar."
+        )
+    contar("splits_cargados", len(datos["fecha"]))
+    if not actualizar and not exportacion_vigente():
+        print(
+            "\033[93mLa exportación de splits es anterior a la última modificación "
+            "del libro; usa --exportar para incluir los cambios.\033[0m"
+        )
+    return en_moneda_principal(datos)
+
+
+def _en_periodo(meses, desde, hasta):
+    return [
+        i
+        for i, mes in enumerate(meses)
+        if (not desde or mes >= desde) and (not hasta or mes <= hasta)
+    ]
+
+
+def avisar_sin_publicar(indice, datos):
+    sin_publicar = indice.sin_publicar(datos["fecha"])
+    if sin_publicar:
+        print(
+            f"\033[93m{sin_publicar} splits son posteriores al último IPC "
+            f"({indice.ultimo}) y usan ese valor.\033[0m"
+        )
+
+
+def reporte_real(args):
+    from inflacion import IndicePrecios, resumen_real
+
+    datos = cargar_splits(args.exportar)
+    indice = IndicePrecios.de_archivo()
+    base = args.base or str(indice.ultimo)
+    raiz = config.CUENTAS.get(args.raiz, args.raiz)
+    with medir("deflactar"):
+        categorias, meses, matriz = resumen_real(datos, indice, raiz, args.nivel, base)
+    columnas = _en_periodo(meses.tolist(), args.desde, args.hasta)
+    print(f"\033[94m--- {raiz} EN PESOS DE {base} ---\033[0m")
+    resumen = {
+        categoria: {meses[j]: matriz[i, j] / 100 for j in columnas}
+        for i, categoria in enumerate(categorias.tolist())
+    }
+    resumen["TOTAL"] = {meses[j]: matriz[:, j].sum() / 100 for j in columnas}
+    imprimir_tabla(resumen)
+    avisar_sin_publicar(indice, datos)
+
+
+def reporte_sueldo_real(args):
+    from inflacion import IndicePrecios, sueldo_contra_gastos
+
+    datos = cargar_splits(args.exportar)
+    indice = IndicePrecios.de_archivo()
+    base = args.base or str(indice.ultimo)
+    with medir("deflactar"):
+        meses, sueldo, gastos = sueldo_contra_gastos(datos, indice, base=base)
+    filas = _en_periodo(meses.tolist(), args.desde, args.hasta)
+    print(f"\033[94m--- SUELDO Y GASTOS EN PESOS DE {base} ---\033[0m")
+    print(
+        f"  {'Mes':7} {'Sueldo':>16} {'Gastos':>16} {'Diferencia':>16} "
+        f"{'Gastado':>8}"
+    )
+    for i in filas:
+        gastado = f"{gastos[i] / sueldo[i]:>8.1%}" if sueldo[i] else f"{'-':>8}"
+        print(
+            f"  {meses[i]:7} {sueldo[i] / 100:>16,.2f} {gastos[i] / 100:>16,.2f} "
+            f"{(sueldo[i] - gastos[i]) / 100:>16,.2f} {gastado}"
+        )
+    if filas:
+        total_sueldo, total_gastos = sueldo[filas].sum(), gastos[filas].sum()
+        gastado = (
+            f"{total_gastos / total_sueldo:>8.1%}" if total_sueldo else f"{'-':>8}"
+        )
+        print(
+            f"  {'Total':7} {total_sueldo / 100:>16,.2f} {total_gastos / 100:>16,.2f} "
+            f"{(total_sueldo - total_gastos) / 100:>16,.2f} {gastado}"
+        )
+    avisar_sin_publicar(indice, datos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas sobre el libro.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_saldo = sub.add_parser("saldo", help="Saldo de una cuenta.")
+    p_saldo.add_argument("cuenta")
+    p_saldo.add_argument("--hasta", help="Último mes incluido (AAAA-MM).")
+    p_saldo.add_argument(
+        "--sin-subcuentas", action="store_true", help="Excluye las subcuentas."
+    )
+
+    p_totales = sub.add_parser("totales", help="Movimientos de una cuenta por mes.")
+    p_totales.add_argument("cuenta")
+    p_totales.add_argument("--desde", help="Primer mes (AAAA-MM).")
+    p_totales.add_argument("--hasta", help="Último mes (AAAA-MM).")
+
+    p_mensual = sub.add_parser("mensual", help="Resumen mensual por subcuenta.")
+    p_mensual.add_argument("raiz", nargs="?", default="Gastos")
+    p_mensual.add_argument("--desde", help="Primer mes (AAAA-MM).")
+    p_mensual.add_argument("--hasta", help="Último mes (AAAA-MM).")
+    p_mensual.add_argument(
+        "--nivel", type=int, default=1, help="Niveles por debajo de la raíz."
+    )
+
+    p_real = sub.add_parser("real", help="Resumen mensual en pesos constantes.")
+    p_real.add_argument("raiz", nargs="?", default=config.INFLACION["gastos"])
+    p_real.add_argument(
+        "--nivel", type=int, default=1, help="Niveles por debajo de la raíz."
+    )
+    p_sueldo = sub.add_parser(
+        "sueldo-real", help="Sueldo contra gastos en pesos constantes."
+    )
+    for p in (p_real, p_sueldo):
+        p.add_argument("--desde", help="Primer mes (AAAA-MM).")
+        p.add_argument("--hasta", help="Último mes (AAAA-MM).")
+        p.add_argument(
+            "--base", help="Mes de los pesos constantes (por defecto, el último IPC)."
+        )
+        p.add_argument(
+            "--exportar",
+            action="store_true",
+            help="Actualiza la exportación de splits antes del reporte.",
+        )
+    args = parser.parse_args()
+
+    if args.comando in ("real", "sueldo-real"):
+        try:
+            if args.comando == "real":
+                reporte_real(args)
+            else:
+                reporte_sueldo_real(args)
+        except Exception as e:
+            print(f"\n\033[91mERROR: {e}\033[0m")
+            sys.exit(1)
+        return
+
+    try:
+        cache = abrir_cache_actualizada()
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    try:
+        if args.comando == "saldo":
+            ruta = config.CUENTAS.get(args.cuenta, args.cuenta)
+            saldos = cache.saldos_por_moneda(
+                ruta, args.hasta, subarbol=not args.sin_subcuentas
+            )
+            if not saldos:
+                print(f"{ruta}: $0.00")
+            # Un subárbol con varios commodities se muestra por separado.
+            for moneda, saldo in sorted(saldos.items()):
+                if moneda == config.MONEDA_PRINCIPAL:
+                    print(f"{ruta}: ${saldo:,.2f}")
+                else:
+                    print(f"{ruta}: {saldo:,} {moneda}")
+        elif args.comando == "totales":
+            ruta = config.CUENTAS.get(args.cuenta, args.cuenta)
+            imprimir_tabla(
+                {ruta: cache.totales_por_periodo(ruta, args.desde, args.hasta)}
+            )
+        elif args.comando == "mensual":
+            raiz = config.CUENTAS.get(args.raiz, args.raiz)
+            imprimir_tabla(
+                cache.resumen_mensual(raiz, args.desde, args.hasta, args.nivel)
+            )
+    except ValueError as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+    finally:
+        cache.cerrar()
+
+
+if __name__ == "__main__":
+    ejecutar_script(main)
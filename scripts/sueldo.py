@@ -4,6 +4,16 @@
 Script inteligente para registrar el sueldo.
 - Modo Automático: Procesa los datos pasados como argumentos.
 - Modo Interactivo: Guía al usuario si no se pasan argumentos.
+- Modo Historial: Registra (o simula) todos los meses de un CSV en una sola
+  sesión. Con --sin / --hasta simula escenarios sobre las deducciones.
+Los cálculos los hace el motor de nomina.py.
+Si el demonio del libro (demonio.py) está corriendo, el recibo se le envía a él;
+con --diferir, o si GnuCash tiene el libro abierto, queda en la cola (cola.py).
+Uso:
+    python scripts/sueldo.py [BRUTO | NETO BASE_AGUINALDO] [--simular] [--diferir]
+    python scripts/sueldo.py --historial CSV [--simular] [--diferir]
+                             [--sin DEDUCCION] [--hasta DEDUCCION=AAAA-MM]
+Con --profile se guarda además el perfil de cProfile (ver instrumentacion.py).
 """
 
 import sys
@@ -13,16 +23,20 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
 sys.path.insert(0, project_root)
 
+import argparse
+import time
 from datetime import datetime
-import gnucash
-from gnucash.gnucash_core import gnc_numeric_from_string, SessionOpenMode
-from decimal import Decimal, ROUND_HALF_UP
 
-import config
-from gnucash_utils import parse_decimal, find_account_by_path
-
-# Constante para el redondeo a 2 decimales
-DOS_DECIMALES = Decimal("0.01")
+from cola import aviso_encoladas
+from demonio import abrir_libro
+from dinero import Monto
+from instrumentacion import contar, ejecutar_script, medir
+from nomina import (
+    PlanDeducciones,
+    calcular_historial,
+    leer_historial,
+    recibo_a_registro,
+)
 
 
 def get_respuesta_si_no(pregunta):
@@ -33,191 +47,232 @@ def get_respuesta_si_no(pregunta):
         print("Respuesta no válida. Por favor, introduce 's' o 'n'.")
 
 
-def get_monto_usuario(pregunta):
+def get_monto_usuario(pregunta) -> Monto:
     while True:
         try:
             monto_str = input(pregunta)
-            return parse_decimal(monto_str)
+            return Monto.de_texto(monto_str)
         except ValueError as e:
             print(f"Error: {e}. Inténtalo de nuevo.")
 
 
-def run_transaction_logic(sueldo_bruto, aguinaldo_bruto):
-    session = None
-    tx = None
-    try:
-        session = gnucash.Session(
-            config.FILE_URI, mode=SessionOpenMode.SESSION_NORMAL_OPEN
-        )
-        book = session.get_book()
-        root = book.get_root_account()
-        cuentas = {
-            key: find_account_by_path(root, path)
-            for key, path in config.CUENTAS.items()
-        }
-        for key, cta in cuentas.items():
-            if not cta:
-                raise Exception(
-                    f"FATAL: La cuenta '{key}' con ruta '{config.CUENTAS[key]}' no fue encontrada."
-                )
+def imprimir_recibo(recibo):
+    print(f"  - Sueldo Bruto: ${Monto(recibo['sueldo_bruto']):,.2f}")
+    if recibo["aguinaldo_bruto"]:
+        print(f"  - Aguinaldo Bruto: ${Monto(recibo['aguinaldo_bruto']):,.2f}")
+    for nombre, _, centavos in recibo["deducciones"]:
+        print(f"  - {nombre}: ${Monto(centavos):,.2f}")
+    print(f"  - Neto a Banco (Calculado): ${Monto(recibo['neto']):,.2f}")
 
-        bruto_total = sueldo_bruto + aguinaldo_bruto
 
-        tx = gnucash.Transaction(book)
-        tx.BeginEdit()
+def verificar_cuentas_recibo(libro, *registros):
+    cuentas = {s["cuenta"] for registro in registros for s in registro["splits"]}
+    faltantes = libro.verificar_cuentas(sorted(cuentas))
+    if faltantes:
+        raise Exception(
+            f"FATAL: Las cuentas {', '.join(faltantes)} no fueron encontradas "
+            "en el libro."
+        )
 
-        # --- CORRECCIÓN 2: Asignar la moneda a la transacción ---
-        currency = book.get_table().lookup("ISO4217", config.MONEDA_PRINCIPAL)
-        tx.SetCurrency(currency)
 
-        tx.SetDate(datetime.now().day, datetime.now().month, datetime.now().year)
-        tx.SetDescription(
-            f"Sueldo {datetime.now().strftime('%B %Y')}{' con Aguinaldo' if aguinaldo_bruto > 0 else ''}"
-        )
+def run_transaction_logic(recibo, simular=False, diferir=False):
+    try:
+        registro = recibo_a_registro(recibo, datetime.now())
+        with abrir_libro(simular=simular, diferir=diferir) as libro:
+            verificar_cuentas_recibo(libro, registro)
+            resultado = libro.publicar(registro)
+            if resultado["estado"] == "duplicada":
+                raise Exception("Este recibo de sueldo ya estaba registrado.")
 
-        # Splits de Ingresos (Créditos)
-        split_ing_sueldo = gnucash.Split(book)
-        split_ing_sueldo.SetParent(tx)
-        split_ing_sueldo.SetAccount(cuentas["ingreso_sueldo"])
-        split_ing_sueldo.SetValue(gnc_numeric_from_string(str(-sueldo_bruto)))
-
-        if aguinaldo_bruto > 0:
-            split_ing_agui = gnucash.Split(book)
-            split_ing_agui.SetParent(tx)
-            split_ing_agui.SetAccount(cuentas["ingreso_aguinaldo"])
-            split_ing_agui.SetValue(gnc_numeric_from_string(str(-aguinaldo_bruto)))
-
-        # Splits de Deducciones y Neto (Débitos)
-        neto_calculado = bruto_total
-        for d in config.DEDUCCIONES:
-            monto_deduccion = Decimal("0")
-            if d["tipo"] == "fijo":
-                monto_deduccion = Decimal(str(d["valor"]))
-            elif d["tipo"] == "porcentaje":
-                # --- CORRECCIÓN 1: Redondear el cálculo ---
-                monto_deduccion = (
-                    bruto_total * (Decimal(str(d["valor"])) / Decimal("100"))
-                ).quantize(DOS_DECIMALES, rounding=ROUND_HALF_UP)
-
-            split_deduccion = gnucash.Split(book)
-            split_deduccion.SetParent(tx)
-            split_deduccion.SetAccount(cuentas[d["cuenta_destino"]])
-            split_deduccion.SetValue(gnc_numeric_from_string(str(monto_deduccion)))
-            neto_calculado -= monto_deduccion
-
-        # --- CORRECCIÓN 1: Redondear el neto final ---
-        neto_calculado = neto_calculado.quantize(DOS_DECIMALES, rounding=ROUND_HALF_UP)
-
-        split_neto_banco = gnucash.Split(book)
-        split_neto_banco.SetParent(tx)
-        split_neto_banco.SetAccount(cuentas["banco_sueldo"])
-        split_neto_banco.SetValue(gnc_numeric_from_string(str(neto_calculado)))
-
-        tx.CommitEdit()
-        print("\n\033[92m¡ÉXITO! Recibo de sueldo registrado correctamente.\033[0m")
-        print(f"  - Sueldo Bruto: ${sueldo_bruto:,.2f}")
-        if aguinaldo_bruto > 0:
-            print(f"  - Aguinaldo Bruto: ${aguinaldo_bruto:,.2f}")
-        print(f"  - Neto a Banco (Calculado): ${neto_calculado:,.2f}")
+        if simular:
+            print("\nSimulación: no se registraron cambios en el libro.")
+        elif resultado["estado"] == "encolada":
+            print(aviso_encoladas(1, "recibo"))
+        else:
+            print(
+                "\n\033[92m¡ÉXITO! Recibo de sueldo registrado correctamente.\033[0m"
+            )
+        imprimir_recibo(recibo)
 
     except Exception as e:
         print(f"\n\033[91mERROR: {e}\033[0m")
-        if tx and tx.IsInEdit():
-            tx.RollbackEdit()
-            print("Se revirtieron los cambios en la transacción.")
-    finally:
-        if session:
-            session.save()
-            session.end()
-            print("\nLibro guardado y sesión cerrada.")
+        print("No se registraron cambios en el libro.")
+
+
+def registrar_historial(recibos, diferir=False):
+    """Registra todos los recibos en una única sesión (o a través del demonio)."""
+    registros = [recibo_a_registro(recibo) for recibo in recibos]
+    estados = {"registrada": 0, "duplicada": 0, "encolada": 0}
+    with abrir_libro(diferir=diferir) as libro:
+        verificar_cuentas_recibo(libro, *registros)
+        for registro in registros:
+            estados[libro.publicar(registro)["estado"]] += 1
+    registrados, duplicados = estados["registrada"], estados["duplicada"]
+    if estados["encolada"]:
+        print(aviso_encoladas(estados["encolada"], "recibos"))
+    else:
+        print(f"\n\033[92m¡ÉXITO! {registrados} recibos registrados.\033[0m")
+    if duplicados:
+        print(f"Se omitieron {duplicados} meses que ya estaban registrados.")
+
+
+def simular_historial(recibos, escenario=None):
+    """
+    Imprime el neto de cada mes y, si hay un escenario, el neto que habría
+    resultado con los mismos brutos y las deducciones del escenario.
+    """
+    encabezado = f"{'Período':8}  {'Bruto':>15}  {'Deducciones':>15}  {'Neto':>15}"
+    if escenario:
+        encabezado += f"  {'Neto escenario':>15}  {'Diferencia':>15}"
+    print(f"\n\033[94m{encabezado}\033[0m")
+    total_neto = total_escenario = 0
+    for recibo in recibos:
+        bruto = recibo["sueldo_bruto"] + recibo["aguinaldo_bruto"]
+        linea = (
+            f"{recibo['periodo']:8}  {Monto(bruto):>15,.2f}  "
+            f"{Monto(bruto - recibo['neto']):>15,.2f}  {Monto(recibo['neto']):>15,.2f}"
+        )
+        total_neto += recibo["neto"]
+        if escenario:
+            neto = escenario.recibo(
+                recibo["periodo"], recibo["sueldo_bruto"], recibo["aguinaldo_bruto"]
+            )["neto"]
+            total_escenario += neto
+            linea += f"  {Monto(neto):>15,.2f}  {Monto(neto - recibo['neto']):>15,.2f}"
+        print(linea)
+    total = f"{'Total':8}  {'':>15}  {'':>15}  {Monto(total_neto):>15,.2f}"
+    if escenario:
+        total += (
+            f"  {Monto(total_escenario):>15,.2f}"
+            f"  {Monto(total_escenario - total_neto):>15,.2f}"
+        )
+    print(total)
+
+
+def armar_escenario(plan, sin, hasta):
+    """Plan modificado según --sin y --hasta, o None si no se pidió ninguno."""
+    if not sin and not hasta:
+        return None
+    cambios = {}
+    for cambio in hasta:
+        nombre, separador, periodo = cambio.rpartition("=")
+        if not separador:
+            raise ValueError(f"'{cambio}' no es válido. Usa NOMBRE=AAAA-MM.")
+        cambios[nombre] = {"hasta": periodo}
+    return plan.modificado(sin=sin, cambios=cambios)
 
 
 def main():
-    num_args = len(sys.argv)
-    if num_args > 1:
+    parser = argparse.ArgumentParser(
+        description="Registra el recibo de sueldo del mes o un historial completo.",
+        epilog="Sin argumentos pregunta los datos de forma interactiva.",
+    )
+    parser.add_argument(
+        "montos",
+        nargs="*",
+        metavar="MONTO",
+        help="BRUTO para un sueldo normal, o NETO BASE_AGUINALDO con aguinaldo.",
+    )
+    parser.add_argument(
+        "--historial",
+        metavar="CSV",
+        help="Historial de sueldos (periodo, bruto o neto, fecha, base_aguinaldo).",
+    )
+    parser.add_argument(
+        "--simular",
+        action="store_true",
+        help="Solo muestra el recibo (o los del historial) sin cargar el libro.",
+    )
+    parser.add_argument(
+        "--diferir",
+        action="store_true",
+        help="Deja las transacciones en la cola sin abrir el libro (ver cola.py).",
+    )
+    parser.add_argument(
+        "--sin",
+        action="append",
+        default=[],
+        metavar="DEDUCCION",
+        help="Escenario: simula sin esta deducción (se puede repetir).",
+    )
+    parser.add_argument(
+        "--hasta",
+        action="append",
+        default=[],
+        metavar="DEDUCCION=AAAA-MM",
+        help="Escenario: la deducción se aplica solo hasta ese mes.",
+    )
+    args = parser.parse_args()
+
+    plan = PlanDeducciones()
+    periodo = datetime.now().strftime("%Y-%m")
+
+    if args.historial:
         try:
-            if num_args == 2:
-                print("--- Modo Automático: Sueldo Normal ---")
-                sueldo_bruto = parse_decimal(sys.argv[1])
-                aguinaldo_bruto = Decimal("0")
-                run_transaction_logic(sueldo_bruto, aguinaldo_bruto)
-            elif num_args == 3:
-                print("--- Modo Automático: Sueldo + Aguinaldo ---")
-                neto_recibido = parse_decimal(sys.argv[1])
-                base_aguinaldo = parse_decimal(sys.argv[2])
-                deducciones_fijas = sum(
-                    Decimal(str(d["valor"]))
-                    for d in config.DEDUCCIONES
-                    if d["tipo"] == "fijo"
-                )
-                porcentaje_deducciones = sum(
-                    Decimal(str(d["valor"]))
-                    for d in config.DEDUCCIONES
-                    if d["tipo"] == "porcentaje"
-                ) / Decimal("100")
-                bruto_total = (neto_recibido + deducciones_fijas) / (
-                    Decimal("1") - porcentaje_deducciones
+            inicio = time.perf_counter()
+            with medir("calcular_historial"):
+                recibos = calcular_historial(plan, leer_historial(args.historial))
+            contar("recibos_calculados", len(recibos))
+            escenario = armar_escenario(plan, args.sin, args.hasta)
+            if args.simular or escenario:
+                simular_historial(recibos, escenario)
+                print(
+                    f"\n{len(recibos)} recibos calculados en "
+                    f"{time.perf_counter() - inicio:.3f} s."
                 )
+            else:
+                registrar_historial(recibos, args.diferir)
+        except Exception as e:
+            print(f"\n\033[91mERROR: {e}\033[0m")
+            sys.exit(1)
+        return
 
-                # --- CORRECCIÓN 1: Redondear todos los cálculos iniciales ---
-                aguinaldo_bruto = (
-                    base_aguinaldo
-                    * (Decimal(str(config.PORCENTAJE_AGUINALDO)) / Decimal("100"))
-                ).quantize(DOS_DECIMALES, rounding=ROUND_HALF_UP)
-                sueldo_bruto = (bruto_total - aguinaldo_bruto).quantize(
-                    DOS_DECIMALES, rounding=ROUND_HALF_UP
+    if args.montos:
+        try:
+            if len(args.montos) == 1:
+                print("--- Modo Automático: Sueldo Normal ---")
+                sueldo_bruto = Monto.de_texto(args.montos[0])
+                recibo = plan.recibo(periodo, sueldo_bruto.unidades)
+            elif len(args.montos) == 2:
+                print("--- Modo Automático: Sueldo + Aguinaldo ---")
+                neto_recibido = Monto.de_texto(args.montos[0])
+                base_aguinaldo = Monto.de_texto(args.montos[1])
+                recibo = plan.recibo_desde_neto(
+                    periodo, neto_recibido.unidades, base_aguinaldo.unidades
                 )
-
-                run_transaction_logic(sueldo_bruto, aguinaldo_bruto)
             else:
                 print("Error: Número incorrecto de argumentos.")
                 sys.exit(1)
-        except (ValueError, IndexError) as e:
+        except ValueError as e:
             print(f"Error en los argumentos: {e}")
             sys.exit(1)
+        run_transaction_logic(recibo, args.simular, args.diferir)
+        return
+
+    # Modo interactivo
+    mes_actual = datetime.now().month
+    es_mes_aguinaldo = mes_actual in [6, 7, 12]
+    registrar_con_aguinaldo = False
+    if es_mes_aguinaldo:
+        respuesta = get_respuesta_si_no(
+            "¿El sueldo a registrar incluye aguinaldo? (s/n): "
+        )
+        registrar_con_aguinaldo = respuesta == "s"
+    if registrar_con_aguinaldo:
+        neto_recibido = get_monto_usuario(
+            "Introduce el MONTO NETO TOTAL que recibiste: "
+        )
+        base_aguinaldo = get_monto_usuario(
+            "Introduce el MEJOR SUELDO BRUTO del semestre: "
+        )
+        recibo = plan.recibo_desde_neto(
+            periodo, neto_recibido.unidades, base_aguinaldo.unidades
+        )
     else:
-        # El modo interactivo sigue la misma lógica de redondeo
-        mes_actual = datetime.now().month
-        es_mes_aguinaldo = mes_actual in [6, 7, 12]
-        registrar_con_aguinaldo = False
-        if es_mes_aguinaldo:
-            respuesta = get_respuesta_si_no(
-                "¿El sueldo a registrar incluye aguinaldo? (s/n): "
-            )
-            registrar_con_aguinaldo = respuesta == "s"
-        if registrar_con_aguinaldo:
-            neto_recibido = get_monto_usuario(
-                "Introduce el MONTO NETO TOTAL que recibiste: "
-            )
-            base_aguinaldo = get_monto_usuario(
-                "Introduce el MEJOR SUELDO BRUTO del semestre: "
-            )
-            deducciones_fijas = sum(
-                Decimal(str(d["valor"]))
-                for d in config.DEDUCCIONES
-                if d["tipo"] == "fijo"
-            )
-            porcentaje_deducciones = sum(
-                Decimal(str(d["valor"]))
-                for d in config.DEDUCCIONES
-                if d["tipo"] == "porcentaje"
-            ) / Decimal("100")
-            bruto_total = (neto_recibido + deducciones_fijas) / (
-                Decimal("1") - porcentaje_deducciones
-            )
-            aguinaldo_bruto = (
-                base_aguinaldo
-                * (Decimal(str(config.PORCENTAJE_AGUINALDO)) / Decimal("100"))
-            ).quantize(DOS_DECIMALES, rounding=ROUND_HALF_UP)
-            sueldo_bruto = (bruto_total - aguinaldo_bruto).quantize(
-                DOS_DECIMALES, rounding=ROUND_HALF_UP
-            )
-            run_transaction_logic(sueldo_bruto, aguinaldo_bruto)
-        else:
-            sueldo_bruto = get_monto_usuario("Introduce el MONTO BRUTO de tu sueldo: ")
-            aguinaldo_bruto = Decimal("0")
-            run_transaction_logic(sueldo_bruto, aguinaldo_bruto)
+        sueldo_bruto = get_monto_usuario("Introduce el MONTO BRUTO de tu sueldo: ")
+        recibo = plan.recibo(periodo, sueldo_bruto.unidades)
+    run_transaction_logic(recibo, args.simular, args.diferir)
 
 
 if __name__ == "__main__":
-    main()
+    ejecutar_script(main)
@@ -0,0 +1,244 @@
+# tarjetas_credito.py
+"""
+Script de las TARJETAS DE CRÉDITO (ver tarjetas.py y config.TARJETAS).
+- compra: registra una compra en cuotas; todas las cuotas futuras se generan
+  de una vez, cada una en el resumen que le corresponde.
+- importar: lo mismo para todas las compras de un CSV (fecha, tarjeta,
+  descripcion, cuenta, monto, cuotas, id), en una única sesión.
+- proyectar: deuda de cada tarjeta al cierre de los próximos resúmenes, con
+  los consumos, las cuotas y los pagos de cada ciclo.
+Uso:
+    python scripts/tarjetas_credito.py compra TARJETA MONTO CUOTAS
+                                      --cuenta CUENTA --descripcion TEXTO
+                                      [--fecha DD/MM/AAAA] [--id ID]
+                                      [--simular | --diferir]
+    python scripts/tarjetas_credito.py importar CSV [--simular | --diferir]
+    python scripts/tarjetas_credito.py proyectar [--tarjeta TARJETA ...]
+                                         [--desde AAAA-MM] [--ciclos N]
+Con --diferir, o si GnuCash tiene el libro abierto, las cuotas quedan en la
+cola local (ver cola.py).
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+from datetime import date, datetime
+
+import config
+from dinero import Monto
+from instrumentacion import contar, ejecutar_script, medir
+from tarjetas import (
+    CalendarioTarjeta,
+    ciclo_de_mes,
+    leer_compras,
+    movimientos_de_cuentas,
+    plan_de_cuotas,
+    proyectar,
+    registros_de_compra,
+)
+
+
+def mostrar_plan(compra, plan):
+    print(
+        f"\033[94m{compra['fecha']:%d/%m/%Y} {compra['descripcion']} "
+        f"({compra['tarjeta']}, {len(plan)} cuotas de ${plan[-1]['monto']:,.2f})"
+        "\033[0m"
+    )
+    for cuota in plan:
+        print(
+            f"  {cuota['numero']:>3}/{len(plan):<3} {cuota['fecha']:%d/%m/%Y}  "
+            f"${cuota['monto']:>14,.2f}  cierre {cuota['cierre']:%d/%m/%Y}, "
+            f"vence {cuota['vencimiento']:%d/%m/%Y}"
+        )
+
+
+def registrar_compras(compras, errores, args):
+    """Registra las cuotas de todas las compras en una única sesión."""
+    from cola import aviso_encoladas
+    from demonio import abrir_libro
+    from importador import escribir_rechazo, importar
+
+    calendarios = {nombre: CalendarioTarjeta(nombre) for nombre in config.TARJETAS}
+    registros = []
+    with medir("generar_cuotas"):
+        for compra in compras:
+            plan = plan_de_cuotas(compra, calendarios[compra["tarjeta"]])
+            mostrar_plan(compra, plan)
+            registros.extend(
+                (compra["linea"], registro)
+                for registro in registros_de_compra(compra, plan)
+            )
+    contar("cuotas_generadas", len(registros))
+
+    try:
+        with abrir_libro(simular=args.simular, diferir=args.diferir) as libro, open(
+            args.rechazos, "w", encoding="utf-8"
+        ) as rechazos:
+            resumen = importar(libro, registros, rechazos)
+            for linea, error in errores:
+                escribir_rechazo(rechazos, linea, None, error)
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    if args.simular:
+        print(f"\n{resumen['registradas']} cuotas válidas (simulación).")
+    elif resumen["encoladas"]:
+        print(aviso_encoladas(resumen["encoladas"], "cuotas"))
+    else:
+        print(f"\n\033[92m¡ÉXITO! {resumen['registradas']} cuotas registradas.\033[0m")
+    if resumen["duplicadas"]:
+        print(f"Se omitieron {resumen['duplicadas']} cuotas ya registradas.")
+    rechazadas = resumen["rechazadas"] + len(errores)
+    if rechazadas:
+        print(
+            f"\033[93m{rechazadas} filas rechazadas; revisa '{args.rechazos}'.\033[0m"
+        )
+
+
+def mostrar_proyeccion(args):
+    from gnucash.gnucash_core import SessionOpenMode
+
+    from libro import abrir_sesion
+
+    nombres = args.tarjeta or list(config.TARJETAS)
+    desconocidas = [n for n in nombres if n not in config.TARJETAS]
+    if desconocidas:
+        raise ValueError(f"Tarjetas desconocidas: {', '.join(desconocidas)}.")
+    hoy = date.today()
+    with abrir_sesion(mode=SessionOpenMode.SESSION_READ_ONLY) as session:
+        root = session.get_book().get_root_account()
+        with medir("leer_movimientos"):
+            movimientos = {
+                nombre: movimientos_de_cuentas(root, config.TARJETAS[nombre]["cuentas"])
+                for nombre in nombres
+            }
+
+    for nombre in nombres:
+        calendario = CalendarioTarjeta(nombre)
+        desde = (
+            ciclo_de_mes(*map(int, args.desde.split("-")))
+            if args.desde
+            else calendario.ciclo(hoy)
+        )
+        with medir("proyectar"):
+            ciclos, cuentas = proyectar(
+                movimientos[nombre], calendario, desde, args.ciclos
+            )
+        for ruta, resultado in cuentas.items():
+            contar("splits_proyectados", len(movimientos[nombre][ruta][0]))
+            if not resultado["inicial"] and not resultado["saldo"].any():
+                continue
+            print(f"\n\033[94m--- {nombre.upper()}: {ruta} ---\033[0m")
+            print(
+                f"  {'Cierre':10} {'Vence':10} {'Consumos':>14} {'En cuotas':>14} "
+                f"{'Pagos':>14} {'Saldo':>16}"
+            )
+            print(
+                f"  {'Saldo anterior':<21} {'':>14} {'':>14} {'':>14} "
+                f"{Monto(resultado['inicial']):>16,.2f}"
+            )
+            for i, cierre in enumerate(ciclos.cierres):
+                valores = [
+                    resultado[clave][i].item()
+                    for clave in ("cargos", "marcados", "pagos")
+                ]
+                print(
+                    f"  {cierre:%d/%m/%Y} {ciclos.vencimientos[i]:%d/%m/%Y} "
+                    + " ".join(f"{Monto(v):>14,.2f}" for v in valores)
+                    + f" {Monto(resultado['saldo'][i].item()):>16,.2f}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compras en cuotas y resúmenes.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_compra = sub.add_parser("compra", help="Registra una compra en cuotas.")
+    p_compra.add_argument("tarjeta", choices=list(config.TARJETAS))
+    p_compra.add_argument("monto", help="Monto total de la compra.")
+    p_compra.add_argument("cuotas", type=int, help="Cantidad de cuotas.")
+    p_compra.add_argument(
+        "--cuenta", required=True, help="Cuenta del gasto (clave o ruta)."
+    )
+    p_compra.add_argument("--descripcion", required=True)
+    p_compra.add_argument("--fecha", help="Fecha de la compra (por defecto, hoy).")
+    p_compra.add_argument("--id", help="Identificador de la compra para el libro.")
+
+    p_importar = sub.add_parser("importar", help="Registra las compras de un CSV.")
+    p_importar.add_argument("archivo", help="CSV de compras en cuotas.")
+
+    for p in (p_compra, p_importar):
+        p.add_argument(
+            "--rechazos",
+            default="tarjetas.rechazos.jsonl",
+            help="Archivo JSONL con las cuotas que no se pudieron registrar.",
+        )
+        p.add_argument(
+            "--simular",
+            action="store_true",
+            help="Muestra las cuotas sin cargar el libro.",
+        )
+        p.add_argument(
+            "--diferir",
+            action="store_true",
+            help="Deja las cuotas en la cola sin abrir el libro (ver cola.py).",
+        )
+
+    p_proyectar = sub.add_parser("proyectar", help="Deuda de los próximos resúmenes.")
+    p_proyectar.add_argument(
+        "--tarjeta",
+        action="append",
+        default=None,
+        help="Tarjeta a proyectar; se puede repetir. Por defecto, todas.",
+    )
+    p_proyectar.add_argument(
+        "--desde", help="Mes del primer cierre, AAAA-MM (por defecto, el actual)."
+    )
+    p_proyectar.add_argument(
+        "--ciclos", type=int, default=12, help="Cantidad de resúmenes (12)."
+    )
+    args = parser.parse_args()
+
+    if args.comando == "proyectar":
+        try:
+            mostrar_proyeccion(args)
+        except Exception as e:
+            print(f"\n\033[91mERROR: {e}\033[0m")
+            sys.exit(1)
+        return
+
+    try:
+        if args.comando == "compra":
+            from importador import parse_fecha
+
+            if args.cuotas < 1:
+                raise ValueError("La cantidad de cuotas tiene que ser al menos 1.")
+            compras = [
+                {
+                    "linea": 1,
+                    "tarjeta": args.tarjeta,
+                    "fecha": parse_fecha(args.fecha) if args.fecha else datetime.now(),
+                    "descripcion": args.descripcion,
+                    "cuenta": args.cuenta,
+                    "monto": Monto.de_texto(args.monto),
+                    "cuotas": args.cuotas,
+                    "id": args.id,
+                }
+            ]
+            errores = []
+        else:
+            with medir("leer_compras"):
+                compras, errores = leer_compras(args.archivo)
+    except (OSError, ValueError) as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+    registrar_compras(compras, errores, args)
+
+
+if __name__ == "__main__":
+    ejecutar_script(main)
@@ -0,0 +1,94 @@
+# vaciar_cola.py
+"""
+Script para VACIAR la cola local de transacciones (ver cola.py).
+Registra todas las transacciones encoladas mientras el libro no estaba
+disponible (o con --diferir) en una única sesión, con un solo guardado.
+Las que no se pueden registrar se agregan con su error al archivo de
+rechazos (por defecto, el de cola.ruta_rechazos, junto al libro), que
+conserva los de vaciados anteriores; las que ya estaban en el libro se
+omiten. La cola se vacía solo después de
+guardar el libro: si GnuCash todavía lo tiene abierto no se toca nada.
+Uso:
+    python scripts/vaciar_cola.py [--rechazos RUTA] [--simular]
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+
+from cola import abrir_cola, aplicar, leer_cola, ruta_cola, ruta_rechazos, vaciar
+from demonio import ClienteDemonio, abrir_libro
+from importador import escribir_rechazo
+from instrumentacion import contar, ejecutar_script, medir
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Registra la cola de transacciones en una sola sesión."
+    )
+    parser.add_argument(
+        "--rechazos",
+        default=None,
+        help="Archivo JSONL al que se agregan las transacciones que no se "
+        "pudieron registrar (por defecto, junto al libro).",
+    )
+    parser.add_argument(
+        "--simular",
+        action="store_true",
+        help="Muestra las transacciones de la cola sin cargar el libro ni vaciarla.",
+    )
+    args = parser.parse_args()
+    args.rechazos = args.rechazos or ruta_rechazos()
+
+    try:
+        with abrir_cola() as archivo:
+            entradas, ilegibles = leer_cola(archivo)
+            if not entradas and not ilegibles:
+                print("\033[92mLa cola está vacía.\033[0m")
+                return
+            contar("entradas_cola", len(entradas))
+            print(f"{len(entradas)} operaciones en '{ruta_cola()}'.")
+            with abrir_libro(simular=args.simular, usar_cola=False) as libro, open(
+                args.rechazos, "a", encoding="utf-8"
+            ) as rechazos, medir("aplicar_cola"):
+                resumen = aplicar(libro, entradas, rechazos)
+                for linea, texto, error in ilegibles:
+                    escribir_rechazo(rechazos, linea, texto, error)
+                if isinstance(libro, ClienteDemonio):
+                    # El demonio guarda por su cuenta; la cola se vacía después.
+                    libro.guardar()
+            if not args.simular:
+                vaciar(archivo)
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        print("La cola quedó como estaba.")
+        sys.exit(1)
+
+    if args.simular:
+        print(
+            f"\n{resumen['registradas']} transacciones válidas (simulación); "
+            "la cola quedó como estaba."
+        )
+    else:
+        print(
+            f"\n\033[92m¡ÉXITO! {resumen['registradas']} transacciones "
+            "registradas y cola vaciada.\033[0m"
+        )
+    if resumen["titulos"]:
+        print(f"Se revisaron {resumen['titulos']} cuentas de títulos.")
+    if resumen["duplicadas"]:
+        print(f"Se omitieron {resumen['duplicadas']} transacciones ya registradas.")
+    rechazadas = resumen["rechazadas"] + len(ilegibles)
+    if rechazadas:
+        print(
+            f"\033[93m{rechazadas} entradas rechazadas; "
+            f"revisa '{args.rechazos}'.\033[0m"
+        )
+
+
+if __name__ == "__main__":
+    ejecutar_script(main)
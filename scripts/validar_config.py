@@ -0,0 +1,55 @@
+# validar_config.py
+"""
+Script para VALIDAR config.py contra el libro.
+Comprueba que todas las claves de CUENTAS existan en el libro (entre ellas las
+que usan la nómina y CARTERA) y que las DEDUCCIONES sean coherentes, muestra
+todos los problemas juntos y deja compilada la configuración (ver
+config_compilada.py) para los demás scripts.
+Uso:
+    python scripts/validar_config.py
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+
+from config_compilada import ConfigCompilada
+
+
+def main():
+    argparse.ArgumentParser(
+        description=(
+            "Valida config.py contra el libro y deja compilada la configuración."
+        )
+    ).parse_args()
+
+    try:
+        # Los bindings de GnuCash se cargan recién acá, así --help no los necesita.
+        from gnucash.gnucash_core import SessionOpenMode
+
+        from libro import abrir_sesion
+
+        with abrir_sesion(mode=SessionOpenMode.SESSION_READ_ONLY) as session:
+            compilada = ConfigCompilada()
+            problemas = compilada.compilar(session.get_book().get_root_account())
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    if problemas:
+        print(f"\n\033[91mconfig.py tiene {len(problemas)} problemas:\033[0m")
+        for problema in problemas:
+            print(f"  - {problema}")
+        sys.exit(1)
+    print(
+        f"\n\033[92m¡ÉXITO! {len(compilada.guids)} cuentas y la configuración "
+        "de deducciones son válidas.\033[0m"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# valuar_tenencias.py
+"""
+Script para VALUAR las tenencias en moneda extranjera a la cotización diaria.
+Junta los movimientos de todas las cuentas en config.COTIZACIONES["moneda"]
+recorriendo el libro una vez y calcula la tenencia y su valor en
+MONEDA_PRINCIPAL para cada día del período en una sola pasada vectorizada
+(ver cotizaciones.valuar_tenencia), sin buscar un precio por split.
+Muestra el cierre de cada mes y, con --csv, guarda la serie diaria completa.
+Uso:
+    python scripts/valuar_tenencias.py [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+                                       [--serie SERIE] [--archivo RUTA] [--csv RUTA]
+Sin --archivo usa las cotizaciones cargadas en el libro
+(scripts/cargar_cotizaciones.py); las series que no son la de config.py se
+leen siempre del CSV.
+"""
+import sys
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+import argparse
+import csv
+from datetime import date
+
+import config
+from cotizaciones import CacheCotizaciones, valuar_tenencia
+from instrumentacion import contar, ejecutar_script, medir
+
+
+def movimientos_en_moneda(root_account, moneda):
+    """
+    Devuelve {ruta: (fechas, centavos)} con los splits de las cuentas en
+    'moneda', como listas paralelas listas para pasar a NumPy.
+    """
+    from dinero import Monto
+    from gnucash_utils import ruta_de_cuenta
+
+    movimientos = {}
+    pendientes = list(root_account.get_children())
+    while pendientes:
+        cuenta = pendientes.pop()
+        pendientes.extend(cuenta.get_children())
+        if cuenta.GetCommodity().get_mnemonic() != moneda:
+            continue
+        fechas, centavos = [], []
+        for split in cuenta.GetSplitList():
+            fechas.append(split.GetParent().GetDate().strftime("%Y-%m-%d"))
+            centavos.append(Monto.de_gnc(split.GetAmount(), 100).unidades)
+        if fechas:
+            movimientos[ruta_de_cuenta(cuenta)] = (fechas, centavos)
+    return movimientos
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Valúa las tenencias en moneda extranjera día por día."
+    )
+    parser.add_argument(
+        "--desde", help="Primer día (por defecto, el del primer movimiento)."
+    )
+    parser.add_argument("--hasta", help="Último día (por defecto, hoy).")
+    parser.add_argument(
+        "--serie",
+        default=None,
+        help="Serie de cotizaciones (por defecto, la de config.py).",
+    )
+    parser.add_argument(
+        "--archivo", default=None, help="Usa las cotizaciones de este CSV."
+    )
+    parser.add_argument("--csv", default=None, help="Guarda la serie diaria en RUTA.")
+    args = parser.parse_args()
+
+    import numpy as np
+    from gnucash.gnucash_core import SessionOpenMode
+
+    from libro import abrir_sesion
+
+    moneda = config.COTIZACIONES["moneda"]
+    try:
+        with abrir_sesion(mode=SessionOpenMode.SESSION_READ_ONLY) as session:
+            book = session.get_book()
+            with medir("leer_movimientos"):
+                movimientos = movimientos_en_moneda(book.get_root_account(), moneda)
+            with medir("leer_cotizaciones"):
+                en_libro = args.serie in (None, config.COTIZACIONES["serie"])
+                cache = (
+                    CacheCotizaciones.de_libro(book)
+                    if en_libro and not args.archivo
+                    else CacheCotizaciones.de_archivo(args.archivo)
+                )
+        if not movimientos:
+            print(f"No hay movimientos en cuentas en {moneda}.")
+            return
+
+        fechas = np.concatenate(
+            [np.array(f, dtype="datetime64[D]") for f, _ in movimientos.values()]
+        )
+        centavos = np.concatenate(
+            [np.array(c, dtype=np.int64) for _, c in movimientos.values()]
+        )
+        contar("splits_valuados", len(centavos))
+        desde = args.desde or str(fechas.min())
+        hasta = args.hasta or date.today().isoformat()
+        with medir("valuar"):
+            dias, tenencia, valor = valuar_tenencia(
+                fechas, centavos, desde, hasta, cache, args.serie
+            )
+            por_cuenta = {
+                ruta: valuar_tenencia(f, c, hasta, hasta, cache, args.serie)
+                for ruta, (f, c) in movimientos.items()
+            }
+    except Exception as e:
+        print(f"\n\033[91mERROR: {e}\033[0m")
+        sys.exit(1)
+
+    print(f"\033[94m--- TENENCIAS EN {moneda} AL {hasta} ---\033[0m")
+    for ruta, (_, t, v) in sorted(por_cuenta.items()):
+        if t[-1]:
+            print(f"  {ruta:<70} {t[-1] / 100:>14,.2f} {v[-1] / 100:>18,.2f}")
+
+    print("\n\033[94m--- CIERRE DE CADA MES ---\033[0m")
+    meses = dias.astype("datetime64[M]")
+    # Último día de cada mes dentro del período.
+    cierres = np.flatnonzero(np.append(meses[1:] != meses[:-1], True))
+    for i in cierres.tolist():
+        print(
+            f"  {str(dias[i]):10} {tenencia[i] / 100:>14,.2f} {moneda}"
+            f"  ${valor[i] / 100:>18,.2f}"
+        )
+
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["fecha", "tenencia", "valor"])
+            escritor.writerows(
+                zip(
+                    dias.astype(str).tolist(),
+                    (tenencia / 100).tolist(),
+                    (valor / 100).tolist(),
+                )
+            )
+        print(f"\nSerie diaria guardada en '{args.csv}'.")
+
+
+if __name__ == "__main__":
+    ejecutar_script(main)
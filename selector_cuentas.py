@@ -0,0 +1,268 @@
+# selector_cuentas.py
+
+"""
+Búsqueda de cuentas para la carga interactiva.
+Con las rutas del libro se arman, una única vez, un trie de prefijos de
+palabras y un índice de trigramas:
+- "ali sup" encuentra "Gastos.Alimentos y bebidas.Supermercado" porque cada
+  palabra de la consulta es prefijo de alguna palabra de la ruta;
+- si no hay coincidencias por prefijo, "supremercado" la encuentra igual por
+  los trigramas que comparte con alguno de sus segmentos (sobre todo con el
+  último, el nombre de la cuenta). Una coincidencia aproximada nunca se usa
+  sin que se la elija.
+También se aceptan las claves cortas de config.CUENTAS ("gasto_alimentos"), y
+las cuentas usadas hace poco aparecen primero.
+"""
+
+import json
+import os
+import re
+import time
+from collections import Counter
+
+import config
+from gnucash_utils import normalizar_ruta
+from huellas import ruta_sidecar
+
+try:
+    import readline
+except ImportError:  # Windows: sin autocompletado con Tab.
+    readline = None
+
+_PALABRA = re.compile(r"[^\W_]+")
+# Similitud mínima (coeficiente de Dice sobre trigramas) entre la consulta y un
+# segmento de la ruta para una coincidencia aproximada.
+UMBRAL_TRIGRAMAS = 0.35
+# Peso de los segmentos que no son el nombre de la cuenta.
+PESO_SEGMENTO_PADRE = 0.8
+# Vida media (en días) del peso de un uso reciente.
+VIDA_MEDIA_USO = 30.0
+
+
+def _trigramas(texto: str) -> set:
+    relleno = f"  {texto} "
+    return {relleno[i : i + 3] for i in range(len(relleno) - 2)}
+
+
+class UsoCuentas:
+    """Cantidad de usos y último uso de cada cuenta, guardados junto al libro."""
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_sidecar("recientes.json")
+        try:
+            with open(self.ruta, encoding="utf-8") as f:
+                self.usos = json.load(f)
+        except (OSError, ValueError):
+            self.usos = {}
+
+    def peso(self, ruta_cuenta, ahora=None) -> float:
+        """Entre 0 y 1: crece con la cantidad de usos y decae con el tiempo."""
+        uso = self.usos.get(ruta_cuenta)
+        if not uso:
+            return 0.0
+        cantidad, ultimo = uso
+        dias = ((ahora or time.time()) - ultimo) / 86400
+        return (1 - 1 / (1 + cantidad)) * 0.5 ** (dias / VIDA_MEDIA_USO)
+
+    def registrar(self, ruta_cuenta):
+        cantidad, _ = self.usos.get(ruta_cuenta, (0, 0))
+        self.usos[ruta_cuenta] = [cantidad + 1, time.time()]
+
+    def guardar(self):
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.usos, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta)
+
+
+class BuscadorCuentas:
+    """Trie de prefijos e índice de trigramas sobre las rutas de las cuentas."""
+
+    def __init__(self, rutas, claves=None, uso=None):
+        claves = config.CUENTAS if claves is None else claves
+        self.rutas = sorted(rutas)
+        self._normalizadas = {}
+        # Cada nodo del trie es [hijos, ids de las rutas con ese prefijo].
+        self._trie = [{}, set()]
+        # Los trigramas se indexan por segmento distinto ("galicia", "gastos")
+        # y por cada palabra de los segmentos de varias palabras: cada uno
+        # guarda su cantidad de trigramas y las rutas que lo tienen, con el
+        # peso de su posición.
+        self._segmentos = {}
+        self._por_trigrama = {}
+        for i, ruta in enumerate(self.rutas):
+            normalizada = normalizar_ruta(ruta)
+            self._normalizadas[normalizada] = i
+            for palabra in set(_PALABRA.findall(normalizada)):
+                self._agregar_prefijos(palabra, i)
+            *padres, hoja = normalizada.split(".")
+            segmentos = [(padre, PESO_SEGMENTO_PADRE) for padre in padres]
+            for segmento, peso in segmentos + [(hoja, 1.0)]:
+                for texto in {segmento, *_PALABRA.findall(segmento)}:
+                    self._indexar_segmento(texto, i, peso)
+
+        posiciones = {ruta: i for i, ruta in enumerate(self.rutas)}
+        self._claves = {}
+        for clave, ruta in claves.items():
+            i = posiciones.get(ruta)
+            if i is None:
+                continue
+            self._claves[clave.casefold()] = i
+            self._agregar_prefijos(clave.casefold(), i)
+            for palabra in _PALABRA.findall(clave.casefold()):
+                self._agregar_prefijos(palabra, i)
+
+        ahora = time.time()
+        self._pesos = [uso.peso(ruta, ahora) if uso else 0.0 for ruta in self.rutas]
+
+    def _indexar_segmento(self, segmento, i, peso):
+        if segmento not in self._segmentos:
+            trigramas = _trigramas(segmento)
+            self._segmentos[segmento] = (len(trigramas), {})
+            for trigrama in trigramas:
+                self._por_trigrama.setdefault(trigrama, set()).add(segmento)
+        rutas_segmento = self._segmentos[segmento][1]
+        rutas_segmento[i] = max(rutas_segmento.get(i, 0.0), peso)
+
+    def _agregar_prefijos(self, palabra, i):
+        nodo = self._trie
+        for letra in palabra:
+            nodo = nodo[0].setdefault(letra, [{}, set()])
+            nodo[1].add(i)
+
+    def _con_prefijo(self, palabra) -> set:
+        nodo = self._trie
+        for letra in palabra:
+            nodo = nodo[0].get(letra)
+            if nodo is None:
+                return set()
+        return nodo[1]
+
+    def _parecidas(self, parte) -> dict:
+        """
+        Mejor similitud de cada ruta con 'parte' (un segmento de la consulta):
+        el coeficiente de Dice de los trigramas contra cada segmento de la
+        ruta, con menos peso para los que no son el nombre de la cuenta.
+        """
+        trigramas = _trigramas(parte)
+        compartidos = Counter()
+        for trigrama in trigramas:
+            compartidos.update(self._por_trigrama.get(trigrama, ()))
+        puntajes = {}
+        for segmento, n in compartidos.items():
+            cantidad, rutas_segmento = self._segmentos[segmento]
+            similitud = 2 * n / (len(trigramas) + cantidad)
+            for i, peso in rutas_segmento.items():
+                if similitud * peso > puntajes.get(i, 0.0):
+                    puntajes[i] = similitud * peso
+        return puntajes
+
+    def _aproximadas(self, consulta) -> dict:
+        """
+        Puntaje por trigramas compartidos, para consultas con errores: el
+        promedio de la similitud de cada segmento de la consulta.
+        """
+        partes = [parte.strip() for parte in consulta.split(".") if parte.strip()]
+        puntajes = Counter()
+        for parte in partes:
+            for i, puntaje in self._parecidas(parte).items():
+                puntajes[i] += puntaje / len(partes)
+        return {i: p for i, p in puntajes.items() if p >= UMBRAL_TRIGRAMAS}
+
+    def exacta(self, consulta):
+        """Ruta indicada exactamente por una clave o una ruta completa, o None."""
+        consulta = consulta.strip()
+        i = self._claves.get(consulta.casefold())
+        if i is None:
+            i = self._normalizadas.get(normalizar_ruta(consulta))
+        return None if i is None else self.rutas[i]
+
+    def coincidencias(self, consulta, limite=10):
+        """
+        (rutas, aproximadas): las rutas que coinciden con la consulta, las
+        mejores primero, y si salen de la búsqueda aproximada por trigramas.
+        """
+        normalizada = normalizar_ruta(consulta.strip())
+        palabras = _PALABRA.findall(normalizada)
+        aproximadas = False
+        if not palabras:
+            puntajes = {i: 0.0 for i in range(len(self.rutas))}
+        else:
+            candidatos = None
+            for palabra in palabras:
+                ids = self._con_prefijo(palabra)
+                candidatos = ids if candidatos is None else candidatos & ids
+                if not candidatos:
+                    break
+            if candidatos:
+                puntajes = dict.fromkeys(candidatos, 1.0)
+            else:
+                puntajes = self._aproximadas(normalizada)
+                aproximadas = True
+
+        exacta = self.exacta(consulta)
+        orden = sorted(
+            puntajes,
+            key=lambda i: (
+                self.rutas[i] != exacta,
+                -(puntajes[i] + self._pesos[i]),
+                len(self.rutas[i]),
+                self.rutas[i],
+            ),
+        )
+        return [self.rutas[i] for i in orden[:limite]], aproximadas
+
+    def buscar(self, consulta, limite=10):
+        """Rutas que coinciden con la consulta, las mejores primero."""
+        return self.coincidencias(consulta, limite)[0]
+
+
+def _autocompletar(buscador):
+    """Instala el autocompletado con Tab sobre la línea completa."""
+    sugerencias = []
+
+    def completar(texto, estado):
+        if estado == 0:
+            sugerencias[:] = buscador.buscar(readline.get_line_buffer())
+        return sugerencias[estado] if estado < len(sugerencias) else None
+
+    readline.set_completer_delims("")
+    readline.set_completer(completar)
+    readline.parse_and_bind("tab: complete")
+
+
+def elegir_cuenta(buscador, pregunta, limite=10):
+    """
+    Pide una cuenta: acepta una clave de config.CUENTAS, una ruta completa o
+    unas pocas letras. Con Tab se autocompleta; si la búsqueda no es única, o
+    si solo hay coincidencias aproximadas, se muestran las mejores opciones
+    numeradas para elegir una.
+    """
+    if readline is not None:
+        _autocompletar(buscador)
+    opciones = []
+    try:
+        while True:
+            texto = input(pregunta).strip()
+            if opciones and texto.isdigit() and 1 <= int(texto) <= len(opciones):
+                return opciones[int(texto) - 1]
+            exacta = buscador.exacta(texto) if texto else None
+            if exacta:
+                return exacta
+            opciones, aproximadas = buscador.coincidencias(texto, limite)
+            if not opciones:
+                print(
+                    "\033[93mNinguna cuenta coincide. Prueba con otra búsqueda.\033[0m"
+                )
+                continue
+            if len(opciones) == 1 and not aproximadas:
+                print(f"  -> {opciones[0]}")
+                return opciones[0]
+            if aproximadas:
+                print("\033[93mNinguna cuenta coincide; estas se parecen:\033[0m")
+            for numero, ruta in enumerate(opciones, start=1):
+                print(f"  {numero:2}. {ruta}")
+            pregunta = "Elige un número o escribe otra búsqueda: "
+    finally:
+        if readline is not None:
+            readline.set_completer(None)
@@ -0,0 +1,220 @@
+# servicio.py
+
+"""
+Operaciones sobre el libro con una interfaz única, que usan tanto el demonio
+(demonio.py) como los scripts cuando se ejecutan con su propia sesión.
+Los montos viajan como texto y las transacciones con el formato de
+importador.py, de modo que la misma llamada sirve en proceso o por socket.
+"""
+
+from datetime import datetime
+
+import config
+from cartera import Cartera
+from config_compilada import ConfigCompilada
+from consultas import CacheTotales
+from cotizaciones import CacheCotizaciones
+from dinero import Monto
+from gnucash_utils import get_indice_cuentas, ruta_de_cuenta
+from huellas import IndiceHuellas, calcular_huella
+from importador import normalizar_especificacion
+from instrumentacion import medir
+from libro import (
+    crear_cuenta_titulo,
+    crear_transaccion,
+    cuenta_por_guid,
+    guardar_sesion,
+    resolver_cuenta,
+)
+
+
+class ServicioLibro:
+    """Operaciones de consulta y registro sobre una sesión abierta."""
+
+    def __init__(self, session):
+        self.session = session
+        self.book = session.get_book()
+        self.root = self.book.get_root_account()
+        self.currency = self.book.get_table().lookup(
+            "ISO4217", config.MONEDA_PRINCIPAL
+        )
+        self._huellas = None
+        self._totales = None
+        self._compilada = None
+        self._cotizaciones = None
+        # Transacciones registradas desde el último guardado.
+        self.pendientes = 0
+
+    @property
+    def huellas(self):
+        if self._huellas is None:
+            self._huellas = IndiceHuellas.abrir(self.root)
+        return self._huellas
+
+    @property
+    def totales(self):
+        if self._totales is None:
+            self._totales = CacheTotales.abrir(self.root)
+        return self._totales
+
+    @property
+    def compilada(self):
+        if self._compilada is None:
+            self._compilada = ConfigCompilada.abrir(self.root)
+        return self._compilada
+
+    @property
+    def cotizaciones(self):
+        if self._cotizaciones is None:
+            self._cotizaciones = CacheCotizaciones.de_libro(self.book)
+        return self._cotizaciones
+
+    def _con_cantidades(self, fecha, splits, cantidades):
+        """
+        Ternas (cuenta, valor, cantidad) para crear_transaccion. La cantidad
+        es None en las cuentas en la moneda de la transacción; en las demás,
+        si no viene indicada, se calcula con la cotización de 'fecha'.
+        """
+        moneda = self.currency.get_mnemonic()
+        ternas = []
+        for (cuenta, monto), cantidad in zip(splits, cantidades):
+            commodity = cuenta.GetCommodity()
+            if commodity.get_mnemonic() == moneda:
+                cantidad = None
+            elif cantidad is None:
+                if commodity.get_mnemonic() != config.COTIZACIONES["moneda"]:
+                    raise ValueError(
+                        f"Indica la cantidad en {commodity.get_mnemonic()} de "
+                        f"'{ruta_de_cuenta(cuenta)}'."
+                    )
+                cantidad = self.cotizaciones.a_moneda_extranjera(
+                    monto, fecha, commodity.get_fraction()
+                )
+            ternas.append((cuenta, monto, cantidad))
+        return ternas
+
+    def resolver(self, referencia: str):
+        """
+        Cuenta de una clave de config.CUENTAS (por su GUID compilado) o de una
+        ruta completa. Lanza ValueError si no existe.
+        """
+        guid = self.compilada.guids.get(referencia)
+        if guid is not None:
+            cuenta = cuenta_por_guid(self.book, guid)
+            if cuenta is not None:
+                return cuenta
+        return resolver_cuenta(self.root, referencia)
+
+    def cuentas(self):
+        """Rutas completas de todas las cuentas, ordenadas."""
+        return sorted(get_indice_cuentas(self.root).rutas())
+
+    def verificar_cuentas(self, referencias):
+        """Devuelve las referencias (claves o rutas) que no existen en el libro."""
+        faltantes = []
+        for referencia in referencias:
+            try:
+                self.resolver(referencia)
+            except ValueError:
+                faltantes.append(referencia)
+        return faltantes
+
+    def saldo(self, referencia, fecha=None) -> Monto:
+        """
+        Saldo exacto de la cuenta, en la fracción de su commodity. Con 'fecha'
+        (datetime o texto AAAA-MM-DD) es el saldo al final de ese día.
+        """
+        if isinstance(fecha, str):
+            fecha = datetime.strptime(fecha, "%Y-%m-%d")
+        return Monto.de_saldo(self.resolver(referencia), fecha)
+
+    def existe(self, id_externo) -> bool:
+        return self.huellas.existe(id_externo=id_externo)
+
+    def asegurar_titulo(self, referencia, especie) -> str:
+        """
+        Ruta de la cuenta del título 'especie' bajo la cuenta de broker
+        'referencia'; la crea si todavía no existe.
+        """
+        broker = self.resolver(referencia)
+        ruta = f"{ruta_de_cuenta(broker)}.{especie}"
+        if get_indice_cuentas(self.root).buscar(ruta) is None:
+            crear_cuenta_titulo(self.book, broker, especie)
+            self.pendientes += 1
+        return ruta
+
+    def costo_titulo(self, referencia, cantidad: Monto, fecha) -> Monto:
+        """
+        Costo FIFO (en centavos de la moneda de las transacciones) de vender
+        'cantidad' del título 'referencia' el día 'fecha' (AAAA-MM-DD), con los
+        lotes que el libro tiene hasta ese día.
+        """
+        cartera = Cartera.de_cuenta(self.resolver(referencia))
+        return Monto(cartera.costo_venta(0, float(cantidad.a_decimal()), fecha))
+
+    @medir("publicar")
+    def publicar(self, registro, forzar=False) -> dict:
+        """
+        Registra una transacción con formato de importador.py.
+        Si ya existe (por id externo o huella) no la registra y devuelve
+        estado "duplicada", salvo que se pida 'forzar'.
+        """
+        spec = normalizar_especificacion(registro)
+        splits = [
+            (self.resolver(referencia), monto)
+            for referencia, monto in spec["splits"]
+        ]
+        huella = calcular_huella(spec["fecha"], splits)
+        if not forzar and self.huellas.existe(
+            huella, spec["id_externo"], spec["repeticion"]
+        ):
+            return {"estado": "duplicada"}
+        ternas = self._con_cantidades(spec["fecha"], splits, spec["cantidades"])
+        # La caché se abre (y si hace falta se reconstruye) antes de tocar el
+        # libro, para no contar dos veces la transacción nueva.
+        totales = self.totales
+        tx = crear_transaccion(
+            self.book,
+            spec["fecha"],
+            spec["descripcion"],
+            ternas,
+            currency=self.currency,
+            num=spec["id_externo"],
+        )
+        guid = tx.GetGUID().to_string()
+        self.huellas.registrar(huella, guid, spec["id_externo"])
+        # La caché suma importes en la moneda de cada cuenta, como al reconstruirla.
+        totales.registrar(
+            spec["fecha"],
+            [
+                (cuenta, monto if cantidad is None else cantidad)
+                for cuenta, monto, cantidad in ternas
+            ],
+        )
+        self.pendientes += 1
+        return {"estado": "registrada", "guid": guid}
+
+    def confirmar(self):
+        """
+        Persiste el índice de huellas, la caché de totales y la configuración
+        compilada; va siempre después de guardar el libro.
+        """
+        if self._huellas is not None:
+            self._huellas.confirmar()
+        if self._totales is not None:
+            self._totales.confirmar()
+        if self._compilada is not None:
+            self._compilada.confirmar()
+        self.pendientes = 0
+
+    def guardar(self):
+        guardar_sesion(self.session)
+        self.confirmar()
+
+    def cerrar(self):
+        if self._huellas is not None:
+            self._huellas.cerrar()
+            self._huellas = None
+        if self._totales is not None:
+            self._totales.cerrar()
+            self._totales = None
@@ -0,0 +1,300 @@
+# tarjetas.py
+
+"""
+Compras en cuotas y resúmenes de las tarjetas de crédito (config.TARJETAS).
+
+Cada tarjeta tiene un calendario de resúmenes: el día de cierre de cada mes y
+el vencimiento en el mes siguiente, con las fechas que publica el banco cuando
+se apartan de la regla. Un ciclo es el resumen que cierra en un mes dado y se
+identifica por ese mes (año * 12 + mes - 1), así que "el ciclo de la compra
+más k" es una suma.
+
+- Una compra en N cuotas se convierte de una vez en N transacciones, una por
+  resumen: la primera con la fecha de la compra y las demás con la fecha de
+  cierre del resumen en el que aparecen. Cada cuota lleva el id externo
+  "cuotas:<compra>:k/N", así que repetir la carga no duplica nada.
+- La proyección reparte todos los movimientos de las cuentas de la tarjeta
+  (incluidas las cuotas futuras ya registradas) en los ciclos con una sola
+  búsqueda vectorizada sobre las fechas de cierre, y el saldo de cada resumen
+  es la suma acumulada de esos totales, sin volver a recorrer los splits.
+"""
+
+import calendar
+import csv
+import hashlib
+from datetime import date, datetime
+
+import config
+from dinero import Monto
+from gnucash_utils import LOCALE_PREDETERMINADO
+from importador import parse_fecha
+
+PREFIJO_CUOTAS = "cuotas"
+
+
+def _dia_del_mes(anio, mes, dia) -> date:
+    """Día 'dia' del mes, limitado al último día del mes."""
+    return date(anio, mes, min(dia, calendar.monthrange(anio, mes)[1]))
+
+
+def ciclo_de_mes(anio, mes) -> int:
+    return anio * 12 + mes - 1
+
+
+def mes_de_ciclo(ciclo):
+    """(año, mes) de cierre del ciclo."""
+    anio, mes = divmod(ciclo, 12)
+    return anio, mes + 1
+
+
+class CalendarioTarjeta:
+    """Fechas de cierre y vencimiento de los resúmenes de una tarjeta."""
+
+    def __init__(self, nombre, tarjeta=None):
+        tarjeta = config.TARJETAS[nombre] if tarjeta is None else tarjeta
+        self.nombre = nombre
+        self.dia_cierre = tarjeta["cierre"]
+        self.dia_vencimiento = tarjeta["vencimiento"]
+        self.publicado = {
+            ciclo_de_mes(*map(int, periodo.split("-"))): fechas
+            for periodo, fechas in tarjeta.get("calendario", {}).items()
+        }
+
+    def cierre(self, ciclo) -> date:
+        publicado = self.publicado.get(ciclo, {})
+        if "cierre" in publicado:
+            return parse_fecha(publicado["cierre"]).date()
+        return _dia_del_mes(*mes_de_ciclo(ciclo), self.dia_cierre)
+
+    def vencimiento(self, ciclo) -> date:
+        publicado = self.publicado.get(ciclo, {})
+        if "vencimiento" in publicado:
+            return parse_fecha(publicado["vencimiento"]).date()
+        return _dia_del_mes(*mes_de_ciclo(ciclo + 1), self.dia_vencimiento)
+
+    def ciclo(self, fecha) -> int:
+        """Ciclo del resumen en el que aparece un consumo de 'fecha'."""
+        if isinstance(fecha, datetime):
+            fecha = fecha.date()
+        ciclo = ciclo_de_mes(fecha.year, fecha.month)
+        # Un cierre publicado puede caer en el mes anterior o el siguiente.
+        if fecha <= self.cierre(ciclo - 1):
+            return ciclo - 1
+        return ciclo if fecha <= self.cierre(ciclo) else ciclo + 1
+
+
+def importes_cuotas(total: Monto, cuotas: int) -> list:
+    """
+    Importe de cada cuota: partes iguales, y los centavos que no se pueden
+    repartir van en la primera, como en los resúmenes.
+    """
+    if cuotas < 1:
+        raise ValueError("La cantidad de cuotas tiene que ser al menos 1.")
+    signo = -1 if total.unidades < 0 else 1
+    base, resto = divmod(abs(total.unidades), cuotas)
+    importes = [Monto(signo * base, total.fraccion) for _ in range(cuotas)]
+    importes[0] = Monto(signo * (base + resto), total.fraccion)
+    return importes
+
+
+def id_compra(compra) -> str:
+    """Identificador estable de una compra, salvo que traiga el suyo."""
+    if compra.get("id"):
+        return compra["id"]
+    contenido = (
+        f"{compra['tarjeta']}|{compra['fecha']:%Y-%m-%d}|{compra['descripcion']}|"
+        f"{compra['monto'].texto()}|{compra['cuotas']}"
+    )
+    return hashlib.sha1(contenido.encode("utf-8")).hexdigest()[:12]
+
+
+def plan_de_cuotas(compra, calendario=None) -> list:
+    """
+    Cuotas de una compra {"tarjeta", "fecha", "descripcion", "cuenta",
+    "monto" (Monto total), "cuotas"}: lista de {"numero", "fecha", "monto",
+    "cierre", "vencimiento"} con el resumen en el que aparece cada una.
+    """
+    calendario = calendario or CalendarioTarjeta(compra["tarjeta"])
+    fecha = compra["fecha"]
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    primero = calendario.ciclo(fecha)
+    plan = []
+    for numero, monto in enumerate(
+        importes_cuotas(compra["monto"], compra["cuotas"]), start=1
+    ):
+        ciclo = primero + numero - 1
+        plan.append(
+            {
+                "numero": numero,
+                "fecha": fecha if numero == 1 else calendario.cierre(ciclo),
+                "monto": monto,
+                "cierre": calendario.cierre(ciclo),
+                "vencimiento": calendario.vencimiento(ciclo),
+            }
+        )
+    return plan
+
+
+def registros_de_compra(compra, plan=None) -> list:
+    """Transacciones (formato de importador.py) de todas las cuotas de una compra."""
+    plan = plan or plan_de_cuotas(compra)
+    tarjeta = config.TARJETAS[compra["tarjeta"]]
+    identificador = id_compra(compra)
+    total = len(plan)
+    registros = []
+    for cuota in plan:
+        sufijo = f" (cuota {cuota['numero']}/{total})" if total > 1 else ""
+        registros.append(
+            {
+                "fecha": cuota["fecha"].strftime("%d/%m/%Y"),
+                "descripcion": f"{compra['descripcion']}{sufijo}",
+                "id_externo": (
+                    f"{PREFIJO_CUOTAS}:{identificador}:{cuota['numero']}/{total}"
+                ),
+                "splits": [
+                    {"cuenta": tarjeta["cuenta"], "monto": (-cuota["monto"]).texto()},
+                    {"cuenta": compra["cuenta"], "monto": cuota["monto"].texto()},
+                ],
+            }
+        )
+    return registros
+
+
+def leer_compras(ruta, locale=LOCALE_PREDETERMINADO):
+    """
+    Lee un CSV de compras con las columnas fecha, tarjeta, descripcion,
+    cuenta, monto (total de la compra), cuotas e id (opcional). Devuelve
+    (compras, errores [(linea, motivo)]).
+    """
+    compras, errores = [], []
+    with open(ruta, encoding="utf-8-sig", newline="") as f:
+        lector = csv.DictReader(f)
+        for fila in lector:
+            fila = {k: (v or "").strip() for k, v in fila.items() if k}
+            try:
+                if fila.get("tarjeta") not in config.TARJETAS:
+                    raise ValueError(
+                        f"La tarjeta '{fila.get('tarjeta', '')}' no está en "
+                        "config.TARJETAS."
+                    )
+                if not fila.get("cuenta"):
+                    raise ValueError("Falta la cuenta de la compra.")
+                try:
+                    cuotas = int(fila.get("cuotas") or 1)
+                except ValueError:
+                    raise ValueError(
+                        f"La cantidad de cuotas '{fila['cuotas']}' no es válida."
+                    ) from None
+                if cuotas < 1:
+                    raise ValueError("La cantidad de cuotas tiene que ser al menos 1.")
+                compras.append(
+                    {
+                        "linea": lector.line_num,
+                        "tarjeta": fila["tarjeta"],
+                        "fecha": parse_fecha(fila.get("fecha", "")),
+                        "descripcion": fila.get("descripcion", ""),
+                        "cuenta": fila["cuenta"],
+                        "monto": Monto.de_texto(fila.get("monto", ""), locale),
+                        "cuotas": cuotas,
+                        "id": fila.get("id") or None,
+                    }
+                )
+            except ValueError as e:
+                errores.append((lector.line_num, str(e)))
+    return compras, errores
+
+
+class CiclosTarjeta:
+    """
+    Ciclos consecutivos de una tarjeta, de 'desde' a 'hasta' (inclusive),
+    con sus fechas de cierre precalculadas como array para repartir
+    movimientos de una sola vez.
+    """
+
+    def __init__(self, calendario, desde: int, hasta: int):
+        import numpy as np
+
+        self.calendario = calendario
+        self.ciclos = list(range(desde, hasta + 1))
+        self.cierres = [calendario.cierre(c) for c in self.ciclos]
+        self.vencimientos = [calendario.vencimiento(c) for c in self.ciclos]
+        # El cierre anterior al primer ciclo separa el saldo inicial.
+        self._limites = np.array(
+            [calendario.cierre(desde - 1), *self.cierres], dtype="datetime64[D]"
+        )
+
+    def agrupar(self, fechas, centavos, marcados=None) -> dict:
+        """
+        Reparte movimientos de una cuenta de pasivo ('fechas' y 'centavos'
+        en arrays paralelos, con el signo del libro) en los ciclos. Devuelve
+        arrays int64 por ciclo, con la deuda en positivo: "cargos" (consumos
+        y cuotas), "pagos", "marcados" (los cargos con 'marcados' verdadero,
+        por ejemplo las cuotas) y "saldo" al cierre; y el "inicial".
+        """
+        import numpy as np
+
+        fechas = np.asarray(fechas, dtype="datetime64[D]")
+        deuda = -np.asarray(centavos, dtype=np.int64)
+        n = len(self.ciclos)
+        # 0: hasta el cierre anterior al primer ciclo; i: ciclo i - 1;
+        # n + 1: después del último cierre (fuera de la proyección).
+        indice = np.searchsorted(self._limites, fechas, side="left")
+
+        def sumar(mascara):
+            # bincount suma en float64; los centavos entran exactos hasta 2**53.
+            suma = np.bincount(indice[mascara], weights=deuda[mascara], minlength=n + 2)
+            return np.rint(suma).astype(np.int64)
+
+        cargos = sumar(deuda > 0)
+        pagos = -sumar(deuda < 0)
+        if marcados is None:
+            en_cuotas = np.zeros(n + 2, dtype=np.int64)
+        else:
+            en_cuotas = sumar((deuda > 0) & np.asarray(marcados, dtype=bool))
+        inicial = int(cargos[0] - pagos[0])
+        return {
+            "inicial": inicial,
+            "cargos": cargos[1 : n + 1],
+            "pagos": pagos[1 : n + 1],
+            "marcados": en_cuotas[1 : n + 1],
+            "saldo": inicial + np.cumsum(cargos[1 : n + 1] - pagos[1 : n + 1]),
+        }
+
+
+def movimientos_de_cuentas(root_account, referencias):
+    """
+    {ruta: (fechas, centavos, en cuotas)} de las cuentas indicadas, como
+    listas paralelas; "en cuotas" marca las transacciones de plan_de_cuotas.
+    Los centavos están en la moneda de cada cuenta.
+    """
+    from gnucash_utils import ruta_de_cuenta
+    from libro import resolver_cuenta
+
+    movimientos = {}
+    for referencia in referencias:
+        cuenta = resolver_cuenta(root_account, referencia)
+        fechas, centavos, en_cuotas = [], [], []
+        for split in cuenta.GetSplitList():
+            tx = split.GetParent()
+            fechas.append(tx.GetDate().strftime("%Y-%m-%d"))
+            centavos.append(Monto.de_gnc(split.GetAmount(), 100).unidades)
+            en_cuotas.append((tx.GetNum() or "").startswith(f"{PREFIJO_CUOTAS}:"))
+        movimientos[ruta_de_cuenta(cuenta)] = (fechas, centavos, en_cuotas)
+    return movimientos
+
+
+def proyectar(
+    movimientos, calendario, desde: int, cantidad: int
+) -> tuple[CiclosTarjeta, dict]:
+    """
+    Proyección de 'cantidad' resúmenes desde el ciclo 'desde' para las cuentas
+    de 'movimientos' (como los de movimientos_de_cuentas). Devuelve una tupla
+    (ciclos, resultados): el CiclosTarjeta de los resúmenes proyectados y
+    {ruta: resultado de CiclosTarjeta.agrupar} para cada cuenta.
+    """
+    ciclos = CiclosTarjeta(calendario, desde, desde + cantidad - 1)
+    return ciclos, {
+        ruta: ciclos.agrupar(fechas, centavos, en_cuotas)
+        for ruta, (fechas, centavos, en_cuotas) in movimientos.items()
+    }
@@ -0,0 +1,139 @@
+"""Costo FIFO y resultados de la cartera, sin el libro."""
+
+import unittest
+from datetime import datetime
+from fractions import Fraction
+
+from cartera import Cartera, operaciones_de_titulo
+
+
+def cartera_de_prueba():
+    """
+    Título 0: compra 100 a 5.000 y 100 a 9.000, vende 150 por 2.000.000.
+    Título 1: compra 10 a 1.000 y vende 4 por 6.000.
+    """
+    return Cartera(
+        ["Broker.A", "Broker.B"],
+        ["ARS", "ARS"],
+        [0, 0, 0, 1, 1],
+        ["2025-03-01", "2025-03-10", "2025-03-12", "2025-03-02", "2025-03-05"],
+        [100, 100, -150, 10, -4],
+        [500000_00, 900000_00, -2000000_00, 10000_00, -6000_00],
+    )
+
+
+class CarteraFifoTest(unittest.TestCase):
+    def test_resultado_realizado_de_las_ventas(self):
+        cartera = cartera_de_prueba()
+        # 2.000.000 - (100 * 5.000 + 50 * 9.000) y 6.000 - 4 * 1.000.
+        self.assertEqual(
+            cartera.realizado.tolist(), [0, 0, 1050000_00, 0, 2000_00]
+        )
+
+    def test_costo_de_una_venta_nueva(self):
+        cartera = cartera_de_prueba()
+        # Después de la venta del 12, quedan 50 del segundo lote.
+        self.assertEqual(cartera.costo_venta(0, 50, "2025-03-12"), 450000_00)
+        # Al 5 de marzo solo estaba el primer lote.
+        self.assertEqual(cartera.costo_venta(0, 80, "2025-03-05"), 400000_00)
+        with self.assertRaisesRegex(ValueError, "supera la tenencia"):
+            cartera.costo_venta(0, 150, "2025-03-05")
+        with self.assertRaisesRegex(ValueError, "supera la tenencia"):
+            cartera.costo_venta(1, 7, "2025-03-31")
+
+    def test_valuacion_al_costo_sin_precios(self):
+        resultado = cartera_de_prueba().valuar("2025-03-01", "2025-03-12", {})
+        ultimo = -1
+        self.assertEqual(resultado["cantidad"][:, ultimo].tolist(), [50, 6])
+        self.assertEqual(resultado["costo"][:, ultimo].tolist(), [450000_00, 6000_00])
+        self.assertEqual(resultado["valor"][:, ultimo].tolist(), [450000_00, 6000_00])
+        self.assertEqual(
+            resultado["realizado"][:, ultimo].tolist(), [1050000_00, 2000_00]
+        )
+        self.assertEqual(resultado["no_realizado"][:, ultimo].tolist(), [0, 0])
+
+
+class _Numero:
+    def __init__(self, valor):
+        self.valor = Fraction(valor)
+
+    def num(self):
+        return self.valor.numerator
+
+    def denom(self):
+        return self.valor.denominator
+
+
+class _Cuenta:
+    def __init__(self, nombre, padre=None):
+        self.nombre, self.padre, self.splits = nombre, padre, []
+
+    def GetName(self):
+        return self.nombre
+
+    def get_parent(self):
+        return self.padre
+
+    def is_root(self):
+        return self.padre is None
+
+    def GetSplitList(self):
+        return self.splits
+
+
+class _Transaccion:
+    def __init__(self, fecha, *splits):
+        self.fecha = datetime.strptime(fecha, "%Y-%m-%d")
+        self.splits = []
+        for cuenta, valor, cantidad in splits:
+            split = _Split(self, cuenta, valor, cantidad)
+            self.splits.append(split)
+            cuenta.splits.append(split)
+
+    def GetDate(self):
+        return self.fecha
+
+    def GetSplitList(self):
+        return self.splits
+
+
+class _Split:
+    def __init__(self, transaccion, cuenta, valor, cantidad):
+        self.transaccion, self.cuenta = transaccion, cuenta
+        self.valor, self.cantidad = valor, cantidad
+
+    def GetParent(self):
+        return self.transaccion
+
+    def GetAccount(self):
+        return self.cuenta
+
+    def GetValue(self):
+        return _Numero(self.valor)
+
+    def GetAmount(self):
+        return _Numero(self.cantidad)
+
+
+class OperacionesDeTituloTest(unittest.TestCase):
+    def test_las_ventas_suman_el_resultado(self):
+        raiz = _Cuenta("raiz")
+        titulo = _Cuenta("GGAL", _Cuenta("Broker", raiz))
+        resultados = _Cuenta("Resultados", _Cuenta("Ingresos", raiz))
+        banco = _Cuenta("Banco", raiz)
+        _Transaccion("2025-03-01", (titulo, 500000, 100), (banco, -500000, -500000))
+        # Venta de 60 por 400.000: el título se acredita al costo (300.000).
+        _Transaccion(
+            "2025-03-05",
+            (titulo, -300000, -60),
+            (resultados, -100000, -100000),
+            (banco, 400000, 400000),
+        )
+        self.assertEqual(
+            list(operaciones_de_titulo(titulo, "Ingresos.Resultados")),
+            [("2025-03-01", 100.0, 50000000), ("2025-03-05", -60.0, -40000000)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Aritmética exacta de Monto."""
+
+import unittest
+from decimal import Decimal
+
+from dinero import Monto, dividir_redondeando
+
+
+class _Numero:
+    """Lo mínimo de un GncNumeric: num() y denom()."""
+
+    def __init__(self, num, denom):
+        self._num, self._denom = num, denom
+
+    def num(self):
+        return self._num
+
+    def denom(self):
+        return self._denom
+
+
+class DividirRedondeandoTest(unittest.TestCase):
+    def test_mitad_hacia_afuera(self):
+        self.assertEqual(dividir_redondeando(5, 2), 3)
+        self.assertEqual(dividir_redondeando(-5, 2), -3)
+        self.assertEqual(dividir_redondeando(4, 3), 1)
+        self.assertEqual(dividir_redondeando(-4, 3), -1)
+
+
+class MontoTest(unittest.TestCase):
+    def test_ida_y_vuelta_por_texto(self):
+        for texto in ("0,00", "1234,56", "-0,05", "-1000,10"):
+            with self.subTest(texto=texto):
+                self.assertEqual(Monto.de_texto(texto).texto(), texto)
+        cantidad = Monto.de_texto("0,12345", fraccion=100_000)
+        self.assertEqual(cantidad, Monto(12345, 100_000))
+        self.assertEqual(str(cantidad), "0,12345")
+        self.assertEqual(Monto(7, 1).texto(), "7")
+
+    def test_de_decimal_y_a_decimal(self):
+        self.assertEqual(Monto.de_decimal(Decimal("1.005")), Monto(101))
+        self.assertEqual(Monto.de_decimal(Decimal("-1.005")), Monto(-101))
+        self.assertEqual(Monto(12345, 1000).a_decimal(), Decimal("12.345"))
+
+    def test_de_gnc(self):
+        self.assertEqual(Monto.de_gnc(_Numero(1, 3), 100), Monto(33))
+        self.assertEqual(Monto.de_gnc(_Numero(250, 1000)), Monto(250, 1000))
+
+    def test_aritmetica(self):
+        a, b = Monto(1050), Monto(-250)
+        self.assertEqual(a + b, Monto(800))
+        self.assertEqual(a - b, Monto(1300))
+        self.assertEqual(-a, Monto(-1050))
+        self.assertEqual(abs(b), Monto(250))
+        self.assertEqual(a + 1, Monto(1150))
+        self.assertEqual(1 - a, Monto(-950))
+        self.assertEqual(sum([a, b, Monto(200)]), Monto(1000))
+        self.assertFalse(Monto(0))
+        self.assertLess(b, a)
+
+    def test_fracciones_distintas_no_se_combinan(self):
+        with self.assertRaises(ValueError):
+            Monto(1) + Monto(1, 1000)
+        self.assertEqual(Monto(1234, 1000).a_fraccion(100), Monto(123))
+        self.assertEqual(Monto(1235, 1000).centavos(), 124)
+
+    def test_igualdad_y_hash_con_enteros(self):
+        self.assertEqual(Monto(500), 5)
+        self.assertEqual(hash(Monto(500)), hash(5))
+        self.assertIn(5, {Monto(500)})
+        self.assertEqual(hash(Monto(150)), hash(Monto(150)))
+        self.assertNotEqual(Monto(150), 1)
+
+    def test_formato(self):
+        self.assertEqual(f"{Monto(123456):,.2f}", "1,234.56")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Montos en texto (parse_decimal y parse_centavos) e índice de cuentas."""
+
+import unittest
+from decimal import Decimal
+
+from gnucash_utils import (
+    find_account_by_path,
+    get_indice_cuentas,
+    invalidar_indice_cuentas,
+    parse_centavos,
+    parse_decimal,
+)
+
+
+class _Guid:
+    def to_string(self):
+        return "raiz"
+
+
+class _Cuenta:
+    """Lo mínimo de una cuenta para indexarla: nombre e hijas."""
+
+    def __init__(self, nombre, *hijas):
+        self.nombre, self.hijas = nombre, list(hijas)
+
+    def GetName(self):
+        return self.nombre
+
+    def get_children(self):
+        return self.hijas
+
+    def GetGUID(self):
+        return _Guid()
+
+
+class ParseDecimalTest(unittest.TestCase):
+    def test_formatos_explicitos(self):
+        self.assertEqual(parse_decimal("1.234,56"), Decimal("1234.56"))
+        self.assertEqual(parse_decimal("-1,5"), Decimal("-1.5"))
+        self.assertEqual(parse_decimal("1,234.56", "en"), Decimal("1234.56"))
+
+    def test_miles_mal_agrupados_es_error(self):
+        for texto in ("1.5", "1,2,3", "abc", ""):
+            with self.subTest(texto=texto):
+                with self.assertRaises(ValueError):
+                    parse_decimal(texto)
+
+
+class ParseCentavosTest(unittest.TestCase):
+    def test_columna(self):
+        self.assertEqual(
+            parse_centavos(["1.234,56", "-0,5", "12", "0,07"]),
+            [123456, -50, 1200, 7],
+        )
+        self.assertEqual(parse_centavos(["1,234.56", "-0.5"], "en"), [123456, -50])
+
+    def test_redondea_la_mitad_hacia_afuera(self):
+        self.assertEqual(parse_centavos(["1,005", "-1,005", "1,004"]), [101, -101, 100])
+
+    def test_coincide_con_parse_decimal(self):
+        textos = ["0,01", "-12.345,67", "999", "3,999", "-0,125"]
+        esperados = [
+            int((parse_decimal(t) * 100).quantize(Decimal(1), "ROUND_HALF_UP"))
+            for t in textos
+        ]
+        self.assertEqual(parse_centavos(textos), esperados)
+
+    def test_invalidos(self):
+        with self.assertRaises(ValueError):
+            parse_centavos(["1,00", "x"])
+        self.assertEqual(
+            parse_centavos(["x", "1.5", "2,00"], estricto=False), [None, None, 200]
+        )
+
+    def test_valores_con_saltos_de_linea(self):
+        self.assertEqual(parse_centavos(["1\n2", "3"], estricto=False), [None, 300])
+
+    def test_columna_vacia(self):
+        self.assertEqual(parse_centavos([]), [])
+
+
+class IndiceCuentasTest(unittest.TestCase):
+    def setUp(self):
+        self.comida = _Cuenta("Comida")
+        self.raiz = _Cuenta("", _Cuenta("Gastos", self.comida))
+        self.addCleanup(invalidar_indice_cuentas)
+
+    def test_ruta_exacta_y_normalizada(self):
+        self.assertIs(find_account_by_path(self.raiz, "Gastos.Comida"), self.comida)
+        self.assertIs(find_account_by_path(self.raiz, "gastos.comida"), self.comida)
+        self.assertIsNone(find_account_by_path(self.raiz, "Gastos.Ropa"))
+
+    def test_renombre_se_ve_tras_invalidar(self):
+        indice = get_indice_cuentas(self.raiz)
+        self.assertIs(indice.buscar("Gastos.Comida"), self.comida)
+        self.comida.nombre = "Alimentos"
+        invalidar_indice_cuentas()
+        # El índice que se conservaba también se reconstruye.
+        self.assertIs(indice.buscar("Gastos.Alimentos"), self.comida)
+        self.assertIsNone(indice.buscar("Gastos.Comida"))
+
+
+if __name__ == "__main__":
+    unittest.main()
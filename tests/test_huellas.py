@@ -0,0 +1,107 @@
+"""Índice de huellas: ids externos tomados del Num al reconstruirlo."""
+
+import unittest
+from datetime import date
+
+from huellas import IndiceHuellas, id_externo_de_num
+from importador import normalizar_id_externo
+
+
+class _Guid:
+    def __init__(self, texto):
+        self.texto = texto
+
+    def to_string(self):
+        return self.texto
+
+
+class _Numero:
+    def __init__(self, num):
+        self._num = num
+
+    def num(self):
+        return self._num
+
+    def denom(self):
+        return 100
+
+
+class _Split:
+    def __init__(self, tx, cuenta, centavos):
+        self.tx, self.cuenta, self.valor = tx, cuenta, _Numero(centavos)
+
+    def GetParent(self):
+        return self.tx
+
+    def GetAccount(self):
+        return self.cuenta
+
+    def GetValue(self):
+        return self.valor
+
+
+class _Transaccion:
+    def __init__(self, guid, num):
+        self.guid, self.num, self.splits = _Guid(guid), num, []
+
+    def GetGUID(self):
+        return self.guid
+
+    def GetNum(self):
+        return self.num
+
+    def GetDate(self):
+        return date(2025, 3, 12)
+
+    def GetSplitList(self):
+        return self.splits
+
+
+class _Cuenta:
+    def __init__(self, guid, hijas=(), splits=()):
+        self.guid, self.hijas, self.splits = _Guid(guid), list(hijas), list(splits)
+
+    def GetGUID(self):
+        return self.guid
+
+    def get_children(self):
+        return self.hijas
+
+    def GetSplitList(self):
+        return self.splits
+
+
+class IdExternoTest(unittest.TestCase):
+    def test_solo_los_num_con_prefijo(self):
+        for num in ("mp:123", "sueldo:2025-03", "cuotas:tv:1/3", "lote:7"):
+            with self.subTest(num=num):
+                self.assertEqual(id_externo_de_num(num), num)
+        for num in ("1", "2", "", None, "a: b"):
+            with self.subTest(num=num):
+                self.assertIsNone(id_externo_de_num(num))
+
+    def test_importador_agrega_prefijo(self):
+        self.assertEqual(normalizar_id_externo("123"), "lote:123")
+        self.assertEqual(normalizar_id_externo(123), "lote:123")
+        self.assertEqual(normalizar_id_externo("mp:9"), "mp:9")
+        self.assertIsNone(normalizar_id_externo(""))
+
+
+class ReconstruirTest(unittest.TestCase):
+    def test_numero_de_cheque_no_es_id(self):
+        origen, destino = _Cuenta("origen"), _Cuenta("destino")
+        for guid, num, centavos in (("a", "1", 100), ("b", "mp:1", 200)):
+            tx = _Transaccion(guid, num)
+            tx.splits = [_Split(tx, origen, -centavos), _Split(tx, destino, centavos)]
+            origen.splits.append(tx.splits[0])
+            destino.splits.append(tx.splits[1])
+        indice = IndiceHuellas(":memory:")
+        self.addCleanup(indice.cerrar)
+
+        self.assertEqual(indice.reconstruir(_Cuenta("raiz", [origen, destino])), 2)
+        self.assertFalse(indice.existe(id_externo="1"))
+        self.assertTrue(indice.existe(id_externo="mp:1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""Descarga concurrente de actividades contra un servidor HTTP local."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts")
+)
+
+import mp_transactions_retrieval as mp  # noqa: E402
+
+PAGINAS = 6  # las páginas siguientes vuelven vacías
+POR_PAGINA = 3
+
+
+class _Servidor(BaseHTTPRequestHandler):
+    """
+    Sirve PAGINAS páginas de actividades. Las primeras tardan más, así que
+    terminan después de las siguientes; la página 2 responde 429 la primera
+    vez.
+    """
+
+    pedidos = []
+    rechazadas = set()
+
+    def do_GET(self):
+        pagina = int(parse_qs(urlparse(self.path).query)["page"][0])
+        self.pedidos.append(pagina)
+        if pagina == 2 and pagina not in self.rechazadas:
+            self.rechazadas.add(pagina)
+            self._responder(429, {}, {"Retry-After": "0"})
+            return
+        time.sleep(max(0.0, 0.05 * (4 - pagina)))
+        resultados = (
+            [{"id": pagina * 100 + i} for i in range(POR_PAGINA)]
+            if pagina <= PAGINAS
+            else []
+        )
+        self._responder(200, {"results": resultados})
+
+    def _responder(self, codigo, cuerpo, cabeceras=None):
+        datos = json.dumps(cuerpo).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, *args):
+        pass
+
+
+def ids_de_pagina(pagina):
+    return [pagina * 100 + i for i in range(POR_PAGINA)]
+
+
+class DescargaConcurrenteTest(unittest.TestCase):
+    def setUp(self):
+        _Servidor.pedidos = []
+        _Servidor.rechazadas = set()
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Servidor)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.servidor.server_port}/list"
+        self.http = mp.crear_sesion_http({}, concurrencia=4)
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.salida = os.path.join(directorio.name, "actividades.jsonl")
+
+    def tearDown(self):
+        self.http.close()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def obtener(self, http, period, page):
+        return mp.obtener_pagina(http, period, page, base_url=self.url)
+
+    def descargar(self, concurrencia=4):
+        with redirect_stdout(io.StringIO()):
+            return mp.descargar_actividades(
+                self.http,
+                "last_week",
+                self.salida,
+                obtener=self.obtener,
+                concurrencia=concurrencia,
+            )
+
+    def leer_ids(self):
+        with open(self.salida, encoding="utf-8") as f:
+            return [json.loads(linea)["id"] for linea in f]
+
+    def test_escribe_las_paginas_en_orden(self):
+        escritas = self.descargar()
+        esperados = [i for p in range(1, PAGINAS + 1) for i in ids_de_pagina(p)]
+        self.assertEqual(escritas, len(esperados))
+        self.assertEqual(self.leer_ids(), esperados)
+        # La página 2 se pidió dos veces: el 429 y su reintento.
+        self.assertEqual(_Servidor.pedidos.count(2), 2)
+        with open(mp.ruta_estado(self.salida), encoding="utf-8") as f:
+            estado = json.load(f)
+        self.assertIsNone(estado["en_curso"])
+        self.assertEqual(estado["ids_conocidos"][:POR_PAGINA], ids_de_pagina(1))
+
+    def test_se_detiene_en_las_actividades_conocidas(self):
+        self.descargar()
+        _Servidor.pedidos = []
+        self.assertEqual(self.descargar(), 0)
+        self.assertLessEqual(max(_Servidor.pedidos), 4)
+
+    def test_retoma_desde_la_pagina_guardada(self):
+        mp.guardar_estado(
+            self.salida,
+            {
+                "en_curso": {
+                    "period": "last_week",
+                    "pagina": 3,
+                    "ids_nuevos": [],
+                    "ids_pagina": ids_de_pagina(3),
+                },
+                "ids_conocidos": [],
+            },
+        )
+        self.descargar()
+        self.assertNotIn(1, _Servidor.pedidos)
+        esperados = [i for p in range(4, PAGINAS + 1) for i in ids_de_pagina(p)]
+        self.assertEqual(self.leer_ids(), esperados)
+
+    def test_sin_concurrencia_mismo_resultado(self):
+        self.descargar(concurrencia=1)
+        esperados = [i for p in range(1, PAGINAS + 1) for i in ids_de_pagina(p)]
+        self.assertEqual(self.leer_ids(), esperados)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Plan de deducciones y cálculo del bruto a partir del neto."""
+
+import unittest
+
+from nomina import PlanDeducciones
+
+def deduccion(nombre, tipo, valor, **extra):
+    return {
+        "nombre": nombre,
+        "tipo": tipo,
+        "valor": valor,
+        "cuenta_destino": nombre.lower(),
+        **extra,
+    }
+
+
+DEDUCCIONES = [
+    deduccion("Jubilacion", "porcentaje", 11.0),
+    deduccion("Obra Social", "porcentaje", 3),
+    deduccion("Prestamo", "fijo", 17470.00, desde="2025-01", hasta="2025-03"),
+    deduccion("Redondeo", "fijo", 0.67),
+]
+
+
+class PlanDeduccionesTest(unittest.TestCase):
+    def setUp(self):
+        self.plan = PlanDeducciones(DEDUCCIONES)
+
+    def test_deducciones_exactas(self):
+        deducidas = {
+            d["nombre"]: centavos
+            for d, centavos in self.plan.deducir(100_000_00, "2025-02")
+        }
+        self.assertEqual(
+            deducidas,
+            {
+                "Jubilacion": 11_000_00,
+                "Obra Social": 3_000_00,
+                "Prestamo": 17_470_00,
+                "Redondeo": 67,
+            },
+        )
+        self.assertEqual(self.plan.neto(100_000_00, "2025-02"), 68_529_33)
+
+    def test_vigencia_por_periodo(self):
+        nombres = [d["nombre"] for d in self.plan.vigentes("2025-04")]
+        self.assertNotIn("Prestamo", nombres)
+        self.assertEqual(len(self.plan.vigentes()), 4)
+
+    def test_bruto_desde_neto_ida_y_vuelta(self):
+        for bruto in (100_000_00, 123_456_78, 1_00, 987_654_321):
+            for periodo in ("2025-02", "2025-06"):
+                with self.subTest(bruto=bruto, periodo=periodo):
+                    neto = self.plan.neto(bruto, periodo)
+                    calculado = self.plan.bruto_desde_neto(neto, periodo)
+                    self.assertEqual(self.plan.neto(calculado, periodo), neto)
+
+    def test_porcentajes_de_cien_o_mas(self):
+        plan = PlanDeducciones([deduccion("Todo", "porcentaje", 100)])
+        with self.assertRaises(ValueError):
+            plan.bruto_desde_neto(1000)
+
+    def test_tipo_desconocido(self):
+        with self.assertRaises(ValueError):
+            PlanDeducciones([deduccion("X", "otro", 1)])
+
+    def test_modificado(self):
+        sin_prestamo = self.plan.modificado(sin=["Prestamo"])
+        self.assertEqual(
+            self.plan.neto(100_000_00, "2025-02") + 17_470_00,
+            sin_prestamo.neto(100_000_00, "2025-02"),
+        )
+        corto = self.plan.modificado(cambios={"Prestamo": {"hasta": "2025-01"}})
+        self.assertEqual(
+            corto.neto(100_000_00, "2025-02"), sin_prestamo.neto(100_000_00, "2025-02")
+        )
+        with self.assertRaises(ValueError):
+            self.plan.modificado(sin=["No existe"])
+
+    def test_recibo_desde_neto(self):
+        recibo = self.plan.recibo_desde_neto("2025-02", 68_529_33)
+        self.assertEqual(recibo["sueldo_bruto"], 100_000_00)
+        self.assertEqual(recibo["aguinaldo_bruto"], 0)
+        self.assertEqual(recibo["neto"], 68_529_33)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Ocurrencias de las reglas recurrentes y su estado."""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from recurrentes import EstadoRecurrentes, id_ocurrencia, ocurrencias
+
+REGLA = {"nombre": "Alquiler", "dia": 31, "desde": "2024-11"}
+
+
+class OcurrenciasTest(unittest.TestCase):
+    def test_limita_el_dia_al_fin_de_mes(self):
+        self.assertEqual(
+            list(ocurrencias(REGLA, date(2025, 3, 31))),
+            [
+                date(2024, 11, 30),
+                date(2024, 12, 31),
+                date(2025, 1, 31),
+                date(2025, 2, 28),
+                date(2025, 3, 31),
+            ],
+        )
+
+    def test_hasta_antes_del_dia_del_mes(self):
+        fechas = list(ocurrencias(REGLA, date(2025, 1, 15), desde="2024-12"))
+        self.assertEqual(fechas, [date(2024, 12, 31)])
+
+    def test_desde_posterior_a_hasta(self):
+        self.assertEqual(list(ocurrencias(REGLA, date(2025, 1, 31), "2025-02")), [])
+
+    def test_id_externo(self):
+        self.assertEqual(
+            id_ocurrencia(REGLA, date(2025, 2, 28)), "recurrente:Alquiler:2025-02"
+        )
+        regla = {**REGLA, "id_externo": "alquiler"}
+        self.assertEqual(id_ocurrencia(regla, date(2025, 2, 28)), "alquiler:2025-02")
+
+
+class EstadoRecurrentesTest(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "recurrentes.json")
+
+    def test_sin_estado_empieza_en_el_mes_de_hasta(self):
+        estado = EstadoRecurrentes(self.ruta)
+        self.assertEqual(estado.desde(REGLA, date(2025, 4, 10)), "2025-04")
+
+    def test_sin_estado_con_inicio(self):
+        estado = EstadoRecurrentes(self.ruta)
+        self.assertEqual(estado.desde(REGLA, date(2025, 4, 10), "2025-01"), "2025-01")
+        # Nunca antes del "desde" de la regla.
+        self.assertEqual(estado.desde(REGLA, date(2025, 4, 10), "2020-01"), "2024-11")
+
+    def test_sigue_al_ultimo_mes_guardado(self):
+        estado = EstadoRecurrentes(self.ruta)
+        estado.marcar(REGLA, date(2024, 12, 31))
+        estado.guardar()
+        leido = EstadoRecurrentes(self.ruta)
+        self.assertEqual(leido.desde(REGLA, date(2025, 4, 10), "2020-01"), "2025-01")
+
+    def test_estado_ilegible(self):
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            f.write("{roto")
+        self.assertEqual(EstadoRecurrentes(self.ruta).ultimos, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
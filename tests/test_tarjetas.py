@@ -0,0 +1,112 @@
+"""Plan de cuotas y reparto de movimientos en los ciclos de una tarjeta."""
+
+import unittest
+from datetime import date
+
+from dinero import Monto
+from tarjetas import (
+    CalendarioTarjeta,
+    CiclosTarjeta,
+    ciclo_de_mes,
+    importes_cuotas,
+    plan_de_cuotas,
+)
+
+# Cierre el 24 y vencimiento el 5; el resumen de marzo de 2025 cierra el 27.
+TARJETA = {
+    "cierre": 24,
+    "vencimiento": 5,
+    "calendario": {"2025-03": {"cierre": "2025-03-27"}},
+}
+
+
+class CalendarioTest(unittest.TestCase):
+    def setUp(self):
+        self.calendario = CalendarioTarjeta("prueba", TARJETA)
+
+    def test_ciclo_de_un_consumo(self):
+        casos = [
+            (date(2025, 2, 24), (2025, 2)),
+            (date(2025, 2, 25), (2025, 3)),
+            # El cierre publicado de marzo es el 27.
+            (date(2025, 3, 26), (2025, 3)),
+            (date(2025, 4, 25), (2025, 5)),
+        ]
+        for fecha, (anio, mes) in casos:
+            with self.subTest(fecha=fecha):
+                self.assertEqual(self.calendario.ciclo(fecha), ciclo_de_mes(anio, mes))
+
+    def test_vencimiento_en_el_mes_siguiente(self):
+        self.assertEqual(
+            self.calendario.vencimiento(ciclo_de_mes(2025, 12)), date(2026, 1, 5)
+        )
+
+
+class PlanDeCuotasTest(unittest.TestCase):
+    def test_importes_reparten_los_centavos_en_la_primera(self):
+        self.assertEqual(
+            importes_cuotas(Monto(100000), 3),
+            [Monto(33334), Monto(33333), Monto(33333)],
+        )
+        self.assertEqual(importes_cuotas(Monto(-1001), 2), [Monto(-501), Monto(-500)])
+        with self.assertRaises(ValueError):
+            importes_cuotas(Monto(100), 0)
+
+    def test_una_cuota_por_resumen(self):
+        compra = {
+            "tarjeta": "prueba",
+            "fecha": date(2025, 1, 30),
+            "descripcion": "Televisor",
+            "cuenta": "gasto",
+            "monto": Monto(100000),
+            "cuotas": 3,
+        }
+        plan = plan_de_cuotas(compra, CalendarioTarjeta("prueba", TARJETA))
+        self.assertEqual([c["numero"] for c in plan], [1, 2, 3])
+        self.assertEqual(
+            [c["fecha"] for c in plan],
+            [date(2025, 1, 30), date(2025, 3, 27), date(2025, 4, 24)],
+        )
+        self.assertEqual(
+            [c["cierre"] for c in plan],
+            [date(2025, 2, 24), date(2025, 3, 27), date(2025, 4, 24)],
+        )
+        self.assertEqual(plan[0]["vencimiento"], date(2025, 3, 5))
+        self.assertEqual(sum(c["monto"] for c in plan), Monto(100000))
+
+
+class AgruparTest(unittest.TestCase):
+    def test_reparte_en_los_ciclos(self):
+        calendario = CalendarioTarjeta("prueba", TARJETA)
+        ciclos = CiclosTarjeta(
+            calendario, ciclo_de_mes(2025, 2), ciclo_de_mes(2025, 4)
+        )
+        # Pasivo: los cargos tienen signo negativo en el libro.
+        resultado = ciclos.agrupar(
+            [
+                "2025-01-10",  # antes del primer ciclo: saldo inicial
+                "2025-02-10",
+                "2025-03-01",  # pago
+                "2025-03-26",
+                "2025-04-20",
+                "2025-05-01",  # después del último cierre
+            ],
+            [-1000, -2000, 5000, -300, -400, -999],
+            [False, True, False, False, True, False],
+        )
+        self.assertEqual(resultado["inicial"], 1000)
+        self.assertEqual(resultado["cargos"].tolist(), [2000, 300, 400])
+        self.assertEqual(resultado["pagos"].tolist(), [0, 5000, 0])
+        self.assertEqual(resultado["marcados"].tolist(), [2000, 0, 400])
+        self.assertEqual(resultado["saldo"].tolist(), [3000, -1700, -1300])
+
+    def test_sin_marcados(self):
+        calendario = CalendarioTarjeta("prueba", TARJETA)
+        ciclos = CiclosTarjeta(calendario, ciclo_de_mes(2025, 2), ciclo_de_mes(2025, 2))
+        resultado = ciclos.agrupar(["2025-02-01"], [-100])
+        self.assertEqual(resultado["marcados"].tolist(), [0])
+        self.assertEqual(resultado["saldo"].tolist(), [100])
+
+
+if __name__ == "__main__":
+    unittest.main()